@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Customer
+from .models import Customer, Area
 
 
 @admin.register(Customer)
@@ -7,10 +7,17 @@ class CustomerAdmin(admin.ModelAdmin):
     list_display = ('name', 'phone_number', 'area', 'address', 'is_daily', 'is_monthly', 'is_dl', 'created_by', 'created_at')
     list_filter = ('area', 'is_daily', 'is_monthly', 'is_dl', 'created_at')
     search_fields = ('name', 'phone_number', 'address', 'area')
-    readonly_fields = ('created_by', 'created_at', 'updated_at')
+    readonly_fields = ('area_ref', 'created_by', 'created_at', 'updated_at')
     list_select_related = ('created_by',)
 
     def save_model(self, request, obj, form, change):
         if not obj.pk:
             obj.created_by = request.user
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+
+@admin.register(Area)
+class AreaAdmin(admin.ModelAdmin):
+    list_display = ('name', 'customer_count', 'active_loan_count', 'outstanding_amount', 'collections_today', 'collections_date')
+    search_fields = ('name',)
+    readonly_fields = ('key', 'customer_count', 'active_loan_count', 'outstanding_amount',
+                       'collections_today', 'collections_date', 'updated_at')
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .models import Customer
+
+
+def _open_loan_totals(customer_ids=None):
+    from transactions.models import Loan
+    loans = Loan.objects.filter(status__in=Loan.OPEN_STATUSES)
+    if customer_ids is not None:
+        loans = loans.filter(customer_id__in=customer_ids)
+    return {
+        row['customer']: row
+        for row in loans.values('customer').annotate(
+            loans=Count('id'), outstanding=Sum('remaining_amount'), pending=Sum('pending_interest')
+        )
+    }
+
+
+def refresh_pending_interest(customer_ids):
+    """Re-sum total_pending_interest for customers whose loans were bulk-updated (e.g. by accrual)"""
+    totals = _open_loan_totals(customer_ids)
+    customers = list(Customer.objects.filter(pk__in=customer_ids).only('pk'))
+    for customer in customers:
+        customer.total_pending_interest = totals.get(customer.pk, {}).get('pending') or Decimal('0')
+    Customer.objects.bulk_update(customers, ['total_pending_interest'], batch_size=1000)
+
+
+def rebuild_customer_aggregates(batch_size=1000):
+    """Recompute every customer's aggregates from loans and transactions"""
+    from transactions.models import Transaction
+
+    latest = Transaction.objects.filter(loan__customer=OuterRef('pk')).order_by('-created_at', '-pk')
+    totals = _open_loan_totals()
+    customers = Customer.objects.annotate(
+        latest_at=Subquery(latest.values('created_at')[:1]),
+        latest_amount=Subquery(latest.values('amount')[:1]),
+    ).only('pk').order_by('pk')
+
+    updated = 0
+    batch = []
+    with transaction.atomic():
+        for customer in customers.iterator(chunk_size=batch_size):
+            row = totals.get(customer.pk, {})
+            customer.active_loan_count = row.get('loans', 0)
+            customer.total_outstanding = row.get('outstanding') or Decimal('0')
+            customer.total_pending_interest = row.get('pending') or Decimal('0')
+            customer.last_payment_date = timezone.localdate(customer.latest_at) if customer.latest_at else None
+            customer.last_payment_amount = customer.latest_amount
+            batch.append(customer)
+            if len(batch) >= batch_size:
+                Customer.objects.bulk_update(batch, Customer.AGGREGATE_FIELDS)
+                updated += len(batch)
+                batch = []
+        Customer.objects.bulk_update(batch, Customer.AGGREGATE_FIELDS)
+        updated += len(batch)
+    return updated
@@ -0,0 +1,55 @@
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Area, Customer, normalize_area
+
+
+def link_customer_areas():
+    """Attach customers without an Area (e.g. bulk-loaded rows) to their normalized area"""
+    names = list(Customer.objects.filter(area_ref__isnull=True).values_list('area', flat=True).distinct())
+    linked = 0
+    for key in sorted({normalize_area(name) for name in names}):
+        variants = [name for name in names if normalize_area(name) == key]
+        area = Area.resolve(variants[0])
+        linked += Customer.objects.filter(area_ref__isnull=True, area__in=variants).update(
+            area_ref=area, area=area.name
+        )
+    return linked
+
+
+def rebuild_area_counters():
+    """Recompute every area's counters from scratch with grouped queries"""
+    from transactions.models import Loan, Transaction
+
+    today = timezone.localdate()
+    midnight = timezone.make_aware(datetime.combine(today, time.min))
+    customers = dict(
+        Customer.objects.values('area_ref').annotate(total=Count('id')).values_list('area_ref', 'total')
+    )
+    loans = {
+        row['customer__area_ref']: row
+        for row in Loan.objects.filter(status__in=Loan.OPEN_STATUSES)
+        .values('customer__area_ref').annotate(total=Count('id'), outstanding=Sum('remaining_amount'))
+    }
+    collections = dict(
+        Transaction.objects.filter(created_at__gte=midnight)
+        .values('loan__customer__area_ref').annotate(total=Sum('amount'))
+        .values_list('loan__customer__area_ref', 'total')
+    )
+
+    with transaction.atomic():
+        areas = list(Area.objects.select_for_update())
+        for area in areas:
+            area.customer_count = customers.get(area.pk, 0)
+            area.active_loan_count = loans.get(area.pk, {}).get('total', 0)
+            area.outstanding_amount = loans.get(area.pk, {}).get('outstanding') or Decimal('0')
+            area.collections_today = collections.get(area.pk) or Decimal('0')
+            area.collections_date = today
+        Area.objects.bulk_update(areas, [
+            'customer_count', 'active_loan_count', 'outstanding_amount', 'collections_today', 'collections_date',
+        ])
+    return len(areas)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from customers.areas import link_customer_areas, rebuild_area_counters
+
+
+class Command(BaseCommand):
+    help = 'Link customers to normalized areas and recompute area counters from scratch'
+
+    def handle(self, *args, **options):
+        linked = link_customer_areas()
+        areas = rebuild_area_counters()
+        self.stdout.write(self.style.SUCCESS(f'{linked} customers linked, counters rebuilt for {areas} areas'))
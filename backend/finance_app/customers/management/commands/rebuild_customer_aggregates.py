@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from customers.aggregates import rebuild_customer_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recompute customer outstanding, pending interest, active loans and last payment from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = rebuild_customer_aggregates(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Aggregates rebuilt for {updated} customers'))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Area',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('key', models.CharField(help_text='Normalized name used for lookups', max_length=50, unique=True)),
+                ('customer_count', models.PositiveIntegerField(default=0)),
+                ('active_loan_count', models.PositiveIntegerField(default=0)),
+                ('outstanding_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('collections_today', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('collections_date', models.DateField(blank=True, help_text='Day collections_today refers to', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Area',
+                'verbose_name_plural': 'Areas',
+                'db_table': 'customers_area',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='area_ref',
+            field=models.ForeignKey(blank=True, help_text='Normalized area (kept in sync with the area name on save)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='customers', to='customers.area'),
+        ),
+    ]
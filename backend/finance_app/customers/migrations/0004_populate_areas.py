@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def populate_areas(apps, schema_editor):
+    Area = apps.get_model('customers', 'Area')
+    Customer = apps.get_model('customers', 'Customer')
+    Loan = apps.get_model('transactions', 'Loan')
+
+    areas = {}
+    for name in Customer.objects.values_list('area', flat=True).distinct():
+        display = ' '.join((name or '').split())
+        key = display.lower()
+        if key not in areas:
+            areas[key] = Area.objects.create(name=display, key=key)
+        Customer.objects.filter(area=name).update(area_ref=areas[key], area=areas[key].name)
+
+    customers = dict(
+        Customer.objects.values('area_ref').annotate(total=Count('id')).values_list('area_ref', 'total')
+    )
+    loans = {
+        row['customer__area_ref']: row
+        for row in Loan.objects.filter(status__in=['active', 'overdue'])
+        .values('customer__area_ref').annotate(total=Count('id'), outstanding=Sum('remaining_amount'))
+    }
+    for area in areas.values():
+        area.customer_count = customers.get(area.pk, 0)
+        area.active_loan_count = loans.get(area.pk, {}).get('total', 0)
+        area.outstanding_amount = loans.get(area.pk, {}).get('outstanding') or 0
+        area.save(update_fields=['customer_count', 'active_loan_count', 'outstanding_amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_area'),
+        ('transactions', '0014_transaction_loan_created_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_areas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+
+def populate_aggregates(apps, schema_editor):
+    Customer = apps.get_model('customers', 'Customer')
+    Loan = apps.get_model('transactions', 'Loan')
+    Transaction = apps.get_model('transactions', 'Transaction')
+
+    totals = {
+        row['customer']: row
+        for row in Loan.objects.filter(status__in=['active', 'overdue']).values('customer').annotate(
+            loans=Count('id'), outstanding=Sum('remaining_amount'), pending=Sum('pending_interest')
+        )
+    }
+    latest = Transaction.objects.filter(loan__customer=OuterRef('pk')).order_by('-created_at', '-pk')
+    customers = list(Customer.objects.annotate(
+        latest_at=Subquery(latest.values('created_at')[:1]),
+        latest_amount=Subquery(latest.values('amount')[:1]),
+    ))
+    for customer in customers:
+        row = totals.get(customer.pk, {})
+        customer.active_loan_count = row.get('loans', 0)
+        customer.total_outstanding = row.get('outstanding') or 0
+        customer.total_pending_interest = row.get('pending') or 0
+        customer.last_payment_date = timezone.localdate(customer.latest_at) if customer.latest_at else None
+        customer.last_payment_amount = customer.latest_amount
+    Customer.objects.bulk_update(customers, [
+        'active_loan_count', 'total_outstanding', 'total_pending_interest', 'last_payment_date', 'last_payment_amount',
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0005_customer_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_aggregates, migrations.RunPython.noop),
+    ]
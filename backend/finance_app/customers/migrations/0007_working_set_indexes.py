@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0006_populate_customer_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['created_by', 'created_at'], name='customers_c_created_74e74b_idx'),
+        ),
+    ]
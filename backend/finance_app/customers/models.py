@@ -1,11 +1,89 @@
+from datetime import date
+from decimal import Decimal
 from django.db import models
+from django.db.models import F
 from django.conf import settings
+from django.utils import timezone
+
+
+def normalize_area(name):
+    """Lookup key for an area name: trimmed, single-spaced, case-insensitive"""
+    return ' '.join((name or '').split()).lower()
+
+
+class Area(models.Model):
+    """
+    Registry of collection areas with counters maintained on write
+    (see Customer.save/delete, Loan.save/delete and Transaction.save).
+    """
+    name = models.CharField(max_length=50)
+    key = models.CharField(max_length=50, unique=True, help_text="Normalized name used for lookups")
+    customer_count = models.PositiveIntegerField(default=0)
+    active_loan_count = models.PositiveIntegerField(default=0)
+    outstanding_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    collections_today = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    collections_date = models.DateField(null=True, blank=True, help_text="Day collections_today refers to")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def resolve(cls, name):
+        """Area for a free-text name, created on first use"""
+        area, _ = cls.objects.get_or_create(
+            key=normalize_area(name), defaults={'name': ' '.join((name or '').split())}
+        )
+        return area
+    
+    @classmethod
+    def adjust(cls, area_id, customers=0, loans=0, outstanding=Decimal('0')):
+        """Apply counter deltas atomically in the database"""
+        if not area_id or not (customers or loans or outstanding):
+            return
+        cls.objects.filter(pk=area_id).update(
+            customer_count=F('customer_count') + customers,
+            active_loan_count=F('active_loan_count') + loans,
+            outstanding_amount=F('outstanding_amount') + outstanding,
+        )
+    
+    @classmethod
+    def record_collection(cls, area_id, amount, on=None):
+        """Add amount to the area's collections for a day (negative to reverse)"""
+        if not area_id or not amount:
+            return
+        on = on or date.today()
+        updated = cls.objects.filter(pk=area_id, collections_date=on).update(
+            collections_today=F('collections_today') + amount
+        )
+        # First collection of the day resets yesterday's total
+        if not updated and on == date.today():
+            cls.objects.filter(pk=area_id).update(collections_date=on, collections_today=amount)
+    
+    @property
+    def todays_collections(self):
+        return self.collections_today if self.collections_date == date.today() else Decimal('0')
+    
+    class Meta:
+        db_table = 'customers_area'
+        verbose_name = 'Area'
+        verbose_name_plural = 'Areas'
+        ordering = ['name']
+
 
 class Customer(models.Model):
     name = models.CharField(max_length=100)
     phone_number = models.CharField(max_length=15, db_index=True)
     address = models.TextField()
     area = models.CharField(max_length=50, db_index=True)
+    area_ref = models.ForeignKey(
+        Area,
+        on_delete=models.PROTECT,
+        related_name='customers',
+        null=True,
+        blank=True,
+        help_text="Normalized area (kept in sync with the area name on save)"
+    )
     is_daily = models.BooleanField(default=False)
     is_monthly = models.BooleanField(default=False)
     is_dl = models.BooleanField(default=False)
@@ -17,9 +95,90 @@ class Customer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Aggregates over the customer's open loans, maintained on write (see Loan.save)
+    total_outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_pending_interest = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Accrued pending interest (excludes the running cycle)")
+    active_loan_count = models.PositiveIntegerField(default=0)
+    last_payment_date = models.DateField(null=True, blank=True)
+    last_payment_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    
+    # Only ever written through F() updates, never from a possibly stale instance
+    AGGREGATE_FIELDS = ('total_outstanding', 'total_pending_interest', 'active_loan_count',
+                        'last_payment_date', 'last_payment_amount')
+    
     def __str__(self):
         return f"{self.name} ({self.phone_number})"
     
+    @classmethod
+    def adjust(cls, customer_id, loans=0, outstanding=Decimal('0'), pending_interest=Decimal('0')):
+        """Apply aggregate deltas atomically in the database"""
+        if not customer_id or not (loans or outstanding or pending_interest):
+            return
+        cls.objects.filter(pk=customer_id).update(
+            active_loan_count=F('active_loan_count') + loans,
+            total_outstanding=F('total_outstanding') + outstanding,
+            total_pending_interest=F('total_pending_interest') + pending_interest,
+        )
+    
+    @classmethod
+    def record_payment(cls, customer_id, txn):
+        """Remember a newly posted transaction as the customer's last payment"""
+        cls.objects.filter(pk=customer_id).update(
+            last_payment_date=timezone.localdate(txn.created_at), last_payment_amount=txn.amount
+        )
+    
+    @classmethod
+    def refresh_last_payment(cls, customer_id):
+        """Re-derive the last payment after a transaction was edited or deleted"""
+        from transactions.models import Transaction
+        latest = (
+            Transaction.objects.filter(loan__customer_id=customer_id)
+            .order_by('-created_at', '-pk').values('created_at', 'amount').first()
+        )
+        cls.objects.filter(pk=customer_id).update(
+            last_payment_date=timezone.localdate(latest['created_at']) if latest else None,
+            last_payment_amount=latest['amount'] if latest else None,
+        )
+    
+    def _open_loan_totals(self):
+        from transactions.models import Loan
+        totals = self.loans.filter(status__in=Loan.OPEN_STATUSES).aggregate(
+            loans=models.Count('id'), outstanding=models.Sum('remaining_amount')
+        )
+        return totals['loans'], totals['outstanding'] or Decimal('0')
+    
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        previous_area_id = None
+        if not adding:
+            previous_area_id = Customer.objects.filter(pk=self.pk).values_list('area_ref_id', flat=True).first()
+        
+        area = Area.resolve(self.area)
+        self.area = area.name
+        self.area_ref = area
+        if not adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.AGGREGATE_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        
+        if adding:
+            Area.adjust(area.pk, customers=1)
+        elif previous_area_id != area.pk:
+            # Area changed: move the customer and its open loans across
+            loans, outstanding = self._open_loan_totals()
+            Area.adjust(previous_area_id, customers=-1, loans=-loans, outstanding=-outstanding)
+            Area.adjust(area.pk, customers=1, loans=loans, outstanding=outstanding)
+    
+    def delete(self, *args, **kwargs):
+        # Loans are removed by cascade, which bypasses Loan.delete
+        loans, outstanding = self._open_loan_totals()
+        area_id = self.area_ref_id
+        result = super().delete(*args, **kwargs)
+        Area.adjust(area_id, customers=-1, loans=-loans, outstanding=-outstanding)
+        return result
+    
     class Meta:
         db_table = 'customers_customer'
         verbose_name = 'Customer'
@@ -27,4 +186,8 @@ class Customer(models.Model):
         indexes = [
             models.Index(fields=['phone_number']),
             models.Index(fields=['area']),
-        ]
\ No newline at end of file
+            models.Index(fields=['total_outstanding']),
+            models.Index(fields=['last_payment_date']),
+            # Admin list: created_by=user, newest first
+            models.Index(fields=['created_by', 'created_at']),
+        ]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Customer
+from .models import Customer, Area
 from transactions.serializers import LoanSerializer
 
 class CustomerSerializer(serializers.ModelSerializer):
@@ -8,11 +8,28 @@ class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
         fields = ['id', 'name', 'phone_number', 'address', 'area', 
-                 'is_daily', 'is_monthly', 'is_dl', 'loans', 'created_at', 'created_by']
-        read_only_fields = ['created_by', 'created_at', 'updated_at']
+                 'is_daily', 'is_monthly', 'is_dl', 'loans', 'created_at', 'created_by',
+                 # Maintained aggregates
+                 'total_outstanding', 'total_pending_interest', 'active_loan_count',
+                 'last_payment_date', 'last_payment_amount']
+        read_only_fields = ['created_by', 'created_at', 'updated_at', 'total_outstanding', 'total_pending_interest',
+                            'active_loan_count', 'last_payment_date', 'last_payment_amount']
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('include_loans', True):
+            self.fields.pop('loans')
     
     def create(self, validated_data):
         # Get the user from the request
         user = self.context['request'].user
         validated_data['created_by'] = user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class AreaSerializer(serializers.ModelSerializer):
+    collections_today = serializers.DecimalField(source='todays_collections', max_digits=14, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = Area
+        fields = ['id', 'name', 'customer_count', 'active_loan_count', 'outstanding_amount', 'collections_today']
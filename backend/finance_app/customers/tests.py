@@ -1,3 +1,107 @@
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+
+from transactions.models import Loan, Transaction
+from users.models import User
+from .aggregates import rebuild_customer_aggregates
+from .areas import rebuild_area_counters
+from .models import Area, Customer
+
+
+class AreaCounterTests(TestCase):
+    """Counters maintained on write must match a full rebuild."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='x', role='owner')
+
+    def _counters(self, *extra):
+        return sorted(Area.objects.values_list('name', 'customer_count', 'active_loan_count', 'outstanding_amount', *extra))
+
+    def test_area_names_are_normalized(self):
+        Customer.objects.create(name='A', phone_number='1', address='-', area=' North ', created_by=self.user)
+        customer = Customer.objects.create(name='B', phone_number='2', address='-', area='north', created_by=self.user)
+        self.assertEqual(Area.objects.count(), 1)
+        self.assertEqual(customer.area, 'North')
+        self.assertEqual(Area.objects.get().customer_count, 2)
+
+    def test_counters_follow_loans_payments_and_moves(self):
+        customer = Customer.objects.create(name='A', phone_number='1', address='-', area='North', created_by=self.user)
+        loan = Loan.objects.create(
+            customer=customer, loan_type='DC Loan', principal_amount=Decimal('1000'),
+            remaining_amount=Decimal('1000'), daily_collection_amount=Decimal('100'), created_by=self.user
+        )
+        Transaction.objects.create(loan=loan, amount=Decimal('1000'), asal_amount=Decimal('1000'), created_by=self.user)
+        self.assertEqual(self._counters('collections_today'), [('North', 1, 0, Decimal('0.00'), Decimal('1000.00'))])
+
+        Loan.objects.create(
+            customer=customer, loan_type='DC Loan', principal_amount=Decimal('500'),
+            remaining_amount=Decimal('500'), daily_collection_amount=Decimal('50'), created_by=self.user
+        )
+        customer.area = 'South'
+        customer.save()
+        maintained = self._counters()
+        rebuild_area_counters()
+        self.assertEqual(maintained, self._counters())
+
+
+class CustomerAggregateTests(TestCase):
+    """Aggregates maintained on write must match a full rebuild."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='x', role='owner')
+        self.customer = Customer.objects.create(name='A', phone_number='1', address='-', area='North',
+                                                created_by=self.user)
+
+    def _aggregates(self):
+        return tuple(Customer.objects.filter(pk=self.customer.pk).values_list(*Customer.AGGREGATE_FIELDS).get())
+
+    def _loan(self, amount):
+        return Loan.objects.create(
+            customer=self.customer, loan_type='DC Loan', principal_amount=Decimal(amount),
+            remaining_amount=Decimal(amount), daily_collection_amount=Decimal('100'), created_by=self.user
+        )
+
+    def _pay(self, loan, asal):
+        return Transaction.objects.create(loan=loan, amount=Decimal(asal), asal_amount=Decimal(asal),
+                                          created_by=self.user)
+
+    def test_loans_and_payments_update_totals(self):
+        small, large = self._loan('500'), self._loan('1000')
+        self._pay(large, '300')
+        customer = Customer.objects.get(pk=self.customer.pk)
+        self.assertEqual((customer.active_loan_count, customer.total_outstanding), (2, Decimal('1200.00')))
+        self.assertEqual((customer.last_payment_date, customer.last_payment_amount),
+                         (timezone.localdate(), Decimal('300.00')))
+
+        # Settling a loan drops it from the open totals
+        self._pay(small, '500')
+        customer = Customer.objects.get(pk=self.customer.pk)
+        self.assertEqual((customer.active_loan_count, customer.total_outstanding), (1, Decimal('700.00')))
+        maintained = self._aggregates()
+        rebuild_customer_aggregates()
+        self.assertEqual(maintained, self._aggregates())
+
+    def test_edits_and_deletes_rederive_the_last_payment(self):
+        loan = self._loan('1000')
+        first = self._pay(loan, '100')
+        latest = self._pay(loan, '200')
+
+        latest.asal_amount = latest.amount = Decimal('250')
+        latest.save()
+        customer = Customer.objects.get(pk=self.customer.pk)
+        self.assertEqual((customer.total_outstanding, customer.last_payment_amount),
+                         (Decimal('650.00'), Decimal('250.00')))
+
+        latest.delete()
+        customer = Customer.objects.get(pk=self.customer.pk)
+        self.assertEqual((customer.total_outstanding, customer.last_payment_amount),
+                         (Decimal('900.00'), first.amount))
 
-# Create your tests here.
+        first.delete()
+        customer = Customer.objects.get(pk=self.customer.pk)
+        self.assertEqual((customer.last_payment_date, customer.last_payment_amount), (None, None))
+        maintained = self._aggregates()
+        rebuild_customer_aggregates()
+        self.assertEqual(maintained, self._aggregates())
@@ -1,9 +1,11 @@
 # Add this to your existing url.py file in the customers app
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CustomerViewSet
+from .views import CustomerViewSet, AreaViewSet
 
 router = DefaultRouter()
+# Registered before the customer routes, which live at the root
+router.register(r'areas', AreaViewSet, basename='area')
 router.register(r'', CustomerViewSet, basename='customer')
 
 urlpatterns = [
@@ -1,21 +1,60 @@
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from django.db.models import Prefetch, Q
 from rest_framework import viewsets, permissions
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Customer
-from .serializers import CustomerSerializer
+from transactions.models import Loan
+from .models import Customer, Area
+from .serializers import CustomerSerializer, AreaSerializer
 
 class CustomerViewSet(viewsets.ModelViewSet):
     serializer_class = CustomerSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Fields accepted by ?ordering= (prefix with - for descending), all backed by maintained aggregates
+    ORDERING_FIELDS = ('total_outstanding', 'total_pending_interest', 'active_loan_count',
+                       'last_payment_date', 'name', 'created_at')
     
     def get_queryset(self):
         # Check if 'all' query parameter is set to true
         if self.request.query_params.get('all') == 'true':
             # Return all customers for collections page
-            return Customer.objects.all()
+            queryset = Customer.objects.all()
         else:
             # Return customers created by the current user for admin management
-            return Customer.objects.filter(created_by=self.request.user)
+            queryset = Customer.objects.filter(created_by=self.request.user)
+        
+        params = self.request.query_params
+        try:
+            if params.get('min_outstanding'):
+                queryset = queryset.filter(total_outstanding__gte=Decimal(params['min_outstanding']))
+            if params.get('unpaid_days'):
+                # Customers with open loans and no payment in the last N days
+                since = date.today() - timedelta(days=int(params['unpaid_days']))
+                queryset = queryset.filter(active_loan_count__gt=0).filter(
+                    Q(last_payment_date__lt=since) | Q(last_payment_date__isnull=True)
+                )
+        except (InvalidOperation, ValueError):
+            raise ValidationError({'error': 'min_outstanding and unpaid_days must be numbers'})
+        if params.get('has_active_loans') == 'true':
+            queryset = queryset.filter(active_loan_count__gt=0)
+        
+        ordering = params.get('ordering')
+        if ordering:
+            if ordering.lstrip('-') not in self.ORDERING_FIELDS:
+                raise ValidationError({'error': f"ordering must be one of {', '.join(self.ORDERING_FIELDS)}"})
+            queryset = queryset.order_by(ordering, 'pk')
+        if params.get('include_loans') != 'false':
+            # One query for all nested loans, with interest computed in the database
+            queryset = queryset.prefetch_related(Prefetch('loans', queryset=Loan.objects.with_interest()))
+        return queryset
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # ?include_loans=false skips the nested loans; the aggregates are enough for lists
+        context['include_loans'] = self.request.query_params.get('include_loans') != 'false'
+        return context
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -23,3 +62,10 @@ class CustomerViewSet(viewsets.ModelViewSet):
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AreaViewSet(viewsets.ReadOnlyModelViewSet):
+    """Area registry with maintained counters (for dropdowns and per-area totals)"""
+    serializer_class = AreaSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = Area.objects.filter(customer_count__gt=0)
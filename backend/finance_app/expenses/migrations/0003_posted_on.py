@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:43
+
+import transactions.fields
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_posted_on(apps, schema_editor):
+    # TruncDate converts to the active time zone (TIME_ZONE), matching LocalDateField
+    apps.get_model('expenses', 'Expense').objects.update(posted_on=TruncDate('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='posted_on',
+            field=transactions.fields.LocalDateField(help_text='Local date of created_at (indexed for date filters)'),
+        ),
+        migrations.RunPython(backfill_posted_on, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['posted_on'], name='expenses_ex_posted__99233c_idx'),
+        ),
+    ]
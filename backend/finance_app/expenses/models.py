@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from transactions.fields import LocalDateField
 
 class Expense(models.Model):
     description = models.TextField()
@@ -10,6 +11,7 @@ class Expense(models.Model):
         related_name='expenses_recorded'
     )
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    posted_on = LocalDateField(help_text="Local date of created_at (indexed for date filters)")
     
     def __str__(self):
         return f"{self.description[:30]} - {self.amount} - {self.created_at.strftime('%Y-%m-%d')}"
@@ -20,4 +22,5 @@ class Expense(models.Model):
         verbose_name_plural = 'Expenses'
         indexes = [
             models.Index(fields=['created_at']),
+            models.Index(fields=['posted_on']),
         ]
\ No newline at end of file
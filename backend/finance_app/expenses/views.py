@@ -13,9 +13,9 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         start_date = self.request.query_params.get('start_date', None)
         end_date = self.request.query_params.get('end_date', None)
         if start_date:
-            queryset = queryset.filter(created_at__date__gte=start_date)
+            queryset = queryset.filter(posted_on__gte=start_date)
         if end_date:
-            queryset = queryset.filter(created_at__date__lte=end_date)
+            queryset = queryset.filter(posted_on__lte=end_date)
         return queryset
 
     def create(self, request, *args, **kwargs):
@@ -14,3 +14,13 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_app.settings')
 
 application = get_asgi_application()
+
+# Only server processes write metrics for /api/metrics/ (see finance_app/metrics.py)
+from finance_app.metrics import metrics  # noqa: E402
+
+metrics.share()
+
+# Background stack sampler for the flamegraph command (no-op unless SAMPLING_PROFILER is on)
+from finance_app.sampling import start_sampler  # noqa: E402
+
+start_sampler()
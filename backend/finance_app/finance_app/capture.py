@@ -0,0 +1,82 @@
+"""
+Traffic capture for replaying a real day's request mix (see the replay_traffic command).
+
+With TRAFFIC_CAPTURE on, every /api/ request appends one JSON line to
+CAPTURE_DIR/<date>-<pid>.jsonl: arrival time, method, path, URL name, query
+parameters, user id and role, status and duration. Bodies and headers are never
+recorded, and query parameters named like credentials are dropped.
+"""
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+# Query parameters never written to the log
+SENSITIVE_PARAMS = ('password', 'token', 'secret', 'key', 'auth', 'session', 'csrf')
+# Debug triggers from the profiling middleware; replaying them would skew the timings
+IGNORED_PARAMS = ('_profile', '_profile_save')
+
+
+def sanitize_query(query):
+    return {
+        name: values if len(values) > 1 else values[0]
+        for name, values in query.lists()
+        if name not in IGNORED_PARAMS and not any(word in name.lower() for word in SENSITIVE_PARAMS)
+    }
+
+
+class CaptureLog:
+    """Appends records to this process's log for the current day"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._file = None
+        self._name = None
+
+    def write(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        name = f'{timezone.localdate():%Y%m%d}-{os.getpid()}.jsonl'
+        with self._lock:
+            if name != self._name:
+                if self._file is not None:
+                    self._file.close()
+                os.makedirs(self.directory, exist_ok=True)
+                self._file = open(os.path.join(self.directory, name), 'a', buffering=1)
+                self._name = name
+            self._file.write(line)
+
+
+class TrafficCaptureMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.log = CaptureLog(settings.CAPTURE_DIR) if settings.TRAFFIC_CAPTURE else None
+
+    def __call__(self, request):
+        if self.log is None or not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        arrived = time.time()
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        # DRF copies the user it authenticated (e.g. by token) onto the Django request
+        user = getattr(request, 'user', None)
+        authenticated = user is not None and user.is_authenticated
+        match = request.resolver_match
+        self.log.write({
+            'ts': round(arrived, 3),
+            'method': request.method,
+            'path': request.path,
+            'view': match.url_name if match else None,
+            'query': sanitize_query(request.GET),
+            'user': user.pk if authenticated else None,
+            'role': getattr(user, 'role', None) if authenticated else None,
+            'status': response.status_code,
+            'ms': round(elapsed_ms, 1),
+        })
+        return response
@@ -0,0 +1,156 @@
+"""
+Logging off the request path, as JSON lines.
+
+Handlers in LOGGING only put records on an in-memory queue (AsyncHandler); a
+QueueListener thread per process formats and writes them to stderr (journald under
+systemd), so a slow log sink never blocks a worker. Records are tagged with the
+request ID, user and view of the request that logged them (RequestContextFilter,
+fed by RequestContextMiddleware), and JSONFormatter writes any `extra` fields as
+JSON keys. When the queue is full records are dropped and counted in
+finance_log_records_dropped_total rather than waiting.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.utils.functional import empty
+
+# The request being handled in this thread/task: {'id', 'request', 'started'}
+_request = contextvars.ContextVar('log_request', default=None)
+
+_handlers = []
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class RequestContextMiddleware:
+    """Outermost: gives each request an ID (X-Request-ID from nginx, or a new one) for its log records"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.META.get('HTTP_X_REQUEST_ID') or uuid.uuid4().hex
+        token = _request.set({'id': request_id, 'request': request, 'started': time.perf_counter()})
+        try:
+            response = self.get_response(request)
+        finally:
+            _request.reset(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id, user, view and elapsed_ms to records logged while handling a request"""
+
+    def filter(self, record):
+        context = _request.get()
+        if context is None:
+            return True
+        request = context['request']
+        record.request_id = context['id']
+        record.elapsed_ms = round((time.perf_counter() - context['started']) * 1000, 1)
+        # Only a user that is already known; resolving request.user here could run a query
+        user = request.__dict__.get('user')
+        if user is not None and getattr(user, '_wrapped', None) is not empty and user.is_authenticated:
+            record.user = user.username
+        match = request.resolver_match
+        if match is not None and not hasattr(record, 'view'):
+            record.view = match.url_name
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = record.stack_info
+        return json.dumps(data, default=str)
+
+
+class AsyncHandler(logging.handlers.QueueHandler):
+    """
+    Queues records for a listener thread that writes them to `stream` (default stderr).
+    The formatter set on this handler is used by the listener.
+    """
+
+    def __init__(self, stream=None, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.queue_size = queue_size
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.dropped = 0
+        self.listener = None
+        self._start()
+        _handlers.append(self)
+
+    def _start(self):
+        self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Resolve everything that depends on the caller now; the listener only formats
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = (self.target.formatter or logging.Formatter()).formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            from .metrics import metrics
+            metrics.inc('finance_log_records_dropped_total')
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()  # writes out whatever is still queued
+            self.listener = None
+        super().close()
+
+
+@atexit.register
+def _flush_all():
+    for handler in _handlers:
+        if handler.listener is not None:
+            handler.listener.stop()
+            handler.listener = None
+
+
+def _after_fork():
+    # The listener thread does not survive fork (e.g. gunicorn --preload): start a new one in the child
+    for handler in _handlers:
+        if handler.listener is not None:
+            handler.queue = queue.Queue(maxsize=handler.queue_size)
+            handler._start()
+
+
+os.register_at_fork(after_in_child=_after_fork)
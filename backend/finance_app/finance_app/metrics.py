@@ -0,0 +1,251 @@
+"""
+Prometheus-format metrics shared across gunicorn workers without an external service.
+
+Each server process (wsgi.py/asgi.py call metrics.share()) keeps its metrics in memory
+and writes them to its own JSON file (<METRICS_DIR>/<pid>-<id>.json, replaced
+atomically) at most once per FLUSH_INTERVAL. /api/metrics/ merges the files of all
+processes. Files of exited workers are added into <METRICS_DIR>/exited.json and
+removed, so their counters and histograms keep counting towards the totals; their
+in-flight gauge is dropped. Management commands and tests only keep their own metrics
+in memory, so benchmarks and load tests do not show up in production numbers.
+"""
+import copy
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+
+FLUSH_INTERVAL = 1.0
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+PDF_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# name -> (type, help, buckets for histograms)
+METRICS = {
+    'finance_http_request_duration_seconds': (
+        'histogram', 'API request latency by view, method and status', LATENCY_BUCKETS),
+    'finance_db_queries_per_request': ('histogram', 'SQL queries per API request by view', QUERY_BUCKETS),
+    'finance_db_query_seconds_total': ('counter', 'Time spent in SQL by view', None),
+    'finance_pdf_render_seconds': ('histogram', 'PDF build time by report', PDF_BUCKETS),
+    'finance_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit or miss)', None),
+    'finance_cache_hit_ratio': ('gauge', 'Share of cache lookups that hit, since the counters started', None),
+    'finance_http_requests_in_flight': ('gauge', 'API requests being handled right now, across workers', None),
+    'finance_workers': ('gauge', 'Live processes reporting metrics', None),
+    'finance_log_records_dropped_total': ('counter', 'Log records dropped because the log queue was full', None),
+}
+
+
+def _key(labels):
+    return json.dumps(labels, sort_keys=True)
+
+
+# Totals of exited processes, and the lock held while files are merged into it
+EXITED_FILE = 'exited.json'
+LOCK_FILE = '.lock'
+
+
+def _merge(merged, values):
+    for name, series in values.items():
+        target = merged.setdefault(name, {})
+        for key, value in series.items():
+            if isinstance(value, list):
+                current = target.setdefault(key, [0] * len(value))
+                target[key] = [a + b for a, b in zip(current, value)]
+            else:
+                target[key] = target.get(key, 0) + value
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path, data):
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.directory = None
+        self._reset()
+
+    def share(self, directory=None):
+        """Write this process's metrics to METRICS_DIR so /api/metrics/ includes them (server processes)"""
+        self.directory = directory or settings.METRICS_DIR
+
+    def _reset(self):
+        self._pid = os.getpid()
+        # A new name per process, so a later process with a recycled PID never overwrites a dead one's file
+        self._name = f'{self._pid}-{uuid.uuid4().hex[:8]}.json'
+        self._values = {}  # name -> {labels json: value, or [bucket counts..., sum] for histograms}
+        self._in_flight = 0
+        self._flush_timer = None
+
+    def _series(self, name):
+        # A forked worker starts with its parent's numbers; drop them
+        if os.getpid() != self._pid:
+            self._reset()
+        return self._values.setdefault(name, {})
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            series = self._series(name)
+            key = _key(labels)
+            series[key] = series.get(key, 0) + amount
+        self._schedule_flush()
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name][2]
+        with self._lock:
+            series = self._series(name)
+            counts = series.setdefault(_key(labels), [0] * (len(buckets) + 2))
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[index] += 1
+            counts[-2] += 1  # +Inf, i.e. the number of observations
+            counts[-1] += value
+        self._schedule_flush()
+
+    @contextmanager
+    def time(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def track_in_flight(self, delta):
+        with self._lock:
+            self._series('finance_http_requests_in_flight')
+            self._in_flight += delta
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        # Flush from a timer so a busy worker writes at most once per interval and an idle one still writes
+        with self._lock:
+            if self._flush_timer is not None or self.directory is None:
+                return
+            self._flush_timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _snapshot(self):
+        with self._lock:
+            self._series('finance_http_requests_in_flight')  # resets a forked copy
+            return {'pid': self._pid, 'name': self._name, 'in_flight': self._in_flight,
+                    'values': copy.deepcopy(self._values)}
+
+    def flush(self):
+        with self._lock:
+            self._flush_timer = None
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        _write(os.path.join(self.directory, self._name), self._snapshot())
+
+    def collect(self):
+        """Merged metrics of every process, in the Prometheus text format"""
+        if self.directory is None:
+            snapshots, exited = [self._snapshot()], {}
+        else:
+            self.flush()
+            snapshots, exited = self._gather()
+        merged, in_flight, workers = {}, 0, 0
+        _merge(merged, exited)
+        for snapshot in snapshots:
+            workers += 1
+            in_flight += snapshot['in_flight']
+            _merge(merged, snapshot['values'])
+        merged['finance_http_requests_in_flight'] = {_key({}): in_flight}
+        merged['finance_workers'] = {_key({}): workers}
+        merged['finance_cache_hit_ratio'] = self._hit_ratios(merged.get('finance_cache_requests_total', {}))
+        return self._render(merged)
+
+    def _gather(self):
+        """
+        Snapshots of live processes and the totals of exited ones. Files of processes that
+        have exited since the last call are added into EXITED_FILE and deleted, under a lock
+        so concurrent scrapes neither count a file twice nor lose one.
+        """
+        exited_path = os.path.join(self.directory, EXITED_FILE)
+        with open(os.path.join(self.directory, LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            exited = _read(exited_path) or {'values': {}, 'merged': []}
+            live, dead = [], []
+            for path in glob.glob(os.path.join(self.directory, '*.json')):
+                snapshot = _read(path) if os.path.basename(path) != EXITED_FILE else None
+                if snapshot is None:
+                    continue
+                if _pid_alive(snapshot['pid']):
+                    live.append(snapshot)
+                elif os.path.basename(path) not in exited['merged']:
+                    dead.append((path, snapshot))
+                else:
+                    os.remove(path)  # merged by a scrape that stopped before deleting it
+            if dead:
+                for _, snapshot in dead:
+                    _merge(exited['values'], snapshot['values'])
+                # Names merged this time, so a file left behind by a crash here is not added twice
+                exited['merged'] = [os.path.basename(path) for path, _ in dead]
+                _write(exited_path, exited)
+                for path, _ in dead:
+                    os.remove(path)
+        return live, exited['values']
+
+    @staticmethod
+    def _hit_ratios(lookups):
+        totals = {}
+        for key, count in lookups.items():
+            labels = json.loads(key)
+            hits, total = totals.get(labels['cache'], (0, 0))
+            totals[labels['cache']] = (hits + (count if labels['result'] == 'hit' else 0), total + count)
+        return {_key({'cache': cache}): round(hits / total, 4) for cache, (hits, total) in totals.items() if total}
+
+    def _render(self, merged):
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for key, value in sorted(merged.get(name, {}).items()):
+                labels = json.loads(key)
+                if kind != 'histogram':
+                    lines.append(f'{name}{self._labels(labels)} {value}')
+                    continue
+                for bound, count in zip(buckets, value):
+                    lines.append(f'{name}_bucket{self._labels({**labels, "le": bound})} {count}')
+                lines.append(f'{name}_bucket{self._labels({**labels, "le": "+Inf"})} {value[-2]}')
+                lines.append(f'{name}_count{self._labels(labels)} {value[-2]}')
+                lines.append(f'{name}_sum{self._labels(labels)} {value[-1]}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for value in labels.values())
+        return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+metrics = MetricsStore()
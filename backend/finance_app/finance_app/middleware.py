@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import sampling
+from .metrics import metrics as shared_metrics
+
+logger = logging.getLogger('finance_app.requests')
+
+# Used when REQUEST_BUDGETS has no entry for the view (or no 'default' entry)
+DEFAULT_BUDGET = {'queries': 50, 'ms': 1000}
+
+# How many statements to include in a budget warning
+WORST_STATEMENTS = 5
+
+# The RequestMetrics of the request this thread is handling, for the serializer hook
+_local = threading.local()
+_hooks_installed = False
+
+
+class RequestMetrics:
+    """SQL, serialization, render and size numbers for one request; doubles as the execute_wrapper."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+        self.render_ms = 0.0
+        self._serializing = False
+        self.statements = {}  # sql -> [count, total ms]
+        self._render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.db_ms += elapsed
+            entry = self.statements.setdefault(sql, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def render_started(self):
+        self._render_started = time.perf_counter()
+
+    def render_finished(self, response):
+        if self._render_started is not None:
+            self.render_ms = (time.perf_counter() - self._render_started) * 1000
+
+    def serialized(self, data):
+        """Time a serializer's .data; nested calls count towards the outermost one"""
+        if self._serializing:
+            return data()
+        self._serializing = True
+        started = time.perf_counter()
+        try:
+            return data()
+        finally:
+            self.serialize_ms += (time.perf_counter() - started) * 1000
+            self._serializing = False
+
+    def worst_statements(self):
+        ranked = sorted(self.statements.items(), key=lambda item: -item[1][1])
+        return [
+            {'sql': sql, 'count': count, 'ms': round(ms, 1)}
+            for sql, (count, ms) in ranked[:WORST_STATEMENTS]
+        ]
+
+
+def _time_data(cls):
+    """Replace the cls.data property with one that adds its time to the request's serialize_ms"""
+    original = cls.data.fget
+
+    def data(self):
+        metrics = getattr(_local, 'metrics', None)
+        if metrics is None:
+            return original(self)
+        return metrics.serialized(lambda: original(self))
+
+    cls.data = property(data)
+
+
+def install_hooks():
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    from rest_framework import serializers
+
+    _time_data(serializers.Serializer)
+    _time_data(serializers.ListSerializer)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records query count, DB time, serialization time (serializer .data, including any
+    queries it runs), render time (the DRF renderer writing the JSON) and response size
+    for every /api/ request. The numbers go out as a Server-Timing header, one JSON log
+    line and the shared /api/metrics/ histograms; requests over their REQUEST_BUDGETS
+    entry (keyed by URL name) also log a warning with the most expensive SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_hooks()
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        metrics = _local.metrics = RequestMetrics()
+        request._metrics = metrics
+        shared_metrics.track_in_flight(1)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+            shared_metrics.track_in_flight(-1)
+            sampling.request_finished()
+        total_ms = (time.perf_counter() - metrics.started) * 1000
+
+        match = request.resolver_match
+        view = match.url_name if match else None
+        shared_metrics.observe('finance_http_request_duration_seconds', total_ms / 1000,
+                               view=view, method=request.method, status=response.status_code)
+        shared_metrics.observe('finance_db_queries_per_request', metrics.queries, view=view)
+        shared_metrics.inc('finance_db_query_seconds_total', metrics.db_ms / 1000, view=view)
+        size = len(response.content) if not response.streaming else None
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.db_ms:.1f};desc="{metrics.queries} queries"',
+            f'serialize;dur={metrics.serialize_ms:.1f}',
+            f'render;dur={metrics.render_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_ms, 1),
+            'serialize_ms': round(metrics.serialize_ms, 1),
+            'render_ms': round(metrics.render_ms, 1),
+            'total_ms': round(total_ms, 1),
+            'bytes': size,
+        }
+        logger.info('%s %s %s in %.0f ms, %s queries', request.method, request.path, response.status_code,
+                    total_ms, metrics.queries, extra=record)
+
+        budget = self._budget(view)
+        over = []
+        if metrics.queries > budget['queries']:
+            over.append(f"{metrics.queries} queries > {budget['queries']}")
+        if total_ms > budget['ms']:
+            over.append(f"{total_ms:.0f} ms > {budget['ms']} ms")
+        if over:
+            logger.warning('%s %s over budget: %s', request.method, request.path, ', '.join(over),
+                           extra={**record, 'over_budget': over, 'statements': metrics.worst_statements()})
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Let the stack sampler attribute this thread's samples to the view
+        if getattr(request, '_metrics', None) is not None:
+            sampling.request_started(request.resolver_match.url_name)
+
+    def process_template_response(self, request, response):
+        # DRF responses render after this hook; time the renderer separately from the serializers
+        metrics = getattr(request, '_metrics', None)
+        if metrics is not None:
+            metrics.render_started()
+            response.add_post_render_callback(metrics.render_finished)
+        return response
+
+    def _budget(self, view):
+        budgets = getattr(settings, 'REQUEST_BUDGETS', {})
+        return {**DEFAULT_BUDGET, **budgets.get('default', {}), **budgets.get(view, {})}
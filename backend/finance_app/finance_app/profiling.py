@@ -0,0 +1,131 @@
+import cProfile
+import glob
+import io
+import logging
+import os
+import pstats
+import secrets
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from users.permissions import IsOwner
+
+logger = logging.getLogger('finance_app.profiling')
+
+MODES = ('cprofile', 'tracemalloc')
+# Lines of cProfile stats / allocation sites in a report
+TOP_ENTRIES = 60
+TRACEMALLOC_FRAMES = 10
+
+
+def is_owner(request):
+    # DRF authenticates inside the view; do it here too so token-authenticated owners are recognised
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        return IsOwner().has_permission(drf_request, None)
+    except APIException:
+        return False
+
+
+class ProfilingMiddleware:
+    """
+    Profile one API request on demand: ?_profile=cprofile or ?_profile=tracemalloc.
+
+    Owners only, and at most PROFILE_MAX_PER_HOUR profiles across all workers (counted
+    from the reports in PROFILES_DIR). Every profile is saved there under a reference ID;
+    the response is the text report, or with &_profile_save=1 the normal response with
+    an X-Profile-Id header (e.g. to keep a PDF download). Refused requests are served
+    normally with an X-Profile-Skipped header saying why.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.GET.get('_profile')
+        if not mode or not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        refusal = self._refusal(request, mode)
+        if refusal:
+            response = self.get_response(request)
+            response['X-Profile-Skipped'] = refusal
+            return response
+
+        profile_id = f'{timezone.localtime():%Y%m%d-%H%M%S}-{secrets.token_hex(3)}'
+        os.makedirs(settings.PROFILES_DIR, exist_ok=True)
+        base = os.path.join(settings.PROFILES_DIR, profile_id)
+        started = time.perf_counter()
+        if mode == 'cprofile':
+            response, report = self._cprofile(request, base)
+        else:
+            response, report = self._tracemalloc(request)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        header = (f'{request.method} {request.get_full_path()} -> {response.status_code} '
+                  f'in {elapsed_ms:.0f} ms ({mode}, profile {profile_id})\n\n')
+        with open(f'{base}.txt', 'w') as f:
+            f.write(header + report)
+        self._prune()
+        logger.info('Profiled %s %s with %s as %s', request.method, request.path, mode, profile_id)
+
+        if request.GET.get('_profile_save'):
+            response['X-Profile-Id'] = profile_id
+            return response
+        return HttpResponse(header + report, content_type='text/plain; charset=utf-8',
+                            headers={'X-Profile-Id': profile_id})
+
+    def _refusal(self, request, mode):
+        if mode not in MODES:
+            return f"unknown mode, use {' or '.join(MODES)}"
+        if not is_owner(request):
+            return 'owners only'
+        if mode == 'tracemalloc' and tracemalloc.is_tracing():
+            return 'tracemalloc already running'
+        hour_ago = time.time() - 3600
+        recent = [path for path in glob.glob(os.path.join(settings.PROFILES_DIR, '*.txt'))
+                  if os.path.getmtime(path) > hour_ago]
+        if len(recent) >= settings.PROFILE_MAX_PER_HOUR:
+            return 'rate limit'
+        return None
+
+    def _cprofile(self, request, base):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        # Binary stats for snakeviz/pstats next to the text report
+        profiler.dump_stats(f'{base}.prof')
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(TOP_ENTRIES)
+        return response, stream.getvalue()
+
+    def _tracemalloc(self, request):
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            response = self.get_response(request)
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        lines = [f'current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB', '']
+        for stat in snapshot.statistics('lineno')[:TOP_ENTRIES]:
+            lines.append(str(stat))
+        return response, '\n'.join(lines) + '\n'
+
+    def _prune(self):
+        """Keep the newest PROFILE_MAX_FILES profiles"""
+        reports = sorted(glob.glob(os.path.join(settings.PROFILES_DIR, '*.txt')), key=os.path.getmtime)
+        for report in reports[:-settings.PROFILE_MAX_FILES]:
+            for path in (report, report[:-len('.txt')] + '.prof'):
+                if os.path.exists(path):
+                    os.remove(path)
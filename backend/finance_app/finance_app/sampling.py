@@ -0,0 +1,108 @@
+"""
+Low-overhead stack sampling for production workers.
+
+A daemon thread wakes every SAMPLING_INTERVAL seconds and records the Python stack
+of each thread that is serving an API request, folded as "view;frame;frame;..."
+with a count. Each process writes its counts to <SAMPLES_DIR>/<pid>.folded every
+few seconds; the flamegraph command merges them. Counts are cumulative since the
+worker started.
+"""
+import os
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+FLUSH_EVERY = 15.0
+# Distinct stacks kept per process; anything beyond is counted under one bucket
+MAX_STACKS = 20000
+OVERFLOW_STACK = '[too many distinct stacks]'
+
+# thread ident -> view name, for threads handling a request right now
+_active_views = {}
+_sampler = None
+
+
+def request_started(view):
+    _active_views[threading.get_ident()] = view or 'unknown'
+
+
+def request_finished():
+    _active_views.pop(threading.get_ident(), None)
+
+
+def _short_path(filename):
+    for prefix in sorted({str(settings.BASE_DIR), *sys.path}, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+class StackSampler(threading.Thread):
+    def __init__(self, interval, directory):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.interval = interval
+        self.directory = directory
+        self.counts = {}
+        self._labels = {}  # code object -> frame label
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})'.replace(';', ',')
+            self._labels[code] = label
+        return label
+
+    def sample(self):
+        frames = sys._current_frames()
+        for thread_id, view in list(_active_views.items()):
+            frame = frames.get(thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if not stack:
+                continue
+            stack.append(view)
+            key = ';'.join(reversed(stack))
+            if key not in self.counts and len(self.counts) >= MAX_STACKS:
+                key = f'{view};{OVERFLOW_STACK}'
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def flush(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{os.getpid()}.folded')
+        with open(f'{path}.tmp', 'w') as f:
+            f.writelines(f'{stack} {count}\n' for stack, count in self.counts.items())
+        os.replace(f'{path}.tmp', path)
+
+    def run(self):
+        next_flush = time.monotonic() + FLUSH_EVERY
+        while True:
+            time.sleep(self.interval)
+            self.sample()
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + FLUSH_EVERY
+
+
+def start_sampler():
+    """Start this process's sampler when SAMPLING_PROFILER is on (called from wsgi.py/asgi.py)"""
+    global _sampler
+    if not settings.SAMPLING_PROFILER or (_sampler is not None and _sampler.is_alive()):
+        return
+    _sampler = StackSampler(settings.SAMPLING_INTERVAL, settings.SAMPLES_DIR)
+    _sampler.start()
+
+
+def _after_fork():
+    # Threads do not survive fork (e.g. gunicorn --preload): start a fresh sampler in the child
+    global _sampler
+    _active_views.clear()
+    if _sampler is not None:
+        _sampler = None
+        start_sampler()
+
+
+os.register_at_fork(after_in_child=_after_fork)
@@ -1,4 +1,5 @@
 import os
+import sys
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -66,6 +67,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'finance_app.log.RequestContextMiddleware',
+    'finance_app.tracing.TracingMiddleware',
+    'finance_app.middleware.RequestMetricsMiddleware',
+    'finance_app.capture.TrafficCaptureMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,6 +80,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Last, so the profile covers the view and its rendering only
+    'finance_app.profiling.ProfilingMiddleware',
+    'finance_app.tracing.TracingViewMiddleware',
 ]
 
 # ---------------------------------------------------------------------------
@@ -147,6 +155,59 @@ else:
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Payments read the loan and then write it in one transaction; take SQLite's write lock
+    # up front so concurrent requests wait for it instead of failing with "database is locked"
+    DATABASES['default'].setdefault('OPTIONS', {}).update({'transaction_mode': 'IMMEDIATE', 'timeout': 20})
+
+# ---------------------------------------------------------------------------
+# Cache (per-process; used for day-level analytics such as the cash-flow forecast)
+# ---------------------------------------------------------------------------
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'finance-app',
+    }
+}
+
+# ---------------------------------------------------------------------------
+# Request budgets (per URL name; requests over budget log a warning with their SQL)
+# ---------------------------------------------------------------------------
+REQUEST_BUDGETS = {
+    'default': {'queries': 50, 'ms': 1000},
+    'reports': {'queries': 80, 'ms': 3000},
+    'reports-download': {'queries': 80, 'ms': 5000},
+    'customer-report-download': {'queries': 80, 'ms': 5000},
+    'portfolio-projection': {'queries': 20, 'ms': 3000},
+}
+
+# ---------------------------------------------------------------------------
+# Metrics (one file per server process, merged by /api/metrics/)
+# ---------------------------------------------------------------------------
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(BASE_DIR, 'var', 'metrics'))
+
+# ---------------------------------------------------------------------------
+# On-demand profiling (?_profile=cprofile|tracemalloc, owners only)
+# ---------------------------------------------------------------------------
+PROFILES_DIR = os.getenv('PROFILES_DIR', os.path.join(BASE_DIR, 'var', 'profiles'))
+PROFILE_MAX_PER_HOUR = int(os.getenv('PROFILE_MAX_PER_HOUR', '20'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
+
+# Always-on stack sampling in each worker, merged by `manage.py flamegraph`
+SAMPLING_PROFILER = os.getenv('SAMPLING_PROFILER', 'False') == 'True'
+SAMPLING_INTERVAL = float(os.getenv('SAMPLING_INTERVAL', '0.05'))  # seconds between samples
+SAMPLES_DIR = os.getenv('SAMPLES_DIR', os.path.join(BASE_DIR, 'var', 'samples'))
+
+# Chrome trace-event files for a sample of requests, or for owners sending X-Trace
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))  # 0.01 = one request in a hundred
+TRACE_HEADER_ENABLED = os.getenv('TRACE_HEADER_ENABLED', 'True') == 'True'
+TRACES_DIR = os.getenv('TRACES_DIR', os.path.join(BASE_DIR, 'var', 'traces'))
+TRACE_MAX_FILES = int(os.getenv('TRACE_MAX_FILES', '500'))
+
+# Sanitized request log for `manage.py replay_traffic` (no bodies or headers)
+TRAFFIC_CAPTURE = os.getenv('TRAFFIC_CAPTURE', 'False') == 'True'
+CAPTURE_DIR = os.getenv('CAPTURE_DIR', os.path.join(BASE_DIR, 'var', 'capture'))
+
 # ---------------------------------------------------------------------------
 # Auth
 # ---------------------------------------------------------------------------
@@ -170,6 +231,13 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # ---------------------------------------------------------------------------
 # Logging (production-friendly — logs to console for systemd/journal)
 # ---------------------------------------------------------------------------
+# Handlers only queue records; a thread per process writes them (see finance_app/log.py).
+# JSON lines by default, the text format is easier to read during development.
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text' if DEBUG else 'json')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+# `manage.py test` prints test results; a request log line per test client call would bury them
+LOG_LEVEL = 'WARNING' if sys.argv[1:2] == ['test'] else 'INFO' if not DEBUG else 'DEBUG'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -178,16 +246,27 @@ LOGGING = {
             'format': '[{asctime}] {levelname} {name} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'finance_app.log.JSONFormatter',
+        },
+    },
+    'filters': {
+        'request_context': {
+            '()': 'finance_app.log.RequestContextFilter',
+        },
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            '()': 'finance_app.log.AsyncHandler',
+            'stream': 'ext://sys.stderr',
+            'queue_size': LOG_QUEUE_SIZE,
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+            'filters': ['request_context'],
         },
     },
     'root': {
         'handlers': ['console'],
-        'level': 'INFO' if not DEBUG else 'DEBUG',
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
@@ -0,0 +1,256 @@
+"""
+Request tracing in the Chrome trace-event format (chrome://tracing, Perfetto, speedscope).
+
+A traced request records complete ("X") events for the middleware before and after
+the view, DRF authentication and permission checks, the view, every SQL statement,
+each serializer's to_representation (down to single SerializerMethodFields) and the
+reportlab build. Requests are traced at random with probability TRACE_SAMPLE_RATE,
+or when an owner sends an X-Trace header. The trace's id is returned in the
+X-Trace-Id header, and a background thread writes it to TRACES_DIR/<id>.json shortly
+after the response, so a large trace never holds up its request. When traces finish
+faster than they are written, the extra ones are dropped (and get no X-Trace-Id).
+
+The DRF and reportlab hooks are only installed when tracing is enabled, and cost a
+thread-local lookup per call on requests that are not traced.
+"""
+import functools
+import glob
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .profiling import is_owner
+
+# Events kept per trace (about 10 MB of JSON); a list of 10k loans would otherwise produce millions
+MAX_EVENTS = 50000
+SQL_PREVIEW = 500
+# Finished traces waiting for the writer thread
+WRITE_QUEUE_SIZE = 16
+# TRACES_DIR is trimmed to TRACE_MAX_FILES every this many traces written, not after each one
+PRUNE_EVERY = 50
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_hooks_installed = False
+
+
+class Trace:
+    def __init__(self):
+        self.id = f'{timezone.localtime():%Y%m%d-%H%M%S}-{secrets.token_hex(3)}'
+        self.events = []
+        self.dropped = 0
+        self.pid = os.getpid()
+        self.request_info = {}
+
+    def add(self, name, category, started, ended, **args):
+        if len(self.events) >= MAX_EVENTS:
+            self.dropped += 1
+            return
+        self.events.append({
+            'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid, 'tid': threading.get_ident(),
+            'ts': started * 1e6, 'dur': (ended - started) * 1e6, 'args': args,
+        })
+
+    def span(self, name, category, **args):
+        return _Span(self, name, category, args)
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper: one event per SQL statement
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('SQL', 'db', started, time.perf_counter(), sql=sql[:SQL_PREVIEW], many=many)
+
+    def write(self):
+        os.makedirs(settings.TRACES_DIR, exist_ok=True)
+        path = os.path.join(settings.TRACES_DIR, f'{self.id}.json')
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump({
+                'traceEvents': self.events,
+                'displayTimeUnit': 'ms',
+                'otherData': {**self.request_info, 'dropped_events': self.dropped},
+            }, f)
+        os.replace(f'{path}.tmp', path)
+
+
+def prune_traces():
+    """Keep the newest TRACE_MAX_FILES traces"""
+    traces = sorted(glob.glob(os.path.join(settings.TRACES_DIR, '*.json')), key=os.path.getmtime)
+    for old in traces[:-settings.TRACE_MAX_FILES]:
+        os.remove(old)
+
+
+class TraceWriter:
+    """Writes finished traces from a daemon thread, started on first use in each process"""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.thread = None
+        self.written = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def submit(self, trace):
+        """Queue a trace for writing; False if the queue is full and the trace was dropped"""
+        with self._lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='trace-writer', daemon=True)
+                self.thread.start()
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            trace = self.queue.get()
+            try:
+                trace.write()
+                self.written += 1
+                if self.written % PRUNE_EVERY == 1:
+                    prune_traces()
+            except OSError:
+                logger.exception('Could not write trace %s', trace.id)
+
+
+_writer = TraceWriter()
+
+
+def _after_fork():
+    # The writer thread does not survive fork (e.g. gunicorn --preload): start a new one in the child
+    global _writer
+    _writer = TraceWriter()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+class _Span:
+    def __init__(self, trace, name, category, args):
+        self.trace, self.name, self.category, self.args = trace, name, category, args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, self.category, self.started, time.perf_counter(), **self.args)
+
+
+def _current():
+    return getattr(_local, 'trace', None)
+
+
+def _wrap(cls, attribute, describe):
+    """Replace cls.attribute with a version that records a span while a trace is active"""
+    original = getattr(cls, attribute)
+
+    @functools.wraps(original)
+    def traced(self, *args, **kwargs):
+        trace = _current()
+        if trace is None:
+            return original(self, *args, **kwargs)
+        name, category = describe(self)
+        with trace.span(name, category):
+            return original(self, *args, **kwargs)
+
+    setattr(cls, attribute, traced)
+
+
+def install_hooks():
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    from rest_framework import serializers
+    from rest_framework.views import APIView
+
+    _wrap(APIView, 'perform_authentication', lambda view: ('authentication', 'drf'))
+    _wrap(APIView, 'check_permissions', lambda view: ('permissions', 'drf'))
+    _wrap(serializers.Serializer, 'to_representation',
+          lambda serializer: (f'{type(serializer).__name__}.to_representation', 'serializer'))
+    _wrap(serializers.ListSerializer, 'to_representation',
+          lambda serializer: (f'{type(serializer.child).__name__} list', 'serializer'))
+    _wrap(serializers.SerializerMethodField, 'to_representation',
+          lambda field: (f'{type(field.parent).__name__}.{field.method_name}', 'serializer'))
+    try:
+        from reportlab.platypus.doctemplate import BaseDocTemplate
+    except ImportError:
+        return
+    _wrap(BaseDocTemplate, 'build', lambda doc: ('reportlab build', 'pdf'))
+
+
+def _tracing_enabled():
+    return settings.TRACE_SAMPLE_RATE > 0 or settings.TRACE_HEADER_ENABLED
+
+
+class TracingMiddleware:
+    """Outermost: decides whether to trace and records the request and middleware spans"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if _tracing_enabled():
+            install_hooks()
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/') or not self._should_trace(request):
+            return self.get_response(request)
+
+        trace = _local.trace = Trace()
+        request._trace = trace
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(trace):
+                response = self.get_response(request)
+        finally:
+            _local.trace = None
+        ended = time.perf_counter()
+
+        view_started, view_ended = getattr(request, '_trace_view', (ended, ended))
+        trace.add('middleware (request)', 'middleware', started, view_started)
+        trace.add('middleware (response)', 'middleware', view_ended, ended)
+        match = request.resolver_match
+        trace.add(f'{request.method} {match.url_name if match else request.path}', 'request', started, ended,
+                  path=request.get_full_path(), status=response.status_code)
+        trace.request_info = {'method': request.method, 'path': request.get_full_path(),
+                              'status': response.status_code}
+        if _writer.submit(trace):
+            response['X-Trace-Id'] = trace.id
+        return response
+
+    def _should_trace(self, request):
+        if settings.TRACE_HEADER_ENABLED and 'HTTP_X_TRACE' in request.META and is_owner(request):
+            return True
+        return settings.TRACE_SAMPLE_RATE > 0 and random.random() < settings.TRACE_SAMPLE_RATE
+
+
+class TracingViewMiddleware:
+    """Innermost: records the view span (including response rendering)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace = getattr(request, '_trace', None)
+        if trace is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            ended = time.perf_counter()
+            request._trace_view = (started, ended)
+            trace.add('view', 'view', started, ended)
@@ -18,11 +18,14 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.authtoken import views as auth_views
 
+from .views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/customers/', include('customers.url')),
     path('api/transactions/', include('transactions.url')),
     path('api/users/', include('users.urls')),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
     path('api/', include('expenses.url')),
     path('api-auth/', include('rest_framework.urls')),
     path('api-auth/token/', auth_views.obtain_auth_token),
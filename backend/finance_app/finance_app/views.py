@@ -0,0 +1,13 @@
+from django.http import HttpResponse
+from rest_framework.views import APIView
+
+from users.permissions import IsOwnerOrLocalhost
+from .metrics import metrics
+
+
+class MetricsView(APIView):
+    """Prometheus text exposition of the metrics merged across all workers (owners or localhost scrapers)"""
+    permission_classes = [IsOwnerOrLocalhost]
+
+    def get(self, request):
+        return HttpResponse(metrics.collect(), content_type='text/plain; version=0.0.4; charset=utf-8')
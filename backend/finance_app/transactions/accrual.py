@@ -0,0 +1,126 @@
+import calendar
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from customers.aggregates import refresh_pending_interest
+from .models import Loan, Transaction, InterestAccrual
+
+MONTHLY_LOAN = 'Monthly Interest Loan'
+DL_LOAN = 'DL Loan'
+
+
+def monthly_due_dates(start_date, cycle_day, through):
+    """Interest due dates after start_date up to and including through (day clamped to month end)"""
+    dates = []
+    year, month = start_date.year, start_date.month
+    while True:
+        due = date(year, month, min(cycle_day, calendar.monthrange(year, month)[1]))
+        if due > through:
+            return dates
+        if due > start_date:
+            dates.append(due)
+        month += 1
+        if month > 12:
+            month = 1
+            year += 1
+
+
+def _accrue_monthly(loan, as_of, billed, accrued):
+    """
+    Roll missed cycles into pending_interest.
+
+    Every transaction posted on a Monthly loan bills one cycle (see Transaction.save),
+    and the latest due cycle stays open for the next payment to bill. Any older cycle
+    that was neither billed nor accrued yet is moved to pending_interest.
+    """
+    if not loan.interest_cycle_day or not loan.monthly_interest_rate:
+        return []
+    due_dates = monthly_due_dates(loan.start_date, loan.interest_cycle_day, as_of)
+    covered = billed + accrued
+    interest = loan.calculate_monthly_interest()
+    entries = []
+    for index in range(covered, len(due_dates) - 1):
+        due = due_dates[index]
+        period_start = due_dates[index - 1] if index > 0 else loan.start_date
+        loan.pending_interest += interest
+        entries.append(InterestAccrual(
+            loan=loan,
+            period_start=period_start,
+            period_end=due,
+            days=(due - period_start).days,
+            amount=interest,
+            accrued_on=as_of,
+        ))
+    return entries
+
+
+def _accrue_dl(loan, as_of):
+    """Move DL interest earned since the last accrual/payment into pending_interest"""
+    interest, days = loan.calculate_dl_interest(as_of)
+    if days == 0:
+        return []
+    loan.pending_interest += interest
+    return [InterestAccrual(
+        loan=loan,
+        period_start=loan.interest_accrued_until or loan.last_interest_payment_date or loan.start_date,
+        period_end=as_of,
+        days=days,
+        amount=interest,
+        accrued_on=as_of,
+    )]
+
+
+def accrue_interest(as_of=None, batch_size=1000):
+    """
+    Accrue interest for all open (active or overdue) Monthly and DL loans up to as_of.
+
+    Loans are processed in batches: each batch is locked, updated with bulk_update and
+    its ledger rows written with bulk_create. Loans already accrued up to as_of are
+    skipped, so running the job twice for the same day is a no-op.
+    """
+    if as_of is None:
+        as_of = date.today()
+
+    loan_ids = list(
+        Loan.objects.filter(status__in=Loan.OPEN_STATUSES, loan_type__in=[MONTHLY_LOAN, DL_LOAN])
+        .filter(Q(interest_accrued_until__isnull=True) | Q(interest_accrued_until__lt=as_of))
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+    summary = {'loans': 0, 'accruals': 0, 'amount': Decimal('0')}
+    for offset in range(0, len(loan_ids), batch_size):
+        batch_ids = loan_ids[offset:offset + batch_size]
+        with transaction.atomic():
+            loans = list(Loan.objects.select_for_update().filter(pk__in=batch_ids))
+            monthly_ids = [loan.pk for loan in loans if loan.loan_type == MONTHLY_LOAN]
+            billed = dict(
+                Transaction.objects.filter(loan_id__in=monthly_ids)
+                .values('loan').annotate(total=Count('id')).values_list('loan', 'total')
+            )
+            accrued = dict(
+                InterestAccrual.objects.filter(loan_id__in=monthly_ids)
+                .values('loan').annotate(total=Count('id')).values_list('loan', 'total')
+            )
+
+            entries = []
+            for loan in loans:
+                if loan.loan_type == MONTHLY_LOAN:
+                    entries.extend(_accrue_monthly(loan, as_of, billed.get(loan.pk, 0), accrued.get(loan.pk, 0)))
+                else:
+                    entries.extend(_accrue_dl(loan, as_of))
+                loan.interest_accrued_until = as_of
+
+            Loan.objects.bulk_update(loans, ['pending_interest', 'interest_accrued_until'], batch_size=batch_size)
+            InterestAccrual.objects.bulk_create(entries, batch_size=batch_size)
+            # bulk_update bypasses Loan.save, so re-sum the customers' pending interest
+            refresh_pending_interest({loan.customer_id for loan in loans})
+
+        summary['loans'] += len(loans)
+        summary['accruals'] += len(entries)
+        summary['amount'] += sum((entry.amount for entry in entries), Decimal('0'))
+
+    return summary
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Loan, Transaction
+from .models import Loan, Transaction, InterestAccrual, LoanScheduleItem
 
 
 @admin.register(Loan)
@@ -31,4 +31,21 @@ class TransactionAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         if not obj.pk:
             obj.created_by = request.user
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+
+@admin.register(InterestAccrual)
+class InterestAccrualAdmin(admin.ModelAdmin):
+    list_display = ('loan', 'period_start', 'period_end', 'days', 'amount', 'accrued_on')
+    list_filter = ('accrued_on',)
+    search_fields = ('loan__customer__name',)
+    readonly_fields = ('loan', 'period_start', 'period_end', 'days', 'amount', 'accrued_on', 'created_at')
+    list_select_related = ('loan', 'loan__customer')
+
+
+@admin.register(LoanScheduleItem)
+class LoanScheduleItemAdmin(admin.ModelAdmin):
+    list_display = ('loan', 'sequence', 'kind', 'due_date', 'amount_due', 'amount_paid', 'status', 'paid_on')
+    list_filter = ('kind', 'status', 'due_date')
+    search_fields = ('loan__customer__name',)
+    readonly_fields = ('loan', 'sequence', 'kind', 'due_date', 'amount_due', 'amount_paid', 'status', 'paid_on')
+    list_select_related = ('loan', 'loan__customer')
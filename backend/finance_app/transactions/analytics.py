@@ -0,0 +1,194 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, DateField, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+from finance_app.metrics import metrics
+from .models import CacheVersion, Loan, Transaction
+
+# (label, max days since last payment); the last bucket is open-ended
+AGING_BUCKETS = (
+    ('0-7', 7),
+    ('8-30', 30),
+    ('31-60', 60),
+    ('61-90', 90),
+    ('90+', None),
+)
+
+
+def _bucket_expression(today):
+    """Case expression labelling a loan by days since last_paid_on"""
+    whens = [
+        When(last_paid_on__gte=today - timedelta(days=max_days), then=Value(label))
+        for label, max_days in AGING_BUCKETS if max_days is not None
+    ]
+    return Case(*whens, default=Value(AGING_BUCKETS[-1][0]), output_field=CharField())
+
+
+def aging_buckets(today=None):
+    """
+    Outstanding principal and pending interest of open loans, bucketed by days since
+    the last payment (or since disbursement when nothing has been paid), per area and
+    loan type. Runs as a single grouped query.
+    """
+    if today is None:
+        today = date.today()
+
+    last_payment = (
+        Transaction.objects.filter(loan=OuterRef('pk'))
+        .values('loan')
+        .annotate(last=Max(TruncDate('created_at')))
+        .values('last')
+    )
+    rows = (
+        Loan.objects.filter(status__in=Loan.OPEN_STATUSES)
+        .with_interest(as_of=today)
+        .annotate(last_paid_on=Coalesce(Subquery(last_payment, output_field=DateField()), 'start_date'))
+        .annotate(bucket=_bucket_expression(today))
+        .values('customer__area', 'loan_type', 'bucket')
+        .annotate(
+            loans=Count('id'),
+            outstanding=Sum('remaining_amount'),
+            pending_interest=Sum('total_pending_interest'),
+        )
+        .order_by('customer__area', 'loan_type', 'bucket')
+    )
+
+    labels = [label for label, _ in AGING_BUCKETS]
+    totals = {label: {'loans': 0, 'outstanding': Decimal('0'), 'pending_interest': Decimal('0')} for label in labels}
+    breakdown = []
+    for row in rows:
+        total = totals[row['bucket']]
+        total['loans'] += row['loans']
+        total['outstanding'] += row['outstanding'] or Decimal('0')
+        total['pending_interest'] += row['pending_interest'] or Decimal('0')
+        breakdown.append({
+            'area': row['customer__area'],
+            'loan_type': row['loan_type'],
+            'bucket': row['bucket'],
+            'loans': row['loans'],
+            'outstanding': str(row['outstanding'] or Decimal('0')),
+            'pending_interest': str(row['pending_interest'] or Decimal('0')),
+        })
+
+    return {
+        'as_of': today.isoformat(),
+        'buckets': [
+            {
+                'bucket': label,
+                'loans': totals[label]['loans'],
+                'outstanding': str(totals[label]['outstanding']),
+                'pending_interest': str(totals[label]['pending_interest']),
+            }
+            for label in labels
+        ],
+        'breakdown': breakdown,
+    }
+
+
+# Cached per process under a key with the CacheVersion of this name
+COHORT_CACHE = 'cohort-curves'
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def _month_start(now):
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _seconds_until_next_month(now):
+    first = (now.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return max(int((first - now).total_seconds()), 1)
+
+
+def _cohort_totals(transactions, loans):
+    """
+    Grouped recoveries {(cohort, loan_type, month): principal recovered} and
+    disbursements {(cohort, loan_type): (loans, principal)} for the given querysets.
+    """
+    recovered = {
+        (row['cohort'], row['loan__loan_type'], row['month']): row['recovered']
+        for row in transactions.values(
+            'loan__loan_type',
+            cohort=TruncMonth('loan__created_at', output_field=DateField()),
+            month=TruncMonth('created_at', output_field=DateField()),
+        ).annotate(recovered=Sum(Coalesce('asal_amount', 'amount'))).order_by()
+    }
+    disbursed = {
+        (row['cohort'], row['loan_type']): (row['loans'], row['principal'])
+        for row in loans.values('loan_type', cohort=TruncMonth('created_at', output_field=DateField()))
+        .annotate(loans=Count('id'), principal=Sum('principal_amount')).order_by()
+    }
+    return recovered, disbursed
+
+
+def invalidate_cohort_cache(changed_at=None):
+    """
+    Make every worker drop its cached closed-month cohort data, after a payment or loan
+    created at `changed_at` is edited or deleted (default: always). Rows from the current
+    month are not cached, so changes to them need nothing.
+    """
+    if changed_at is None or changed_at < _month_start(timezone.localtime()):
+        CacheVersion.bump(COHORT_CACHE)
+
+
+def cohort_curves(loan_type=None):
+    """
+    Cumulative % of principal recovered per disbursement cohort (Loan.created_at month
+    x loan type) by months since disbursement.
+
+    Recoveries and disbursements before the current month never change, so they are
+    grouped once and cached until the month ends or one of them is edited (see
+    invalidate_cohort_cache); each call only groups the current month's transactions
+    and loans.
+    """
+    now = timezone.localtime()
+    month_start = _month_start(now)
+    current_month = month_start.date()
+
+    cache_key = f'{COHORT_CACHE}:{CacheVersion.current(COHORT_CACHE)}:closed'
+    closed = cache.get(cache_key)
+    stale = closed is None or closed['month'] != current_month
+    metrics.inc('finance_cache_requests_total', cache='cohorts', result='miss' if stale else 'hit')
+    if stale:
+        recovered, disbursed = _cohort_totals(
+            Transaction.objects.filter(created_at__lt=month_start),
+            Loan.objects.filter(created_at__lt=month_start),
+        )
+        closed = {'month': current_month, 'recovered': recovered, 'disbursed': disbursed}
+        cache.set(cache_key, closed, _seconds_until_next_month(now))
+
+    recovered, disbursed = _cohort_totals(
+        Transaction.objects.filter(created_at__gte=month_start),
+        Loan.objects.filter(created_at__gte=month_start),
+    )
+    recovered.update(closed['recovered'])
+    disbursed.update(closed['disbursed'])
+
+    cohorts = []
+    for (cohort, cohort_type), (loans, principal) in sorted(disbursed.items()):
+        if loan_type and cohort_type != loan_type:
+            continue
+        cumulative = Decimal('0')
+        curve = []
+        for months in range(_month_index(current_month) - _month_index(cohort) + 1):
+            month = _month_index(cohort) + months
+            cumulative += recovered.get((cohort, cohort_type, date(month // 12, month % 12 + 1, 1)), Decimal('0'))
+            curve.append({
+                'months': months,
+                'recovered': str(cumulative),
+                'recovered_percent': round(float(cumulative / principal * 100), 2) if principal else None,
+            })
+        cohorts.append({
+            'cohort': cohort.strftime('%Y-%m'),
+            'loan_type': cohort_type,
+            'loans': loans,
+            'principal': str(principal),
+            'curve': curve,
+        })
+    return cohorts
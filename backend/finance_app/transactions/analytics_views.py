@@ -0,0 +1,31 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import permissions
+
+from .analytics import aging_buckets, cohort_curves
+from .caching import cached_for_today
+
+
+class AgingBucketsView(APIView):
+    """
+    Portfolio aging: outstanding principal and pending interest of open loans by
+    days since last payment (0-7, 8-30, 31-60, 61-90, 90+), per area and loan type.
+    Computed with one grouped query and cached for the day.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(cached_for_today('aging-buckets', aging_buckets))
+
+
+class CohortCurvesView(APIView):
+    """
+    Collection curves per disbursement cohort (loan created month x loan type):
+    cumulative % of principal recovered by months since disbursement.
+    Query params:
+    - loan_type: optional filter
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'cohorts': cohort_curves(loan_type=request.query_params.get('loan_type'))})
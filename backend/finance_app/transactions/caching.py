@@ -0,0 +1,22 @@
+from datetime import date, datetime, time, timedelta
+
+from django.core.cache import cache
+
+from finance_app.metrics import metrics
+
+
+def seconds_until_midnight():
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), time.min)
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def cached_for_today(key, compute):
+    """Return compute() cached under key until midnight (recomputed once per day)"""
+    day_key = f'{key}:{date.today().isoformat()}'
+    value = cache.get(day_key)
+    metrics.inc('finance_cache_requests_total', cache=key.split(':')[0], result='miss' if value is None else 'hit')
+    if value is None:
+        value = compute()
+        cache.set(day_key, value, seconds_until_midnight())
+    return value
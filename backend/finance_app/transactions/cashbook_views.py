@@ -47,55 +47,55 @@ class DailyCashBookView(APIView):
 
         # Today's cash collections (customer repayments via cash)
         cash_collections = Transaction.objects.filter(
-            created_at__date=target_date,
+            posted_on=target_date,
             payment_method='cash'
         ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
 
         # Today's online collections
         online_collections = Transaction.objects.filter(
-            created_at__date=target_date,
+            posted_on=target_date,
             payment_method='online'
         ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
 
         # New cash loans given today (money going out)
         cash_loans_given = Loan.objects.filter(
-            created_at__date=target_date,
+            posted_on=target_date,
             payment_method='cash'
         ).aggregate(total=Sum('principal_amount'))['total'] or Decimal('0')
 
         # New online loans given today
         online_loans_given = Loan.objects.filter(
-            created_at__date=target_date,
+            posted_on=target_date,
             payment_method='online'
         ).aggregate(total=Sum('principal_amount'))['total'] or Decimal('0')
 
         # Today's expenses
         expenses_total = Expense.objects.filter(
-            created_at__date=target_date
+            posted_on=target_date
         ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
 
         # DC deduction revenue (advance interest from new DC loans today)
         dc_deduction_revenue = Loan.objects.filter(
-            created_at__date=target_date,
+            posted_on=target_date,
             loan_type='DC Loan',
             dc_deduction_amount__gt=0
         ).aggregate(total=Sum('dc_deduction_amount'))['total'] or Decimal('0')
 
         # Interest revenue collected today broken down by loan type
         monthly_interest = Transaction.objects.filter(
-            created_at__date=target_date,
+            posted_on=target_date,
             loan__loan_type='Monthly Interest Loan',
             interest_amount__gt=0
         ).aggregate(total=Sum('interest_amount'))['total'] or Decimal('0')
 
         dl_interest = Transaction.objects.filter(
-            created_at__date=target_date,
+            posted_on=target_date,
             loan__loan_type='DL Loan',
             interest_amount__gt=0
         ).aggregate(total=Sum('interest_amount'))['total'] or Decimal('0')
 
         dc_interest = Transaction.objects.filter(
-            created_at__date=target_date,
+            posted_on=target_date,
             loan__loan_type='DC Loan',
             interest_amount__gt=0
         ).aggregate(total=Sum('interest_amount'))['total'] or Decimal('0')
@@ -115,12 +115,12 @@ class DailyCashBookView(APIView):
 
         # Get expense details
         expense_list = list(Expense.objects.filter(
-            created_at__date=target_date
+            posted_on=target_date
         ).values('id', 'description', 'amount'))
 
         # Get new loans given today
         new_loans_list = list(Loan.objects.filter(
-            created_at__date=target_date
+            posted_on=target_date
         ).select_related('customer').values(
             'id', 'customer__name', 'loan_type', 'principal_amount',
             'payment_method', 'dc_deduction_amount'
@@ -234,57 +234,57 @@ class RevenueReportView(APIView):
 
         # DC deduction revenue
         dc_deduction_revenue = Loan.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date,
+            posted_on__gte=start_date,
+            posted_on__lte=end_date,
             loan_type='DC Loan',
             dc_deduction_amount__gt=0
         ).aggregate(total=Sum('dc_deduction_amount'))['total'] or Decimal('0')
 
         # Interest collected (from transactions)
         interest_collected = Transaction.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date,
+            posted_on__gte=start_date,
+            posted_on__lte=end_date,
             interest_amount__gt=0
         ).aggregate(total=Sum('interest_amount'))['total'] or Decimal('0')
 
         # Break down interest by loan type
         dc_interest = Transaction.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date,
+            posted_on__gte=start_date,
+            posted_on__lte=end_date,
             loan__loan_type='DC Loan',
             interest_amount__gt=0
         ).aggregate(total=Sum('interest_amount'))['total'] or Decimal('0')
 
         monthly_interest = Transaction.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date,
+            posted_on__gte=start_date,
+            posted_on__lte=end_date,
             loan__loan_type='Monthly Interest Loan',
             interest_amount__gt=0
         ).aggregate(total=Sum('interest_amount'))['total'] or Decimal('0')
 
         dl_interest = Transaction.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date,
+            posted_on__gte=start_date,
+            posted_on__lte=end_date,
             loan__loan_type='DL Loan',
             interest_amount__gt=0
         ).aggregate(total=Sum('interest_amount'))['total'] or Decimal('0')
 
         # Total collections
         total_collections = Transaction.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
+            posted_on__gte=start_date,
+            posted_on__lte=end_date
         ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
 
         # Total loans given
         total_loans_given = Loan.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
+            posted_on__gte=start_date,
+            posted_on__lte=end_date
         ).aggregate(total=Sum('principal_amount'))['total'] or Decimal('0')
 
         # Total expenses
         total_expenses = Expense.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
+            posted_on__gte=start_date,
+            posted_on__lte=end_date
         ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
 
         total_revenue = dc_deduction_revenue + interest_collected
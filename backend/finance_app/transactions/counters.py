@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Loan, Transaction
+
+
+def raw_payment_totals(loan_ids=None):
+    """Payment counters recomputed from Transaction rows, keyed by loan id"""
+    transactions = Transaction.objects.all()
+    if loan_ids is not None:
+        transactions = transactions.filter(loan_id__in=loan_ids)
+    return {
+        row['loan']: (row['count'], row['asal'] or Decimal('0'), row['interest'] or Decimal('0'), row['last'])
+        for row in transactions.values('loan').annotate(
+            count=Count('id'),
+            asal=Sum(Coalesce('asal_amount', 'amount')),
+            interest=Sum(Coalesce('interest_amount', Value(Decimal('0')))),
+            last=Max('created_at'),
+        ).order_by()
+    }
+
+
+def verify_loan_counters(fix=False, batch_size=1000):
+    """
+    Compare every loan's payment counters with its transactions.
+    Returns the mismatching loans as (loan id, stored, actual); with fix=True they are rewritten.
+    """
+    empty = (0, Decimal('0'), Decimal('0'), None)
+    mismatches = []
+    loan_ids = list(Loan.objects.order_by('pk').values_list('pk', flat=True))
+    for offset in range(0, len(loan_ids), batch_size):
+        batch_ids = loan_ids[offset:offset + batch_size]
+        actual = raw_payment_totals(batch_ids)
+        with transaction.atomic():
+            loans = list(Loan.objects.filter(pk__in=batch_ids).only('pk', *Loan.COUNTER_FIELDS))
+            stale = []
+            for loan in loans:
+                stored = tuple(getattr(loan, field) for field in Loan.COUNTER_FIELDS)
+                expected = actual.get(loan.pk, empty)
+                if stored != expected:
+                    mismatches.append((loan.pk, stored, expected))
+                    for field, value in zip(Loan.COUNTER_FIELDS, expected):
+                        setattr(loan, field, value)
+                    stale.append(loan)
+            if fix and stale:
+                Loan.objects.bulk_update(stale, Loan.COUNTER_FIELDS)
+    return mismatches
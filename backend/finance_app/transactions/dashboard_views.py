@@ -1,6 +1,6 @@
 from datetime import date, timedelta
 from decimal import Decimal
-from django.db.models import Sum, Count, Q, Max
+from django.db.models import Sum, Count, Q, Max, Exists, OuterRef
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -13,7 +13,7 @@ class DashboardStatsView(APIView):
     """
     Dashboard statistics API endpoint providing:
     - Monthly interest due today
-    - Overdue payments (DC, Monthly Interest, DL loans)
+    - Overdue payments (DC, Monthly Interest, DL loans flagged by refresh_loan_status)
     - Low balance warnings
     - Total outstanding amount
     - Recent activity feed
@@ -25,15 +25,18 @@ class DashboardStatsView(APIView):
         today = date.today()
         today_day = today.day
         
-        # Get all active loans
-        active_loans = Loan.objects.filter(status='active').select_related('customer')
+        # Get all loans still being collected (active or overdue)
+        active_loans = Loan.objects.filter(status__in=Loan.OPEN_STATUSES).select_related('customer')
         
         # 1. Monthly Interest Due Today
-        # Loans where interest_cycle_day matches today's date
+        # Loans where interest_cycle_day matches today's date, flagged if interest was already collected this month
+        month_start = today.replace(day=1)
         monthly_interest_due = active_loans.filter(
             loan_type='Monthly Interest Loan',
             interest_cycle_day=today_day
-        ).prefetch_related('transactions')
+        ).annotate(interest_collected_this_month=Exists(
+            Transaction.objects.filter(loan=OuterRef('pk'), posted_on__gte=month_start, interest_amount__gt=0)
+        ))
         
         monthly_interest_due_list = []
         for loan in monthly_interest_due:
@@ -41,13 +44,6 @@ class DashboardStatsView(APIView):
             interest_rate = loan.monthly_interest_rate or Decimal('0')
             interest_due = (loan.principal_amount * interest_rate / 100)
             
-            # Check if interest was already collected this month
-            month_start = today.replace(day=1)
-            interest_collected_this_month = loan.transactions.filter(
-                created_at__date__gte=month_start,
-                interest_amount__gt=0
-            ).exists()
-            
             monthly_interest_due_list.append({
                 'loan_id': loan.id,
                 'customer_id': loan.customer.id,
@@ -57,36 +53,36 @@ class DashboardStatsView(APIView):
                 'remaining_amount': str(loan.remaining_amount),
                 'interest_rate': str(interest_rate),
                 'interest_due': str(interest_due),
-                'is_collected': interest_collected_this_month,
+                'is_collected': loan.interest_collected_this_month,
             })
         
-        # 2. Overdue Payments - Only Monthly Interest Loans
+        # 2. Overdue Payments - flagged on the indexed status column by refresh_loan_status
         overdue_alerts = []
-        
-        # Monthly Interest: Passed interest cycle day without payment
-        monthly_loans = active_loans.filter(loan_type='Monthly Interest Loan')
-        for loan in monthly_loans:
-            if loan.interest_cycle_day and loan.interest_cycle_day < today_day:
-                # Check if interest was paid this month
-                month_start = today.replace(day=1)
-                interest_paid = loan.transactions.filter(
-                    created_at__date__gte=month_start,
-                    interest_amount__gt=0
-                ).exists()
-                
-                if not interest_paid:
-                    days_overdue = today_day - loan.interest_cycle_day
-                    interest_rate = loan.monthly_interest_rate or Decimal('0')
-                    interest_due = (loan.principal_amount * interest_rate / 100)
-                    overdue_alerts.append({
-                        'loan_id': loan.id,
-                        'customer_id': loan.customer.id,
-                        'customer_name': loan.customer.name,
-                        'loan_type': 'Monthly Interest',
-                        'days_overdue': days_overdue,
-                        'expected_amount': str(interest_due),
-                        'remaining_amount': str(loan.remaining_amount),
-                    })
+        for loan in active_loans.filter(status='overdue'):
+            if loan.loan_type == 'Monthly Interest Loan':
+                days_overdue = today_day - (loan.interest_cycle_day or today_day)
+                interest_rate = loan.monthly_interest_rate or Decimal('0')
+                expected_amount = (loan.principal_amount * interest_rate / 100)
+                loan_type_label = 'Monthly Interest'
+            else:
+                term = loan.expected_total_days if loan.loan_type == 'DC Loan' else loan.max_days
+                days_overdue = (today - loan.start_date).days - (term or 0)
+                expected_amount = loan.remaining_amount
+                if loan.loan_type == 'DL Loan':
+                    expected_amount += loan.get_total_pending_interest()
+                loan_type_label = loan.loan_type
+            if days_overdue <= 0 and loan.overdue_since:
+                days_overdue = (today - loan.overdue_since).days
+            overdue_alerts.append({
+                'loan_id': loan.id,
+                'customer_id': loan.customer.id,
+                'customer_name': loan.customer.name,
+                'loan_type': loan_type_label,
+                'days_overdue': days_overdue,
+                'overdue_since': loan.overdue_since.isoformat() if loan.overdue_since else None,
+                'expected_amount': str(expected_amount),
+                'remaining_amount': str(loan.remaining_amount),
+            })
         
         # Sort overdue by days_overdue descending
         overdue_alerts.sort(key=lambda x: x.get('days_overdue', 0), reverse=True)
@@ -140,8 +136,8 @@ class DashboardStatsView(APIView):
         # Average collection per day (last 30 days)
         thirty_days_ago = today - timedelta(days=30)
         daily_collections = Transaction.objects.filter(
-            created_at__date__gte=thirty_days_ago
-        ).values('created_at__date').annotate(
+            posted_on__gte=thirty_days_ago
+        ).values('posted_on').annotate(
             daily_total=Sum('amount')
         )
         
@@ -154,7 +150,7 @@ class DashboardStatsView(APIView):
         # New loans this month
         month_start = today.replace(day=1)
         new_loans_this_month = Loan.objects.filter(
-            created_at__date__gte=month_start
+            posted_on__gte=month_start
         ).select_related('customer').order_by('-created_at')[:10]
         
         new_loans_list = [{
@@ -0,0 +1,83 @@
+"""
+Database-expression versions of the Loan interest calculations.
+
+Amounts are computed in integer paise with half-even rounding, the same way
+Decimal.quantize does in the Loan methods (and the vectorized Portfolio engine),
+so annotated values match the Python results to the paisa on SQLite and PostgreSQL.
+"""
+from django.db.models import (
+    BigIntegerField, Case, DecimalField, ExpressionWrapper, F, Func, IntegerField, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Greatest, Mod, Round
+from django.db.models.lookups import Exact, GreaterThan
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+class DaysBetween(Func):
+    """Whole days from ``start`` to ``end`` (both dates)"""
+    output_field = IntegerField()
+
+    def __init__(self, end, start, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL: date - date is an integer number of days
+        return super().as_sql(
+            compiler, connection, template='(%(expressions)s::date)', arg_joiner='::date - ', **extra_context
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)', arg_joiner=') - julianday(', **extra_context
+        )
+
+
+def _hundredths(field):
+    """2-decimal column as an integer number of hundredths (paise, rate basis points)"""
+    return Cast(Round(F(field) * 100), BigIntegerField())
+
+
+def _round_half_even_div(numerator, divisor):
+    """numerator / divisor rounded half to even (non-negative integer expressions)"""
+    remainder = Mod(numerator, Value(divisor), output_field=BigIntegerField())
+    quotient = ExpressionWrapper((numerator - remainder) / Value(divisor), output_field=BigIntegerField())
+    return Case(
+        When(GreaterThan(remainder, Value(divisor // 2)), then=quotient + 1),
+        When(Exact(remainder, Value(divisor // 2)), then=quotient + Mod(quotient, Value(2))),
+        default=quotient,
+        output_field=BigIntegerField(),
+    )
+
+
+def _rupees(paise):
+    return ExpressionWrapper(Cast(paise, MONEY) / Value(100), output_field=MONEY)
+
+
+def dl_interest_days(as_of):
+    """Days of DL interest as of a date (see Loan.calculate_dl_interest)"""
+    basis = Coalesce('interest_accrued_until', 'last_interest_payment_date', 'start_date')
+    return Greatest(DaysBetween(Value(as_of), basis), Value(0))
+
+
+def monthly_interest_paise():
+    """remaining × monthly rate, in paise (see Loan.calculate_monthly_interest)"""
+    return _round_half_even_div(_hundredths('remaining_amount') * _hundredths('monthly_interest_rate'), 10000)
+
+
+def dl_interest_paise(as_of):
+    """remaining × daily rate × days, in paise (see Loan.calculate_dl_interest)"""
+    return _round_half_even_div(
+        _hundredths('remaining_amount') * _hundredths('daily_interest_rate') * dl_interest_days(as_of), 10000
+    )
+
+
+def expected_interest(as_of):
+    """Current-cycle interest as a money expression (0 for DC loans or missing rates)"""
+    return Case(
+        When(loan_type='Monthly Interest Loan', monthly_interest_rate__gt=0, then=_rupees(monthly_interest_paise())),
+        When(loan_type='DL Loan', daily_interest_rate__gt=0, then=_rupees(dl_interest_paise(as_of))),
+        default=Value(0),
+        output_field=MONEY,
+    )
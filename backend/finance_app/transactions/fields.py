@@ -0,0 +1,34 @@
+from django.db import models
+from django.utils import timezone
+
+
+class LocalDateField(models.DateField):
+    """
+    Local business date (TIME_ZONE) of another datetime field on the model, filled in on save.
+
+    Filtering ``created_at__date`` converts every row's timestamp to local time, which
+    cannot use an index; storing the date makes day and range filters plain indexed lookups.
+    The source field must be declared before this one so its own pre_save (auto_now_add)
+    has already run.
+    """
+
+    def __init__(self, *args, source='created_at', **kwargs):
+        self.source = source
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('null', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.source != 'created_at':
+            kwargs['source'] = self.source
+        kwargs.pop('editable', None)
+        kwargs.pop('null', None)
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.source)
+        if value is not None:
+            local_date = timezone.localdate(value) if timezone.is_aware(value) else value.date()
+            setattr(model_instance, self.attname, local_date)
+        return super().pre_save(model_instance, add)
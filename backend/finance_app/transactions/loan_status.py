@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Loan, Transaction
+
+
+def overdue_condition(today):
+    """
+    Q matching loans that are overdue on ``today``:
+    - DC loans past start_date + expected_total_days
+    - DL loans past start_date + max_days
+    - Monthly loans whose interest cycle day has passed this month with no interest paid
+    One term per distinct term length keeps every branch a plain indexed comparison.
+    """
+    condition = Q(pk__in=[])
+
+    dc_terms = Loan.objects.filter(loan_type='DC Loan', expected_total_days__isnull=False) \
+        .values_list('expected_total_days', flat=True).distinct()
+    for term in dc_terms:
+        condition |= Q(loan_type='DC Loan', expected_total_days=term, start_date__lt=today - timedelta(days=term))
+
+    dl_terms = Loan.objects.filter(loan_type='DL Loan', max_days__isnull=False) \
+        .values_list('max_days', flat=True).distinct()
+    for term in dl_terms:
+        condition |= Q(loan_type='DL Loan', max_days=term, start_date__lt=today - timedelta(days=term))
+
+    month_start = today.replace(day=1)
+    interest_paid_this_month = Transaction.objects.filter(
+        loan=OuterRef('pk'),
+        posted_on__gte=month_start,
+        interest_amount__gt=0,
+    )
+    condition |= Q(
+        Q(loan_type='Monthly Interest Loan', interest_cycle_day__lt=today.day, start_date__lt=month_start),
+        ~Exists(interest_paid_this_month),
+    )
+    return condition
+
+
+def overdue_since(loan, today):
+    """The first day ``loan`` was overdue, by the same rules as overdue_condition"""
+    if loan.loan_type == 'DC Loan':
+        return loan.start_date + timedelta(days=loan.expected_total_days + 1)
+    if loan.loan_type == 'DL Loan':
+        return loan.start_date + timedelta(days=loan.max_days + 1)
+    # Monthly: the day after this month's cycle day (which is before today)
+    return today.replace(day=loan.interest_cycle_day + 1)
+
+
+def refresh_loan_status(today=None, batch_size=1000):
+    """Flag newly overdue loans and reactivate loans that are no longer overdue"""
+    if today is None:
+        today = date.today()
+    condition = overdue_condition(today)
+    with transaction.atomic():
+        loans = list(
+            Loan.objects.select_for_update().filter(status='active').filter(condition)
+            .only('pk', 'loan_type', 'start_date', 'expected_total_days', 'max_days', 'interest_cycle_day')
+        )
+        for loan in loans:
+            loan.status = 'overdue'
+            loan.overdue_since = overdue_since(loan, today)
+        Loan.objects.bulk_update(loans, ['status', 'overdue_since'], batch_size=batch_size)
+        cleared = Loan.objects.filter(status='overdue').exclude(condition).update(
+            status='active', overdue_since=None
+        )
+    return {'flagged': len(loans), 'cleared': cleared}
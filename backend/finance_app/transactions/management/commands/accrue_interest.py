@@ -0,0 +1,27 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.accrual import accrue_interest
+
+
+class Command(BaseCommand):
+    help = 'Accrue interest into pending_interest for all active Monthly and DL loans (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Accrue up to this date (YYYY-MM-DD, default: today)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        as_of = date.today()
+        if options['date']:
+            try:
+                as_of = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Invalid date format. Use YYYY-MM-DD')
+
+        summary = accrue_interest(as_of, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Accrued interest up to {as_of}: {summary['loans']} loans, "
+            f"{summary['accruals']} ledger entries, ₹{summary['amount']}"
+        ))
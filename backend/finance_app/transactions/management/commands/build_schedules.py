@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from transactions.models import Loan
+from transactions.schedule import generate_schedule, extend_monthly_schedules
+
+
+class Command(BaseCommand):
+    help = 'Build schedules for open loans that have none and extend Monthly loan schedules ahead'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Regenerate the schedule of every open loan, not just missing ones')
+
+    def handle(self, *args, **options):
+        loans = Loan.objects.filter(status__in=Loan.OPEN_STATUSES)
+        if not options['rebuild']:
+            loans = loans.filter(schedule_items__isnull=True)
+
+        built = 0
+        for loan in loans.iterator():
+            generate_schedule(loan)
+            built += 1
+        extended = extend_monthly_schedules()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Schedules built for {built} loans, {extended} Monthly cycles added'
+        ))
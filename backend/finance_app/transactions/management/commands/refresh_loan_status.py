@@ -0,0 +1,26 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.loan_status import refresh_loan_status
+
+
+class Command(BaseCommand):
+    help = 'Flag overdue loans (DC/DL past their term, Monthly with unpaid interest) and clear recovered ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Evaluate as of this date (YYYY-MM-DD, default: today)')
+
+    def handle(self, *args, **options):
+        today = date.today()
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Invalid date format. Use YYYY-MM-DD')
+
+        result = refresh_loan_status(today)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Loan status refreshed for {today}: {result['flagged']} flagged overdue, "
+            f"{result['cleared']} back to active"
+        ))
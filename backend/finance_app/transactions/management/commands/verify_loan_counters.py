@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from transactions.counters import verify_loan_counters
+
+
+class Command(BaseCommand):
+    help = 'Compare loan payment counters (count, asal, interest, last payment) with the raw transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite mismatching counters from the transactions')
+
+    def handle(self, *args, **options):
+        mismatches = verify_loan_counters(fix=options['fix'])
+        for loan_id, stored, actual in mismatches:
+            self.stdout.write(f'Loan {loan_id}: stored {stored} != actual {actual}')
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('All loan counters match their transactions'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'{len(mismatches)} loans fixed'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(mismatches)} loans out of sync (rerun with --fix)'))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_loan_dc_deduction_amount_dailycashbook'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='interest_accrued_until',
+            field=models.DateField(blank=True, help_text='Interest has been rolled into pending_interest up to this date', null=True),
+        ),
+        migrations.CreateModel(
+            name='InterestAccrual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField(help_text='Due date for Monthly loans, accrual date for DL loans')),
+                ('days', models.PositiveIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('accrued_on', models.DateField(db_index=True, help_text='Date the accrual job ran for')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('loan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interest_accruals', to='transactions.loan')),
+            ],
+            options={
+                'verbose_name': 'Interest Accrual',
+                'verbose_name_plural': 'Interest Accruals',
+                'db_table': 'transactions_interestaccrual',
+                'ordering': ['-accrued_on', '-id'],
+                'indexes': [models.Index(fields=['loan', 'period_end'], name='transaction_loan_id_66e517_idx')],
+            },
+        ),
+    ]
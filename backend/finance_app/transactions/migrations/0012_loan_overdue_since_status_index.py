@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_initial'),
+        ('transactions', '0011_loan_interest_accrued_until_interestaccrual'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='overdue_since',
+            field=models.DateField(blank=True, help_text='Date the loan was flagged overdue', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['status', 'loan_type'], name='transaction_status_663226_idx'),
+        ),
+    ]
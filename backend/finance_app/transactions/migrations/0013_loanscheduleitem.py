@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0012_loan_overdue_since_status_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanScheduleItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('kind', models.CharField(choices=[('installment', 'DC Installment'), ('interest', 'Monthly Interest'), ('maturity', 'DL Maturity')], max_length=15)),
+                ('due_date', models.DateField()),
+                ('amount_due', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('amount_paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('partial', 'Partially Paid'), ('paid', 'Paid')], default='pending', max_length=10)),
+                ('paid_on', models.DateField(blank=True, help_text='Date the item was fully paid', null=True)),
+                ('loan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_items', to='transactions.loan')),
+            ],
+            options={
+                'verbose_name': 'Loan Schedule Item',
+                'verbose_name_plural': 'Loan Schedule Items',
+                'db_table': 'transactions_loanscheduleitem',
+                'ordering': ['loan', 'sequence'],
+                'indexes': [models.Index(fields=['due_date', 'status'], name='transaction_due_dat_3291e1_idx'), models.Index(fields=['loan', 'status', 'due_date'], name='transaction_loan_id_1d6bfa_idx')],
+                'constraints': [models.UniqueConstraint(fields=('loan', 'sequence'), name='unique_schedule_item_sequence')],
+            },
+        ),
+    ]
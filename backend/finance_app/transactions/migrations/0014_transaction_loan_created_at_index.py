@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0013_loanscheduleitem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['loan', 'created_at'], name='transaction_loan_id_822430_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Max, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Loan = apps.get_model('transactions', 'Loan')
+    Transaction = apps.get_model('transactions', 'Transaction')
+
+    totals = {
+        row['loan']: row
+        for row in Transaction.objects.values('loan').annotate(
+            count=Count('id'),
+            asal=Sum(Coalesce('asal_amount', 'amount')),
+            interest=Sum(Coalesce('interest_amount', Value(Decimal('0')))),
+            last=Max('created_at'),
+        ).order_by()
+    }
+    loans = list(Loan.objects.filter(pk__in=list(totals)))
+    for loan in loans:
+        row = totals[loan.pk]
+        loan.transaction_count = row['count']
+        loan.total_asal_paid = row['asal'] or 0
+        loan.total_interest_paid = row['interest'] or 0
+        loan.last_payment_at = row['last']
+    Loan.objects.bulk_update(
+        loans, ['transaction_count', 'total_asal_paid', 'total_interest_paid', 'last_payment_at'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0015_loan_payment_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:43
+
+import transactions.fields
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_posted_on(apps, schema_editor):
+    # TruncDate converts to the active time zone (TIME_ZONE), matching LocalDateField
+    for name in ['Loan', 'Transaction']:
+        apps.get_model('transactions', name).objects.update(posted_on=TruncDate('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0006_populate_customer_aggregates'),
+        ('transactions', '0016_populate_loan_payment_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='posted_on',
+            field=transactions.fields.LocalDateField(help_text='Local date of created_at (indexed for date filters)'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='posted_on',
+            field=transactions.fields.LocalDateField(help_text='Local date of created_at (indexed for date filters)'),
+        ),
+        migrations.RunPython(backfill_posted_on, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['posted_on', 'payment_method'], name='transaction_posted__6c4906_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['posted_on', 'payment_method'], name='transaction_posted__d3357f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['loan', 'posted_on'], name='transaction_loan_id_a6de72_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0007_working_set_indexes'),
+        ('transactions', '0017_posted_on'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='loan',
+            name='transaction_custome_dc37ce_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_created_9eff96_idx',
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['customer', 'status'], name='transaction_custome_88aa12_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('status__in', ['active', 'overdue'])), fields=['loan_type', 'interest_cycle_day'], name='loan_open_cycle_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('status__in', ['active', 'overdue'])), fields=['loan_type', 'start_date'], name='loan_open_type_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['created_by', 'created_at'], name='transaction_created_7c8b5b_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Drop Loan.last_interest_date. It was replaced by last_interest_payment_date in
+    0008 and left out of the model since, but the column was never dropped. Nothing
+    reads or writes it. Irreversible: the old dates are lost, so back the table up
+    first if they matter.
+    """
+
+    dependencies = [
+        ('transactions', '0018_working_set_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='loan',
+            name='last_interest_date',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0019_remove_loan_last_interest_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loan',
+            name='overdue_since',
+            field=models.DateField(blank=True, help_text='First day the loan was overdue (set by refresh_loan_status)', null=True),
+        ),
+    ]
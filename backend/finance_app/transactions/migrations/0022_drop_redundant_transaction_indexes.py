@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:24
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0021_cacheversion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_loan_id_2b357f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_created_67ce7b_idx',
+        ),
+    ]
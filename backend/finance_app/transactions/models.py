@@ -1,8 +1,28 @@
 from datetime import date
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from customers.models import Customer
+from .fields import LocalDateField
+
+
+class LoanQuerySet(models.QuerySet):
+    def with_interest(self, as_of=None):
+        """
+        Annotate expected_interest and total_pending_interest as of a date (default today),
+        computed in the database so loans can be filtered and ordered by them.
+        """
+        from .expressions import expected_interest
+        if as_of is None:
+            as_of = date.today()
+        return self.annotate(expected_interest=expected_interest(as_of)).annotate(
+            total_pending_interest=models.ExpressionWrapper(
+                models.F('pending_interest') + models.F('expected_interest'),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2),
+            )
+        )
+
 
 class Loan(models.Model):
     LOAN_TYPE_CHOICES = (
@@ -10,6 +30,8 @@ class Loan(models.Model):
         ('Monthly Interest Loan', 'Monthly Interest Loan'),
         ('DL Loan', 'DL Loan'),
     )
+    # Loans still being collected (overdue loans are flagged by refresh_loan_status)
+    OPEN_STATUSES = ('active', 'overdue')
     
     customer = models.ForeignKey(
         Customer, 
@@ -25,6 +47,7 @@ class Loan(models.Model):
         ('settled', 'Settled'),
         ('overdue', 'Overdue'),
     ], default='active')
+    overdue_since = models.DateField(null=True, blank=True, help_text="First day the loan was overdue (set by refresh_loan_status)")
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -32,6 +55,7 @@ class Loan(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    posted_on = LocalDateField(help_text="Local date of created_at (indexed for date filters)")
     
     # Pending interest tracking (for partial interest payments)
     pending_interest = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Unpaid interest from previous cycles")
@@ -50,12 +74,26 @@ class Loan(models.Model):
     max_days = models.PositiveIntegerField(null=True, blank=True, help_text="Maximum days for loan completion")
     last_interest_payment_date = models.DateField(null=True, blank=True, help_text="Last date when interest was paid")
     
+    # Interest accrual watermark (Monthly and DL loans)
+    interest_accrued_until = models.DateField(null=True, blank=True, help_text="Interest has been rolled into pending_interest up to this date")
+    
     # Payment method tracking
     payment_method = models.CharField(max_length=10, choices=[
         ('cash', 'Cash'),
         ('online', 'Online Transfer'),
     ], default='cash', help_text="How the loan amount was disbursed")
     
+    # Payment counters, maintained on transaction create/edit/delete (see Loan.record_payments)
+    transaction_count = models.PositiveIntegerField(default=0)
+    total_asal_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_interest_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_payment_at = models.DateTimeField(null=True, blank=True)
+    
+    # Only ever written through F() updates, never from a possibly stale instance
+    COUNTER_FIELDS = ('transaction_count', 'total_asal_paid', 'total_interest_paid', 'last_payment_at')
+    
+    objects = LoanQuerySet.as_manager()
+    
     @property
     def amount_given_to_customer(self):
         """Amount actually given to customer after DC deduction"""
@@ -65,6 +103,81 @@ class Loan(models.Model):
     def __str__(self):
         return f"{self.customer.name} - {self.loan_type} - {self.principal_amount}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(name in instance.__dict__ for name in ('status', 'remaining_amount', 'pending_interest')):
+            instance._counted = instance._counter_contribution()
+        if all(name in instance.__dict__ for name in ('loan_type', 'principal_amount')):
+            instance._disbursed = (instance.loan_type, instance.principal_amount)
+        return instance
+    
+    def _counter_contribution(self):
+        """(active loans, outstanding, pending interest) this loan adds to its customer's and area's counters"""
+        if self.status in self.OPEN_STATUSES:
+            return 1, Decimal(str(self.remaining_amount)), Decimal(str(self.pending_interest))
+        return 0, Decimal('0'), Decimal('0')
+    
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        previous = (0, Decimal('0'), Decimal('0'))
+        if not creating:
+            previous = getattr(self, '_counted', None)
+            if previous is None:
+                stored = Loan.objects.filter(pk=self.pk).first()
+                previous = stored._counter_contribution() if stored else (0, Decimal('0'), Decimal('0'))
+        if not creating and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        
+        # Keep the customer's and area's aggregates in step
+        current = self._counter_contribution()
+        if current != previous:
+            from customers.models import Area, Customer
+            loans, outstanding, pending = (now - before for now, before in zip(current, previous))
+            Customer.adjust(self.customer_id, loans=loans, outstanding=outstanding, pending_interest=pending)
+            Area.adjust(self.customer.area_ref_id, loans=loans, outstanding=outstanding)
+        self._counted = current
+        
+        # Type and principal of older loans are part of the cached cohort curves
+        disbursed = (self.loan_type, self.principal_amount)
+        if getattr(self, '_disbursed', disbursed) != disbursed:
+            _invalidate_cohort_cache(self.created_at)
+        self._disbursed = disbursed
+        
+        # New loans get their installment schedule right away
+        if creating:
+            from .schedule import generate_schedule
+            generate_schedule(self)
+    
+    def delete(self, *args, **kwargs):
+        loans, outstanding, pending = self._counter_contribution()
+        customer_id, area_id = self.customer_id, self.customer.area_ref_id
+        result = super().delete(*args, **kwargs)
+        from customers.models import Area, Customer
+        Customer.adjust(customer_id, loans=-loans, outstanding=-outstanding, pending_interest=-pending)
+        Area.adjust(area_id, loans=-loans, outstanding=-outstanding)
+        _invalidate_cohort_cache(self.created_at)
+        return result
+    
+    @classmethod
+    def record_payments(cls, loan_id, count=0, asal=Decimal('0'), interest=Decimal('0'), refresh_last=False):
+        """Apply payment counter deltas atomically; refresh_last re-derives last_payment_at"""
+        updates = {
+            'transaction_count': models.F('transaction_count') + count,
+            'total_asal_paid': models.F('total_asal_paid') + asal,
+            'total_interest_paid': models.F('total_interest_paid') + interest,
+        }
+        if refresh_last:
+            updates['last_payment_at'] = models.Subquery(
+                Transaction.objects.filter(loan=models.OuterRef('pk'))
+                .order_by('-created_at').values('created_at')[:1]
+            )
+        cls.objects.filter(pk=loan_id).update(**updates)
+    
     def calculate_monthly_interest(self):
         """Calculate monthly interest based on remaining principal and rate"""
         if self.loan_type != 'Monthly Interest Loan' or not self.monthly_interest_rate:
@@ -73,14 +186,14 @@ class Loan(models.Model):
         return interest.quantize(Decimal('0.01'))
     
     def calculate_dl_interest(self, as_of_date=None):
-        """Calculate DL loan interest based on days from last interest payment or start date"""
+        """Calculate DL loan interest based on days since interest was last accrued, paid or started"""
         if self.loan_type != 'DL Loan' or not self.daily_interest_rate:
             return Decimal('0'), 0
         if as_of_date is None:
             as_of_date = date.today()
         
-        # Use last interest payment date if available, otherwise use start date
-        start_date = self.last_interest_payment_date or self.start_date
+        # Count from the accrual watermark, then the last interest payment, then the start date
+        start_date = self.interest_accrued_until or self.last_interest_payment_date or self.start_date
         days = (as_of_date - start_date).days
         if days < 0:
             days = 0
@@ -102,10 +215,68 @@ class Loan(models.Model):
         verbose_name = 'Loan'
         verbose_name_plural = 'Loans'
         indexes = [
-            models.Index(fields=['customer']),
+            # Per-customer loan lookups, optionally narrowed by status (LoanViewSet, aggregates)
+            models.Index(fields=['customer', 'status']),
+            models.Index(fields=['status', 'loan_type']),
+            models.Index(fields=['posted_on', 'payment_method']),
+            # Partial indexes over the open working set (settled loans are never scanned)
+            models.Index(
+                fields=['loan_type', 'interest_cycle_day'],
+                condition=models.Q(status__in=['active', 'overdue']),
+                name='loan_open_cycle_day_idx',
+            ),
+            models.Index(
+                fields=['loan_type', 'start_date'],
+                condition=models.Q(status__in=['active', 'overdue']),
+                name='loan_open_type_start_idx',
+            ),
         ]
 
 
+def _invalidate_cohort_cache(changed_at):
+    from .analytics import invalidate_cohort_cache
+    invalidate_cohort_cache(changed_at)
+
+
+class CacheVersion(models.Model):
+    """
+    Version of data each worker process caches for itself (see analytics.cohort_curves).
+    Writes to the underlying rows bump it, and readers put it in their cache key, so no
+    worker keeps serving the old copy.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+    
+    @classmethod
+    def current(cls, name):
+        return cls.objects.filter(name=name).values_list('version', flat=True).first() or 0
+    
+    @classmethod
+    def bump(cls, name):
+        """Retire every cached copy of `name`; call in the transaction that changes its rows"""
+        if not cls.objects.filter(name=name).update(version=models.F('version') + 1):
+            cls.objects.get_or_create(name=name, defaults={'version': 1})
+    
+    class Meta:
+        db_table = 'transactions_cacheversion'
+        verbose_name = 'Cache Version'
+        verbose_name_plural = 'Cache Versions'
+
+
+class TransactionQuerySet(models.QuerySet):
+    def delete(self):
+        """Delete payments one at a time so each is reversed on its loan (see Transaction.delete)"""
+        with transaction.atomic():
+            deleted = 0
+            for txn in self.order_by('pk'):
+                txn.delete()
+                deleted += 1
+        return deleted, {Transaction._meta.label: deleted}
+
+
 class Transaction(models.Model):
     PAYMENT_METHOD_CHOICES = (
         ('cash', 'Cash'),
@@ -128,66 +299,167 @@ class Transaction(models.Model):
         related_name='transactions_recorded'
     )
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    posted_on = LocalDateField(help_text="Local date of created_at (indexed for date filters)")
+    
+    objects = TransactionQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.loan.customer.name} - {self.amount} - {self.created_at.strftime('%Y-%m-%d')}"
     
+    @property
+    def principal_paid(self):
+        """Part of the payment that reduces the loan balance (see save)"""
+        return Decimal(str(self.asal_amount if self.asal_amount is not None else self.amount or 0))
+    
+    @property
+    def interest_paid(self):
+        return Decimal(str(self.interest_amount or 0))
+    
     def save(self, *args, **kwargs):
+        """
+        Post or edit a payment together with everything derived from it: the loan's
+        balance, interest and status, its payment counters and schedule, the area's
+        collections and the customer's last payment. All of it commits or none of it
+        does, and the loan row stays locked until then so concurrent payments into
+        the same loan are applied one after the other.
+        """
         # Calculate total amount from asal and interest if not provided
         if not self.amount:
             self.amount = (self.asal_amount or Decimal('0')) + (self.interest_amount or Decimal('0'))
 
-        # Only for new transactions
-        if not self.pk:
-            loan = self.loan
-            
-            # Update the loan's remaining amount: only principal (asal) reduces the balance
-            if self.asal_amount is not None:
-                principal_reduction = Decimal(str(self.asal_amount))
+        with transaction.atomic():
+            if self._state.adding:
+                self._post(*args, **kwargs)
+            else:
+                self._edit(*args, **kwargs)
+
+    def _post(self, *args, **kwargs):
+        loan = self.loan = Loan.objects.select_for_update().select_related('customer').get(pk=self.loan_id)
+
+        # Update the loan's remaining amount: only principal (asal) reduces the balance
+        loan.remaining_amount -= self.principal_paid
+
+        # Handle pending interest for Monthly and DL loans
+        if loan.loan_type == 'Monthly Interest Loan':
+            expected_interest = loan.calculate_monthly_interest() + loan.pending_interest
+            interest_paid = self.interest_paid
+            # If paid less than expected, add to pending
+            if interest_paid < expected_interest:
+                loan.pending_interest = expected_interest - interest_paid
+            else:
+                loan.pending_interest = Decimal('0')
+            # Paying this cycle's interest clears the overdue flag
+            if interest_paid > 0 and loan.status == 'overdue':
+                loan.status = 'active'
+                loan.overdue_since = None
+
+        elif loan.loan_type == 'DL Loan':
+            expected_interest, _ = loan.calculate_dl_interest()
+            expected_interest = expected_interest + loan.pending_interest
+            interest_paid = self.interest_paid
+            # If paid less than expected, add to pending
+            if interest_paid < expected_interest:
+                loan.pending_interest = expected_interest - interest_paid
             else:
-                principal_reduction = Decimal(str(self.amount)) if self.amount else Decimal('0')
-            
-            loan.remaining_amount -= principal_reduction
-            
-            # Handle pending interest for Monthly and DL loans
-            if loan.loan_type == 'Monthly Interest Loan':
-                expected_interest = loan.calculate_monthly_interest() + loan.pending_interest
-                interest_paid = Decimal(str(self.interest_amount)) if self.interest_amount else Decimal('0')
-                # If paid less than expected, add to pending
-                if interest_paid < expected_interest:
-                    loan.pending_interest = expected_interest - interest_paid
-                else:
-                    loan.pending_interest = Decimal('0')
-            
-            elif loan.loan_type == 'DL Loan':
-                expected_interest, _ = loan.calculate_dl_interest()
-                expected_interest = expected_interest + loan.pending_interest
-                interest_paid = Decimal(str(self.interest_amount)) if self.interest_amount else Decimal('0')
-                # If paid less than expected, add to pending
-                if interest_paid < expected_interest:
-                    loan.pending_interest = expected_interest - interest_paid
-                else:
-                    loan.pending_interest = Decimal('0')
-                    # Update last interest payment date when interest is fully paid
-                    loan.last_interest_payment_date = self.created_at.date()
-            
-            # Check if loan is fully paid
+                loan.pending_interest = Decimal('0')
+                # Update last interest payment date when interest is fully paid
+                loan.last_interest_payment_date = date.today()
+            # Interest up to today now lives in pending_interest
+            loan.interest_accrued_until = date.today()
+
+        # Check if loan is fully paid
+        if loan.remaining_amount <= 0:
+            loan.remaining_amount = Decimal('0')
+            loan.status = 'settled'
+            loan.overdue_since = None
+
+        loan.save()
+        super().save(*args, **kwargs)
+
+        Loan.objects.filter(pk=self.loan_id).update(
+            transaction_count=models.F('transaction_count') + 1,
+            total_asal_paid=models.F('total_asal_paid') + self.principal_paid,
+            total_interest_paid=models.F('total_interest_paid') + self.interest_paid,
+            last_payment_at=models.Case(
+                models.When(last_payment_at__gt=self.created_at, then=models.F('last_payment_at')),
+                default=models.Value(self.created_at),
+            ),
+        )
+        # Match new payments against the loan's installment schedule
+        from .schedule import apply_payment
+        apply_payment(loan, self)
+        # Count the payment in its area's collections and as the customer's last payment
+        from customers.models import Area, Customer
+        Area.record_collection(loan.customer.area_ref_id, self.amount)
+        Customer.record_payment(loan.customer_id, self)
+
+    def _edit(self, *args, **kwargs):
+        stored = Transaction.objects.select_related('loan').get(pk=self.pk)
+        if stored.loan_id != self.loan_id:
+            raise ValueError('A payment cannot be moved to another loan; delete it and post it again')
+        loan = self.loan = Loan.objects.select_for_update().select_related('customer').get(pk=self.loan_id)
+
+        # Adjust the loan balance by the change in principal
+        difference = self.principal_paid - stored.principal_paid
+        if difference:
+            loan.remaining_amount -= difference
             if loan.remaining_amount <= 0:
-                loan.remaining_amount = Decimal('0')
                 loan.status = 'settled'
-            
+            elif loan.status == 'settled':
+                loan.status = 'active'
             loan.save()
-        
+
         super().save(*args, **kwargs)
-    
+
+        Loan.record_payments(loan.pk, asal=difference, interest=self.interest_paid - stored.interest_paid)
+        # Re-match the loan's payments against its schedule
+        from .schedule import reconcile_schedule
+        reconcile_schedule(loan)
+        from customers.models import Area, Customer
+        Area.record_collection(loan.customer.area_ref_id, self.amount - stored.amount,
+                               on=timezone.localdate(stored.created_at))
+        Customer.refresh_last_payment(loan.customer_id)
+        _invalidate_cohort_cache(stored.created_at)
+
+    def delete(self, *args, **kwargs):
+        """Delete the payment and reverse its effect on the loan, area and customer (atomically)"""
+        with transaction.atomic():
+            stored = Transaction.objects.get(pk=self.pk)
+            loan = Loan.objects.select_for_update().select_related('customer').get(pk=stored.loan_id)
+
+            # Reverse the principal reduction
+            if stored.principal_paid:
+                loan.remaining_amount += stored.principal_paid
+                # If loan was settled, reactivate it
+                if loan.status == 'settled':
+                    loan.status = 'active'
+                loan.save()
+
+            result = super().delete(*args, **kwargs)
+            Loan.record_payments(loan.pk, count=-1, asal=-stored.principal_paid,
+                                 interest=-stored.interest_paid, refresh_last=True)
+            from .schedule import reconcile_schedule
+            reconcile_schedule(loan)
+            from customers.models import Area, Customer
+            Area.record_collection(loan.customer.area_ref_id, -stored.amount,
+                                   on=timezone.localdate(stored.created_at))
+            Customer.refresh_last_payment(loan.customer_id)
+            _invalidate_cohort_cache(stored.created_at)
+        return result
+
     class Meta:
         db_table = 'transactions_transaction'
         verbose_name = 'Transaction'
         verbose_name_plural = 'Transactions'
+        # loan and created_at have single-column indexes already (foreign key, db_index=True)
         indexes = [
-            models.Index(fields=['loan']),
-            models.Index(fields=['created_at']),
-            models.Index(fields=['created_by']),
+            # Collector-scoped list: created_by=user ordered by -created_at
+            models.Index(fields=['created_by', 'created_at']),
+            # Latest payment per loan (aging, last-payment lookups)
+            models.Index(fields=['loan', 'created_at']),
+            # Day/range filters on the local date (cash book, reports, per-loan history)
+            models.Index(fields=['posted_on', 'payment_method']),
+            models.Index(fields=['loan', 'posted_on']),
         ]
 
 
@@ -213,4 +485,74 @@ class DailyCashBook(models.Model):
         db_table = 'transactions_dailycashbook'
         verbose_name = 'Daily Cash Book'
         verbose_name_plural = 'Daily Cash Book Entries'
-        ordering = ['-date']
\ No newline at end of file
+        ordering = ['-date']
+
+
+class InterestAccrual(models.Model):
+    """Ledger of interest rolled into a loan's pending_interest by the accrual job"""
+    loan = models.ForeignKey(
+        Loan,
+        on_delete=models.CASCADE,
+        related_name='interest_accruals'
+    )
+    period_start = models.DateField()
+    period_end = models.DateField(help_text="Due date for Monthly loans, accrual date for DL loans")
+    days = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    accrued_on = models.DateField(db_index=True, help_text="Date the accrual job ran for")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Accrual {self.loan_id} - {self.amount} ({self.period_start} to {self.period_end})"
+    
+    class Meta:
+        db_table = 'transactions_interestaccrual'
+        verbose_name = 'Interest Accrual'
+        verbose_name_plural = 'Interest Accruals'
+        ordering = ['-accrued_on', '-id']
+        indexes = [
+            models.Index(fields=['loan', 'period_end']),
+        ]
+
+
+class LoanScheduleItem(models.Model):
+    """Expected installment of a loan: DC daily collection, Monthly interest cycle or DL maturity"""
+    KIND_CHOICES = (
+        ('installment', 'DC Installment'),
+        ('interest', 'Monthly Interest'),
+        ('maturity', 'DL Maturity'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('partial', 'Partially Paid'),
+        ('paid', 'Paid'),
+    )
+    
+    loan = models.ForeignKey(
+        Loan,
+        on_delete=models.CASCADE,
+        related_name='schedule_items'
+    )
+    sequence = models.PositiveIntegerField()
+    kind = models.CharField(max_length=15, choices=KIND_CHOICES)
+    due_date = models.DateField()
+    amount_due = models.DecimalField(max_digits=12, decimal_places=2)
+    amount_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    paid_on = models.DateField(null=True, blank=True, help_text="Date the item was fully paid")
+    
+    def __str__(self):
+        return f"Loan {self.loan_id} #{self.sequence} due {self.due_date} - {self.status}"
+    
+    class Meta:
+        db_table = 'transactions_loanscheduleitem'
+        verbose_name = 'Loan Schedule Item'
+        verbose_name_plural = 'Loan Schedule Items'
+        ordering = ['loan', 'sequence']
+        constraints = [
+            models.UniqueConstraint(fields=['loan', 'sequence'], name='unique_schedule_item_sequence'),
+        ]
+        indexes = [
+            models.Index(fields=['due_date', 'status']),
+            models.Index(fields=['loan', 'status', 'due_date']),
+        ]
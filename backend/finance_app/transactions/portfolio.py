@@ -0,0 +1,316 @@
+"""
+Vectorized portfolio engine.
+
+Loads the loan book into columnar NumPy arrays and evaluates the same formulas as
+Loan.calculate_monthly_interest / calculate_dl_interest / get_total_pending_interest
+for many loans and many as-of dates at once. Money is held as integer paise and
+rates as integer hundredths of a percent, so every result is exact and rounds
+exactly like Decimal.quantize(Decimal('0.01')) (half-even).
+"""
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+
+from .models import Loan
+
+DC_LOAN, MONTHLY_LOAN, DL_LOAN = 0, 1, 2
+LOAN_TYPE_CODES = {
+    'DC Loan': DC_LOAN,
+    'Monthly Interest Loan': MONTHLY_LOAN,
+    'DL Loan': DL_LOAN,
+}
+LOAN_TYPE_NAMES = {code: name for name, code in LOAN_TYPE_CODES.items()}
+
+INT64_MAX = np.iinfo(np.int64).max
+
+
+def to_paise(amount):
+    """Decimal rupees (or None) to integer paise"""
+    if amount is None:
+        return 0
+    return int(Decimal(amount).scaleb(2).to_integral_value())
+
+
+def to_rate_units(rate):
+    """Percentage rate to integer hundredths of a percent (1.25% -> 125)"""
+    if rate is None:
+        return 0
+    units = Decimal(str(rate)).scaleb(2)
+    if units != units.to_integral_value():
+        raise ValueError(f'Rate {rate} has more than 2 decimal places')
+    return int(units)
+
+
+def to_rupees(paise):
+    """Integer paise to Decimal rupees with 2 decimal places"""
+    return Decimal(int(paise)).scaleb(-2)
+
+
+def _round_half_even_div(numerator, divisor):
+    """Integer division rounded half-even, matching Decimal's default rounding"""
+    quotient, remainder = np.divmod(numerator, divisor)
+    twice = remainder * 2
+    round_up = (twice > divisor) | ((twice == divisor) & (quotient % 2 == 1))
+    return quotient + round_up
+
+
+def _checked_product(*arrays):
+    """Multiply int64 arrays, falling back to Python ints if the product could overflow"""
+    bound = 1
+    for array in arrays:
+        bound *= int(np.abs(array).max()) if array.size else 0
+    if bound <= INT64_MAX:
+        result = arrays[0].astype(np.int64)
+        for array in arrays[1:]:
+            result = result * array
+        return result
+    result = arrays[0].astype(object)
+    for array in arrays[1:]:
+        result = result * array.astype(object)
+    return result
+
+
+class Portfolio:
+    """Columnar snapshot of loans (one array element per loan, ordered by loan type then id)"""
+
+    FIELDS = (
+        'id', 'loan_type', 'customer__area', 'principal_amount', 'remaining_amount', 'pending_interest',
+        'monthly_interest_rate', 'interest_cycle_day',
+        'daily_collection_amount', 'expected_total_days',
+        'daily_interest_rate', 'max_days',
+        'start_date', 'last_interest_payment_date', 'interest_accrued_until',
+    )
+
+    def __init__(self, rows):
+        # Grouped by loan type so per-type totals are contiguous slices
+        rows = sorted(rows, key=lambda row: (LOAN_TYPE_CODES.get(row.loan_type, DC_LOAN), row.id))
+        count = len(rows)
+
+        def column(values, dtype=np.int64):
+            return np.fromiter(values, dtype=dtype, count=count)
+
+        self.ids = column(row.id for row in rows)
+        self.loan_type = column((LOAN_TYPE_CODES.get(row.loan_type, DC_LOAN) for row in rows), np.int8)
+        self.principal = column(to_paise(row.principal_amount) for row in rows)
+        self.remaining = column(to_paise(row.remaining_amount) for row in rows)
+        self.pending = column(to_paise(row.pending_interest) for row in rows)
+        self.monthly_rate = column(to_rate_units(row.monthly_interest_rate) for row in rows)
+        self.cycle_day = column(row.interest_cycle_day or 0 for row in rows)
+        self.daily_collection = column(to_paise(row.daily_collection_amount) for row in rows)
+        self.expected_days = column(row.expected_total_days or 0 for row in rows)
+        self.daily_rate = column(to_rate_units(row.daily_interest_rate) for row in rows)
+        self.max_days = column(row.max_days or 0 for row in rows)
+        self.start = column(row.start_date.toordinal() for row in rows)
+        # Same precedence as Loan.calculate_dl_interest
+        self.basis = column(
+            (row.interest_accrued_until or row.last_interest_payment_date or row.start_date).toordinal()
+            for row in rows
+        )
+
+        # Areas are grouped case-insensitively, keeping the first spelling seen
+        area_codes = {}
+        self.areas = []
+        for row in rows:
+            key = (row.customer__area or '').strip().lower()
+            if key not in area_codes:
+                area_codes[key] = len(self.areas)
+                self.areas.append((row.customer__area or '').strip() or 'Unknown')
+        self.area = column(area_codes[(row.customer__area or '').strip().lower()] for row in rows)
+
+        bounds = np.searchsorted(self.loan_type, list(LOAN_TYPE_NAMES) + [len(LOAN_TYPE_NAMES)])
+        self.type_slices = {
+            code: slice(int(bounds[index]), int(bounds[index + 1])) for index, code in enumerate(LOAN_TYPE_NAMES)
+        }
+
+    @classmethod
+    def load(cls, queryset=None):
+        """Load open loans (or the given Loan queryset) into arrays"""
+        if queryset is None:
+            queryset = Loan.objects.filter(status__in=Loan.OPEN_STATUSES)
+        return cls(queryset.values_list(*cls.FIELDS, named=True))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _rates(self, rate_array, override, loan_type):
+        """Rate column for one loan type, optionally replaced by a what-if rate"""
+        if override is None:
+            return rate_array
+        mask = (self.loan_type == loan_type) & (rate_array > 0)
+        return np.where(mask, to_rate_units(override), rate_array)
+
+    def monthly_interest(self, monthly_rate=None):
+        """Current-cycle interest in paise per loan (0 for non-Monthly loans)"""
+        rates = self._rates(self.monthly_rate, monthly_rate, MONTHLY_LOAN)
+        rates = np.where(self.loan_type == MONTHLY_LOAN, rates, 0)
+        return _round_half_even_div(_checked_product(self.remaining, rates), 10000)
+
+    def dl_days(self, as_of_dates):
+        """Days of unaccrued DL interest, shape (dates, loans)"""
+        ordinals = np.array([as_of.toordinal() for as_of in as_of_dates], dtype=np.int64)
+        return np.maximum(ordinals[:, None] - self.basis[None, :], 0)
+
+    def dl_interest(self, as_of_dates, daily_rate=None):
+        """DL interest in paise, shape (dates, loans) (0 for non-DL loans)"""
+        part = self.type_slices[DL_LOAN]
+        rates = self._rates(self.daily_rate, daily_rate, DL_LOAN)[part]
+        days = self.dl_days(as_of_dates)[:, part]
+        remaining = np.broadcast_to(self.remaining[part], days.shape)
+        rates = np.broadcast_to(rates, days.shape)
+        interest = np.zeros((len(as_of_dates), len(self)), dtype=np.int64)
+        interest[:, part] = _round_half_even_div(_checked_product(remaining, rates, days), 10000)
+        return interest
+
+    def total_pending_interest(self, as_of_dates, monthly_rate=None, daily_rate=None):
+        """Pending plus current interest in paise, shape (dates, loans)"""
+        return (
+            self.pending[None, :]
+            + self.monthly_interest(monthly_rate)[None, :]
+            + self.dl_interest(as_of_dates, daily_rate)
+        )
+
+    def project(self, as_of_dates, monthly_rate=None, daily_rate=None):
+        """Portfolio totals per as-of date, split by loan type"""
+        current = self.monthly_interest(monthly_rate)[None, :] + self.dl_interest(as_of_dates, daily_rate)
+        current_sums = {code: current[:, part].sum(axis=1) for code, part in self.type_slices.items()}
+        outstanding = {code: self.remaining[part].sum() for code, part in self.type_slices.items()}
+        pending = {code: self.pending[part].sum() for code, part in self.type_slices.items()}
+
+        results = []
+        for index, as_of in enumerate(as_of_dates):
+            by_loan_type = []
+            for code, part in self.type_slices.items():
+                by_loan_type.append({
+                    'loan_type': LOAN_TYPE_NAMES[code],
+                    'loans': part.stop - part.start,
+                    'outstanding': str(to_rupees(outstanding[code])),
+                    'pending_interest': str(to_rupees(pending[code])),
+                    'current_interest': str(to_rupees(current_sums[code][index])),
+                    'total_pending_interest': str(to_rupees(pending[code] + current_sums[code][index])),
+                })
+            current_total = sum(current_sums[code][index] for code in current_sums)
+            results.append({
+                'as_of': as_of.isoformat(),
+                'outstanding': str(to_rupees(sum(outstanding.values()))),
+                'pending_interest': str(to_rupees(sum(pending.values()))),
+                'current_interest': str(to_rupees(current_total)),
+                'total_pending_interest': str(to_rupees(sum(pending.values()) + current_total)),
+                'by_loan_type': by_loan_type,
+            })
+        return results
+
+    def forecast(self, start, days):
+        """
+        Expected inflow in paise per day and loan, shape (days, loans), from start.
+
+        - DC: one installment a day after disbursement (daily_collection_amount, or
+          principal spread over expected_total_days) until the balance is collected
+        - Monthly: the current cycle's interest on each interest_cycle_day
+        - DL: balance, pending and accrued interest on the maturity date (start_date + max_days)
+        """
+        dates = [start + timedelta(days=offset) for offset in range(days)]
+        ordinals = np.array([day.toordinal() for day in dates], dtype=np.int64)
+        inflow = np.zeros((days, len(self)), dtype=np.int64)
+
+        part = self.type_slices[DC_LOAN]
+        spread = -(-self.principal[part] // np.maximum(self.expected_days[part], 1))
+        installment = np.where(
+            self.daily_collection[part] > 0,
+            self.daily_collection[part],
+            np.where(self.expected_days[part] > 0, spread, 0),
+        )
+        scheduled = np.where(ordinals[:, None] > self.start[None, part], installment[None, :], 0)
+        collected_before = np.cumsum(scheduled, axis=0) - scheduled
+        inflow[:, part] = np.clip(self.remaining[None, part] - collected_before, 0, scheduled)
+
+        part = self.type_slices[MONTHLY_LOAN]
+        day_of_month = np.array([day.day for day in dates], dtype=np.int64)
+        month_end = np.array([calendar.monthrange(day.year, day.month)[1] for day in dates], dtype=np.int64)
+        due_day = np.minimum(self.cycle_day[None, part], month_end[:, None])
+        is_due = (
+            (due_day == day_of_month[:, None])
+            & (self.cycle_day[None, part] > 0)
+            & (ordinals[:, None] > self.start[None, part])
+        )
+        inflow[:, part] = np.where(is_due, self.monthly_interest()[None, part], 0)
+
+        part = self.type_slices[DL_LOAN]
+        maturity = self.start[part] + self.max_days[part]
+        interest_days = np.maximum(maturity - self.basis[part], 0)
+        interest = _round_half_even_div(
+            _checked_product(self.remaining[part], self.daily_rate[part], interest_days), 10000
+        )
+        payoff = self.remaining[part] + self.pending[part] + interest
+        is_due = (ordinals[:, None] == maturity[None, :]) & (self.max_days[None, part] > 0)
+        inflow[:, part] = np.where(is_due, payoff[None, :], 0)
+
+        return dates, inflow
+
+    def forecast_summary(self, start, days):
+        """Expected daily inflows per loan type and per area, as API-ready strings"""
+        dates, inflow = self.forecast(start, days)
+        by_type = {code: inflow[:, part].sum(axis=1) for code, part in self.type_slices.items()}
+
+        # Per (area, loan type) daily totals with one reduceat over loans sorted by group
+        areas = {}
+        if len(self):
+            groups = self.area * len(LOAN_TYPE_NAMES) + self.loan_type
+            order = np.argsort(groups, kind='stable')
+            sorted_groups = groups[order]
+            starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+            group_daily = np.add.reduceat(inflow[:, order], starts, axis=1)
+
+            for column, group in enumerate(sorted_groups[starts]):
+                area_name = self.areas[int(group) // len(LOAN_TYPE_NAMES)]
+                loan_type = LOAN_TYPE_NAMES[int(group) % len(LOAN_TYPE_NAMES)]
+                entry = areas.setdefault(area_name, {
+                    'area': area_name,
+                    'daily': np.zeros(days, dtype=np.int64),
+                    'by_loan_type': {},
+                })
+                entry['daily'] = entry['daily'] + group_daily[:, column]
+                entry['by_loan_type'][loan_type] = str(to_rupees(group_daily[:, column].sum()))
+
+        return {
+            'start_date': start.isoformat(),
+            'days': days,
+            'loans': len(self),
+            'total': str(to_rupees(inflow.sum())),
+            'by_loan_type': {LOAN_TYPE_NAMES[code]: str(to_rupees(totals.sum())) for code, totals in by_type.items()},
+            'daily': [
+                {
+                    'date': day.isoformat(),
+                    'total': str(to_rupees(sum(totals[index] for totals in by_type.values()))),
+                    'by_loan_type': {LOAN_TYPE_NAMES[code]: str(to_rupees(totals[index])) for code, totals in by_type.items()},
+                }
+                for index, day in enumerate(dates)
+            ],
+            'areas': sorted(
+                (
+                    {
+                        'area': entry['area'],
+                        'total': str(to_rupees(entry['daily'].sum())),
+                        'by_loan_type': entry['by_loan_type'],
+                        'daily': [str(to_rupees(value)) for value in entry['daily']],
+                    }
+                    for entry in areas.values()
+                ),
+                key=lambda entry: Decimal(entry['total']),
+                reverse=True,
+            ),
+        }
+
+
+def parse_as_of_dates(values, default=None):
+    """Parse as-of dates from repeated and/or comma-separated YYYY-MM-DD strings"""
+    dates = []
+    for value in values:
+        for part in str(value).split(','):
+            part = part.strip()
+            if part:
+                dates.append(date.fromisoformat(part))
+    if not dates:
+        dates = [default or date.today()]
+    return sorted(set(dates))
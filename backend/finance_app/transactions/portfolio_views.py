@@ -0,0 +1,88 @@
+from datetime import date
+from urllib.parse import quote
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import permissions, status
+
+from .models import Loan
+from .caching import cached_for_today
+from .portfolio import Portfolio, parse_as_of_dates
+
+MAX_AS_OF_DATES = 366
+MAX_FORECAST_DAYS = 180
+
+
+class PortfolioProjectionView(APIView):
+    """
+    Portfolio interest projection for one or more as-of dates.
+    Query params:
+    - as_of: YYYY-MM-DD (repeatable or comma-separated, default today)
+    - monthly_rate / dl_rate: what-if rate (%) applied to all Monthly / DL loans
+    - loan_type, area: optional filters
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            as_of_dates = parse_as_of_dates(request.query_params.getlist('as_of'))
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(as_of_dates) > MAX_AS_OF_DATES:
+            return Response({'error': f'At most {MAX_AS_OF_DATES} as_of dates are allowed'}, status=status.HTTP_400_BAD_REQUEST)
+
+        monthly_rate = request.query_params.get('monthly_rate') or None
+        dl_rate = request.query_params.get('dl_rate') or None
+
+        loans = Loan.objects.filter(status__in=Loan.OPEN_STATUSES)
+        loan_type = request.query_params.get('loan_type')
+        area = request.query_params.get('area')
+        if loan_type:
+            loans = loans.filter(loan_type=loan_type)
+        if area:
+            loans = loans.filter(customer__area__iexact=area)
+
+        portfolio = Portfolio.load(loans)
+        try:
+            projections = portfolio.project(as_of_dates, monthly_rate=monthly_rate, daily_rate=dl_rate)
+        except (ValueError, ArithmeticError):
+            return Response({'error': 'Rates must be numbers with at most 2 decimal places'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'loans': len(portfolio),
+            'assumptions': {
+                'monthly_rate': monthly_rate,
+                'dl_rate': dl_rate,
+            },
+            'projections': projections,
+        })
+
+
+class CashFlowForecastView(APIView):
+    """
+    Expected cash inflows for the next N days, per loan type and area.
+    Query params:
+    - days: forecast horizon starting today (default 30, max 180)
+    - area: optional area filter
+    Computed in one vectorized pass over the active book and cached for the day.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({'error': 'days must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if days < 1 or days > MAX_FORECAST_DAYS:
+            return Response({'error': f'days must be between 1 and {MAX_FORECAST_DAYS}'}, status=status.HTTP_400_BAD_REQUEST)
+        area = (request.query_params.get('area') or '').strip()
+
+        def compute():
+            loans = Loan.objects.filter(status__in=Loan.OPEN_STATUSES)
+            if area:
+                loans = loans.filter(customer__area__iexact=area)
+            summary = Portfolio.load(loans).forecast_summary(date.today(), days)
+            summary['area'] = area or None
+            return summary
+
+        return Response(cached_for_today(f'forecast:{days}:{quote(area.lower())}', compute))
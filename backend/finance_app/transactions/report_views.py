@@ -1,5 +1,6 @@
 import csv
 import io
+import logging
 from datetime import date
 from decimal import Decimal
 
@@ -10,8 +11,11 @@ from rest_framework.response import Response
 from rest_framework import permissions, status
 
 from .models import Loan, Transaction
-from customers.models import Customer
+from customers.models import Customer, Area, normalize_area
 from expenses.models import Expense
+from finance_app.metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 
 def _get_report_data(request):
@@ -22,15 +26,16 @@ def _get_report_data(request):
     loan_type = request.query_params.get('loan_type')
     report_type = request.query_params.get('report_type', 'summary')
 
-    print(f"Report request: start_date={start_date}, end_date={end_date}, area={area}, loan_type={loan_type}, report_type={report_type}")
+    logger.debug('Report request: start_date=%s, end_date=%s, area=%s, loan_type=%s, report_type=%s',
+                 start_date, end_date, area, loan_type, report_type)
 
     if not start_date or not end_date:
         return None, {'error': 'start_date and end_date are required'}
 
     # Base querysets
-    loans_qs = Loan.objects.filter(created_at__date__gte=start_date, created_at__date__lte=end_date)
-    transactions_qs = Transaction.objects.filter(created_at__date__gte=start_date, created_at__date__lte=end_date)
-    expenses_qs = Expense.objects.filter(created_at__date__gte=start_date, created_at__date__lte=end_date)
+    loans_qs = Loan.objects.filter(posted_on__gte=start_date, posted_on__lte=end_date)
+    transactions_qs = Transaction.objects.filter(posted_on__gte=start_date, posted_on__lte=end_date)
+    expenses_qs = Expense.objects.filter(posted_on__gte=start_date, posted_on__lte=end_date)
 
     # Additional filters
     collected_by = request.query_params.get('collected_by')
@@ -38,8 +43,10 @@ def _get_report_data(request):
 
     # Apply optional filters
     if area:
-        loans_qs = loans_qs.filter(customer__area__iexact=area)
-        transactions_qs = transactions_qs.filter(loan__customer__area__iexact=area)
+        # Match on the normalized Area key (indexed) rather than iexact on free text
+        area_key = normalize_area(area)
+        loans_qs = loans_qs.filter(customer__area_ref__key=area_key)
+        transactions_qs = transactions_qs.filter(loan__customer__area_ref__key=area_key)
     if loan_type:
         loans_qs = loans_qs.filter(loan_type=loan_type)
         transactions_qs = transactions_qs.filter(loan__loan_type=loan_type)
@@ -89,24 +96,24 @@ def _get_report_data(request):
     if report_type == 'area_wise':
         area_data = (
             transactions_qs
-            .values(area_name=F('loan__customer__area'))
+            .values('loan__customer__area_ref', area_name=F('loan__customer__area_ref__name'))
             .annotate(
                 total_collected=Sum('amount'),
                 principal_collected=Sum('asal_amount'),
                 interest_collected=Sum('interest_amount'),
                 transaction_count=Count('id'),
+                # Customers and loans with payments in the range, counted in the same query
+                customer_count=Count('loan__customer', distinct=True),
+                loan_count=Count('loan', distinct=True),
             )
             .order_by('-total_collected')
         )
-        # Count customers and loans per area
         for row in area_data:
             a = row['area_name'] or 'Unknown'
-            cust_count = Customer.objects.filter(area__iexact=a, loans__transactions__created_at__date__gte=start_date, loans__transactions__created_at__date__lte=end_date).distinct().count()
-            loan_count = Loan.objects.filter(customer__area__iexact=a, transactions__created_at__date__gte=start_date, transactions__created_at__date__lte=end_date).distinct().count()
             breakdown.append({
                 'area': a,
-                'customers': cust_count,
-                'loans': loan_count,
+                'customers': row['customer_count'],
+                'loans': row['loan_count'],
                 'total_collected': str(row['total_collected'] or 0),
                 'principal_collected': str(row['principal_collected'] or 0),
                 'interest_collected': str(row['interest_collected'] or 0),
@@ -122,15 +129,15 @@ def _get_report_data(request):
                 principal_collected=Sum('asal_amount'),
                 interest_collected=Sum('interest_amount'),
                 transaction_count=Count('id'),
+                loan_count=Count('loan', distinct=True),
             )
             .order_by('-total_collected')
         )
         for row in loan_data:
             lt = row['type'] or 'Unknown'
-            loan_count = Loan.objects.filter(loan_type=lt, transactions__created_at__date__gte=start_date, transactions__created_at__date__lte=end_date).distinct().count()
             breakdown.append({
                 'loan_type': lt,
-                'loans': loan_count,
+                'loans': row['loan_count'],
                 'total_collected': str(row['total_collected'] or 0),
                 'principal_collected': str(row['principal_collected'] or 0),
                 'interest_collected': str(row['interest_collected'] or 0),
@@ -190,17 +197,17 @@ def _get_report_data(request):
         # DC deduction revenue from loans created in the period
         dc_loans_in_period = Loan.objects.filter(
             loan_type='DC Loan',
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date,
+            posted_on__gte=start_date,
+            posted_on__lte=end_date,
             dc_deduction_amount__gt=0,
         )
         if area:
-            dc_loans_in_period = dc_loans_in_period.filter(customer__area__iexact=area)
+            dc_loans_in_period = dc_loans_in_period.filter(customer__area_ref__key=normalize_area(area))
         dc_deduction_total = dc_loans_in_period.aggregate(total=Sum('dc_deduction_amount'))['total'] or Decimal('0')
 
-    # Get distinct areas for filter dropdown
+    # Areas for the filter dropdown come from the Area registry
     all_areas = list(
-        Customer.objects.values_list('area', flat=True).distinct().order_by('area')
+        Area.objects.filter(customer_count__gt=0).order_by('name').values_list('name', flat=True)
     )
 
     result = {
@@ -615,7 +622,10 @@ class ReportDownloadView(APIView):
                                        textColor=colors.HexColor('#999999'), alignment=TA_CENTER)
         elements.append(Paragraph(f"Generated on {date.today().strftime('%d %b %Y')} ", footer_style))
 
-        doc.build(elements)
+        # Unknown report types render as the summary; keep the label set bounded
+        report_label = report_type if report_type in ('area_wise', 'loan_wise', 'transactions') else 'summary'
+        with metrics.time('finance_pdf_render_seconds', report=report_label):
+            doc.build(elements)
         buffer.seek(0)
 
         response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
@@ -778,7 +788,8 @@ class CustomerReportDownloadView(APIView):
             footer_style
         ))
 
-        doc.build(elements)
+        with metrics.time('finance_pdf_render_seconds', report='customer'):
+            doc.build(elements)
         buffer.seek(0)
 
         # Use customer name in filename (sanitize for filesystem)
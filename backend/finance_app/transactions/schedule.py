@@ -0,0 +1,159 @@
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_UP
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .accrual import monthly_due_dates
+from .models import Loan, LoanScheduleItem
+
+# Monthly loans are open-ended: keep this many days of cycles scheduled ahead
+MONTHLY_SCHEDULE_DAYS = 365
+# Guard against runaway DC schedules from bad data
+MAX_DC_INSTALLMENTS = 1000
+
+
+def _dc_items(loan):
+    """One installment a day after disbursement until the principal is collected"""
+    principal = loan.principal_amount
+    installment = loan.daily_collection_amount
+    days = loan.expected_total_days
+    if not installment and days:
+        installment = (principal / days).quantize(Decimal('0.01'), rounding=ROUND_UP)
+    if not installment or installment <= 0:
+        return []
+    if not days:
+        days = int((principal / installment).to_integral_value(rounding=ROUND_UP))
+    days = min(days, MAX_DC_INSTALLMENTS)
+
+    items = []
+    left = principal
+    for sequence in range(1, days + 1):
+        if left <= 0:
+            break
+        # The last installment collects whatever is left
+        amount = left if sequence == days else min(installment, left)
+        items.append(LoanScheduleItem(
+            loan=loan, sequence=sequence, kind='installment',
+            due_date=loan.start_date + timedelta(days=sequence), amount_due=amount,
+        ))
+        left -= amount
+    return items
+
+
+def _monthly_items(loan, after, through, first_sequence=1):
+    """Interest cycles on interest_cycle_day, after ``after`` up to ``through``"""
+    if not loan.interest_cycle_day or not loan.monthly_interest_rate:
+        return []
+    interest = loan.calculate_monthly_interest()
+    return [
+        LoanScheduleItem(
+            loan=loan, sequence=first_sequence + index, kind='interest',
+            due_date=due, amount_due=interest,
+        )
+        for index, due in enumerate(monthly_due_dates(after, loan.interest_cycle_day, through))
+    ]
+
+
+def _dl_items(loan):
+    """Single maturity item: principal plus interest for max_days"""
+    if not loan.max_days:
+        return []
+    interest = Decimal('0')
+    if loan.daily_interest_rate:
+        interest = loan.principal_amount * (loan.daily_interest_rate / Decimal('100')) * loan.max_days
+    return [LoanScheduleItem(
+        loan=loan, sequence=1, kind='maturity',
+        due_date=loan.start_date + timedelta(days=loan.max_days),
+        amount_due=(loan.principal_amount + interest).quantize(Decimal('0.01')),
+    )]
+
+
+def build_schedule(loan):
+    """Unsaved schedule items for a loan"""
+    if loan.loan_type == 'DC Loan':
+        return _dc_items(loan)
+    if loan.loan_type == 'Monthly Interest Loan':
+        return _monthly_items(loan, loan.start_date, loan.start_date + timedelta(days=MONTHLY_SCHEDULE_DAYS))
+    if loan.loan_type == 'DL Loan':
+        return _dl_items(loan)
+    return []
+
+
+def _payment_amount(loan, txn):
+    """Part of a transaction that pays schedule items (interest only for Monthly loans)"""
+    if loan.loan_type == 'Monthly Interest Loan':
+        return Decimal(str(txn.interest_amount or 0))
+    return Decimal(str(txn.amount or 0))
+
+
+def _allocate(items, amount, paid_on):
+    """Apply amount to items oldest first; returns the items that changed"""
+    changed = []
+    for item in items:
+        if amount <= 0:
+            break
+        outstanding = item.amount_due - item.amount_paid
+        if outstanding <= 0:
+            continue
+        applied = min(outstanding, amount)
+        item.amount_paid += applied
+        amount -= applied
+        if item.amount_paid >= item.amount_due:
+            item.status = 'paid'
+            item.paid_on = paid_on
+        else:
+            item.status = 'partial'
+        changed.append(item)
+    return changed
+
+
+def apply_payment(loan, txn):
+    """Match a newly posted transaction against the loan's unpaid schedule items"""
+    amount = _payment_amount(loan, txn)
+    if amount <= 0:
+        return
+    items = list(loan.schedule_items.exclude(status='paid').order_by('sequence'))
+    changed = _allocate(items, amount, timezone.localdate(txn.created_at))
+    LoanScheduleItem.objects.bulk_update(changed, ['amount_paid', 'status', 'paid_on'])
+
+
+def reconcile_schedule(loan):
+    """Recompute paid amounts from all of the loan's transactions (after an edit or delete)"""
+    items = list(loan.schedule_items.order_by('sequence'))
+    for item in items:
+        item.amount_paid = Decimal('0')
+        item.status = 'pending'
+        item.paid_on = None
+    for txn in loan.transactions.order_by('created_at', 'pk'):
+        _allocate(items, _payment_amount(loan, txn), timezone.localdate(txn.created_at))
+    LoanScheduleItem.objects.bulk_update(items, ['amount_paid', 'status', 'paid_on'], batch_size=500)
+
+
+def generate_schedule(loan):
+    """(Re)build a loan's schedule and re-match any existing payments"""
+    with transaction.atomic():
+        loan.schedule_items.all().delete()
+        LoanScheduleItem.objects.bulk_create(build_schedule(loan))
+        if loan.transactions.exists():
+            reconcile_schedule(loan)
+
+
+def extend_monthly_schedules(through=None):
+    """Append upcoming cycles so open Monthly loans stay scheduled MONTHLY_SCHEDULE_DAYS ahead"""
+    if through is None:
+        through = date.today() + timedelta(days=MONTHLY_SCHEDULE_DAYS)
+    latest = dict(
+        (row['loan'], (row['last_sequence'], row['last_due']))
+        for row in LoanScheduleItem.objects.filter(
+            loan__loan_type='Monthly Interest Loan', loan__status__in=Loan.OPEN_STATUSES,
+        ).values('loan').annotate(last_sequence=Max('sequence'), last_due=Max('due_date'))
+        if row['last_due'] < through
+    )
+    items = []
+    for loan in Loan.objects.filter(pk__in=list(latest)):
+        last_sequence, last_due = latest[loan.pk]
+        items.extend(_monthly_items(loan, last_due, through, first_sequence=last_sequence + 1))
+    LoanScheduleItem.objects.bulk_create(items, batch_size=1000)
+    return len(items)
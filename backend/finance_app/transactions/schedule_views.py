@@ -0,0 +1,98 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Sum, Count, Q, F
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import permissions, status
+
+from .models import LoanScheduleItem
+
+MAX_MISSED_ITEMS = 200
+
+
+class CollectionScheduleView(APIView):
+    """
+    Scheduled vs collected amounts per area, from the precomputed loan schedule.
+    Query params:
+    - start_date / end_date: YYYY-MM-DD due-date range (default month to date)
+    - area, loan_type: optional filters
+    Missed = due before today and not fully paid.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        today = date.today()
+        try:
+            start_date = date.fromisoformat(request.query_params.get('start_date') or today.replace(day=1).isoformat())
+            end_date = date.fromisoformat(request.query_params.get('end_date') or today.isoformat())
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({'error': 'start_date must be on or before end_date'}, status=status.HTTP_400_BAD_REQUEST)
+
+        items = LoanScheduleItem.objects.filter(due_date__gte=start_date, due_date__lte=end_date)
+        area = request.query_params.get('area')
+        loan_type = request.query_params.get('loan_type')
+        if area:
+            items = items.filter(loan__customer__area__iexact=area)
+        if loan_type:
+            items = items.filter(loan__loan_type=loan_type)
+
+        missed = Q(due_date__lt=today) & ~Q(status='paid')
+        by_area = items.values(area=F('loan__customer__area')).annotate(
+            scheduled=Count('id'),
+            total_due=Sum('amount_due'),
+            total_collected=Sum('amount_paid'),
+            missed=Count('id', filter=missed),
+            missed_amount=Sum(F('amount_due') - F('amount_paid'), filter=missed),
+        ).order_by('area')
+
+        areas = []
+        totals = {'amount_due': Decimal('0'), 'amount_collected': Decimal('0'), 'missed': 0}
+        for row in by_area:
+            areas.append({
+                'area': row['area'],
+                'scheduled': row['scheduled'],
+                'amount_due': str(row['total_due']),
+                'amount_collected': str(row['total_collected']),
+                'efficiency': _efficiency(row['total_collected'], row['total_due']),
+                'missed': row['missed'],
+                'missed_amount': str(row['missed_amount'] or Decimal('0')),
+            })
+            totals['amount_due'] += row['total_due']
+            totals['amount_collected'] += row['total_collected']
+            totals['missed'] += row['missed']
+
+        missed_items = items.filter(missed).select_related('loan__customer').order_by('due_date', 'loan_id')
+        return Response({
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'summary': {
+                'amount_due': str(totals['amount_due']),
+                'amount_collected': str(totals['amount_collected']),
+                'efficiency': _efficiency(totals['amount_collected'], totals['amount_due']),
+                'missed': totals['missed'],
+            },
+            'areas': areas,
+            'missed_items': [
+                {
+                    'loan_id': item.loan_id,
+                    'customer_name': item.loan.customer.name,
+                    'area': item.loan.customer.area,
+                    'loan_type': item.loan.loan_type,
+                    'kind': item.kind,
+                    'due_date': item.due_date.isoformat(),
+                    'amount_due': str(item.amount_due),
+                    'amount_paid': str(item.amount_paid),
+                }
+                for item in missed_items[:MAX_MISSED_ITEMS]
+            ],
+        })
+
+
+def _efficiency(collected, due):
+    """Collected as a percentage of due (None when nothing was due)"""
+    if not due:
+        return None
+    return round(float(collected / due * 100), 2)
@@ -0,0 +1,302 @@
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from customers.aggregates import rebuild_customer_aggregates
+from customers.areas import rebuild_area_counters
+from customers.models import Area, Customer
+from expenses.models import Expense
+from users.models import User
+from .accrual import monthly_due_dates
+from .analytics import invalidate_cohort_cache
+from .loan_status import refresh_loan_status
+from .models import DailyCashBook, Loan, LoanScheduleItem, Transaction
+from .schedule import _allocate, _payment_amount, build_schedule, extend_monthly_schedules
+
+AREA_NAMES = ('Anna Nagar', 'Gandhi Road', 'Market Street', 'Railway Colony', 'Bus Stand', 'Temple Street',
+              'Nehru Nagar', 'KK Nagar', 'Old Town', 'Lake View', 'Mill Road', 'Bazaar')
+FIRST_NAMES = ('Arun', 'Bala', 'Chitra', 'Devi', 'Ganesh', 'Kavitha', 'Lakshmi', 'Murugan', 'Priya', 'Ravi',
+               'Selvi', 'Senthil', 'Suresh', 'Vani', 'Vijay')
+LAST_NAMES = ('Kumar', 'Raj', 'Pandian', 'Krishnan', 'Subramani', 'Natarajan', 'Velu', 'Shankar')
+EXPENSE_DESCRIPTIONS = ('Fuel', 'Tea and snacks', 'Stationery', 'Mobile recharge', 'Vehicle repair', 'Office rent')
+
+# (loan type, weight) of new loans
+LOAN_MIX = (('DC Loan', 50), ('Monthly Interest Loan', 30), ('DL Loan', 20))
+# Loans per customer and their weights
+LOANS_PER_CUSTOMER = ((1, 60), (2, 30), (3, 10))
+DC_TERM_DAYS = 100
+CUSTOMERS_PER_AREA = 250
+CENT = Decimal('0.01')
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create write the given created_at/updated_at instead of now()"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+class PortfolioSeeder:
+    """
+    Deterministic synthetic portfolio: customers across areas, a mix of DC, Monthly and DL
+    loans simulated day by day up to today (daily DC collections, partial and missed interest),
+    expenses and a running cash book. Rows are written with bulk_create, so the counters that
+    save() normally maintains are rebuilt at the end.
+    """
+
+    def __init__(self, customers, days, seed=0, collectors=10, batch_size=500, today=None):
+        self.customers = customers
+        self.days = days
+        self.rng = random.Random(seed)
+        self.collector_count = collectors
+        self.batch_size = batch_size
+        self.today = today or date.today()
+        self.first_day = self.today - timedelta(days=days)
+        self.tz = timezone.get_current_timezone()
+        self.cash_in = {}
+        self.cash_out = {}
+        self.counts = {'customers': 0, 'loans': 0, 'transactions': 0, 'schedule_items': 0, 'expenses': 0}
+
+    def _at(self, day, start_hour=8, end_hour=19):
+        moment = time(self.rng.randint(start_hour, end_hour - 1), self.rng.randint(0, 59), self.rng.randint(0, 59))
+        return datetime.combine(day, moment, tzinfo=self.tz)
+
+    def _day(self):
+        return self.first_day + timedelta(days=self.rng.randint(0, self.days))
+
+    def run(self):
+        self.owner = User.objects.filter(role='owner').order_by('pk').first() or User.objects.create_user(
+            username='owner', password='owner', role='owner'
+        )
+        self.collectors = [
+            User.objects.get_or_create(username=f'collector{number}', defaults={'role': 'employee'})[0]
+            for number in range(1, self.collector_count + 1)
+        ]
+        # Area names repeat with a number once the list runs out ("Anna Nagar 2")
+        area_count = max(len(AREA_NAMES) // 2, -(-self.customers // CUSTOMERS_PER_AREA))
+        self.areas = []
+        for index in range(area_count):
+            round_number, name = divmod(index, len(AREA_NAMES))
+            self.areas.append(Area.resolve(AREA_NAMES[name] + (f' {round_number + 1}' if round_number else '')))
+
+        with explicit_timestamps(Customer, Loan, Transaction, Expense, DailyCashBook):
+            for offset in range(0, self.customers, self.batch_size):
+                with transaction.atomic():
+                    self._seed_batch(offset, min(self.batch_size, self.customers - offset))
+            with transaction.atomic():
+                self._seed_expenses()
+                self._seed_cashbook()
+
+        extend_monthly_schedules()
+        refresh_loan_status(self.today)
+        rebuild_customer_aggregates()
+        rebuild_area_counters()
+        # bulk_create wrote past months that workers may have cached
+        invalidate_cohort_cache()
+        return self.counts
+
+    def _seed_batch(self, offset, size):
+        customers, loans, transactions, items = [], [], [], []
+        for number in range(offset, offset + size):
+            area_index = self.rng.randrange(len(self.areas))
+            area = self.areas[area_index]
+            collector = self.collectors[area_index % len(self.collectors)]
+            starts = sorted(self._day() for _ in range(_weighted(self.rng, LOANS_PER_CUSTOMER)))
+            joined = self._at(max(starts[0] - timedelta(days=self.rng.randint(0, 30)), self.first_day))
+            customer = Customer(
+                name=f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}',
+                phone_number=f'9{number:09d}', address=f'{self.rng.randint(1, 200)}, {area.name}',
+                area=area.name, area_ref=area, created_by=collector, created_at=joined, updated_at=joined,
+            )
+            customers.append(customer)
+            for start in starts:
+                loan, loan_transactions, loan_items = self._loan(customer, collector, start)
+                setattr(customer, {'DC Loan': 'is_daily', 'Monthly Interest Loan': 'is_monthly',
+                                   'DL Loan': 'is_dl'}[loan.loan_type], True)
+                loans.append(loan)
+                transactions.extend(loan_transactions)
+                items.extend(loan_items)
+
+        Customer.objects.bulk_create(customers, batch_size=1000)
+        Loan.objects.bulk_create(loans, batch_size=1000)
+        Transaction.objects.bulk_create(transactions, batch_size=5000)
+        LoanScheduleItem.objects.bulk_create(items, batch_size=5000)
+        self.counts['customers'] += len(customers)
+        self.counts['loans'] += len(loans)
+        self.counts['transactions'] += len(transactions)
+        self.counts['schedule_items'] += len(items)
+
+    def _loan(self, customer, collector, start):
+        """A loan disbursed on start with its payments up to today and its matched schedule"""
+        loan_type = _weighted(self.rng, LOAN_MIX)
+        created_at = self._at(start)
+        loan = Loan(
+            customer=customer, loan_type=loan_type, start_date=start, status='active',
+            payment_method='cash' if self.rng.random() < 0.8 else 'online',
+            created_by=collector, created_at=created_at, updated_at=created_at, pending_interest=Decimal('0'),
+        )
+        if loan_type == 'DC Loan':
+            principal = Decimal(self.rng.randrange(5000, 50001, 1000))
+            loan.daily_collection_amount = principal / DC_TERM_DAYS
+            loan.expected_total_days = DC_TERM_DAYS
+            # Advance interest: 150 per 1000
+            loan.dc_deduction_amount = principal * Decimal('0.15')
+        elif loan_type == 'Monthly Interest Loan':
+            principal = Decimal(self.rng.randrange(10000, 200001, 5000))
+            loan.monthly_interest_rate = self.rng.choice((Decimal('1.50'), Decimal('2.00'), Decimal('2.50'), Decimal('3.00')))
+            loan.interest_cycle_day = min(start.day, 28)
+        else:
+            principal = Decimal(self.rng.randrange(5000, 100001, 5000))
+            loan.daily_interest_rate = self.rng.choice((Decimal('0.10'), Decimal('0.20'), Decimal('0.30'), Decimal('0.50')))
+            loan.max_days = self.rng.choice((30, 60, 90, 100))
+        loan.principal_amount = loan.remaining_amount = principal
+        if loan.payment_method == 'cash':
+            self.cash_out[start] = self.cash_out.get(start, Decimal('0')) + principal
+
+        # Schedule as generated on creation, then matched against each simulated payment
+        items = build_schedule(loan)
+        payments = {
+            'DC Loan': self._dc_payments,
+            'Monthly Interest Loan': self._monthly_payments,
+            'DL Loan': self._dl_payments,
+        }[loan_type](loan)
+
+        transactions = []
+        cursor = 0
+        for day, asal, interest in payments:
+            amount = asal + interest
+            if amount <= 0:
+                continue
+            txn = Transaction(
+                loan=loan, amount=amount, asal_amount=asal, interest_amount=interest,
+                payment_method='cash' if self.rng.random() < 0.75 else 'online',
+                created_by=collector, created_at=self._at(day),
+            )
+            transactions.append(txn)
+            if txn.payment_method == 'cash':
+                self.cash_in[day] = self.cash_in.get(day, Decimal('0')) + amount
+            _allocate(items[cursor:], _payment_amount(loan, txn), day)
+            while cursor < len(items) and items[cursor].status == 'paid':
+                cursor += 1
+
+        if loan.remaining_amount <= 0:
+            loan.remaining_amount = Decimal('0')
+            loan.status = 'settled'
+        loan.transaction_count = len(transactions)
+        loan.total_asal_paid = sum((txn.asal_amount for txn in transactions), Decimal('0'))
+        loan.total_interest_paid = sum((txn.interest_amount for txn in transactions), Decimal('0'))
+        loan.last_payment_at = transactions[-1].created_at if transactions else None
+        return loan, transactions, items
+
+    def _dc_payments(self, loan):
+        """Daily collections (most days, sometimes a double to catch up) until the principal is in"""
+        payments = []
+        day = loan.start_date + timedelta(days=1)
+        while day <= self.today and loan.remaining_amount > 0:
+            chance = self.rng.random()
+            if chance < 0.85:
+                due = loan.daily_collection_amount * (2 if chance < 0.05 else 1)
+                asal = min(due, loan.remaining_amount)
+                loan.remaining_amount -= asal
+                payments.append((day, asal, Decimal('0')))
+            day += timedelta(days=1)
+        return payments
+
+    def _monthly_payments(self, loan):
+        """One payment per cycle: usually full interest, sometimes partial or missed, now and then principal"""
+        payments = []
+        for due in monthly_due_dates(loan.start_date, loan.interest_cycle_day, self.today):
+            day = due + timedelta(days=self.rng.randint(0, 5))
+            chance = self.rng.random()
+            if day > self.today or chance < 0.1:
+                continue
+            asal = Decimal('0')
+            if self.rng.random() < 0.1:
+                asal = min(loan.remaining_amount, Decimal(self.rng.randrange(5000, 50001, 5000)))
+            # Same order as Transaction.save: principal first, then interest on the reduced balance
+            loan.remaining_amount -= asal
+            expected = loan.calculate_monthly_interest() + loan.pending_interest
+            interest = expected if chance < 0.8 else (expected / 2).quantize(CENT)
+            loan.pending_interest = expected - interest
+            payments.append((day, asal, interest))
+            if loan.remaining_amount <= 0:
+                break
+        return payments
+
+    def _dl_payments(self, loan):
+        """Interest every week or two, part principal now and then, usually closed after max_days"""
+        payments = []
+        day = loan.start_date
+        while loan.remaining_amount > 0:
+            day += timedelta(days=self.rng.randint(5, 15))
+            if day > self.today:
+                break
+            asal = Decimal('0')
+            if (day - loan.start_date).days >= loan.max_days and self.rng.random() < 0.6:
+                asal = loan.remaining_amount
+            elif self.rng.random() < 0.3:
+                asal = (loan.remaining_amount * Decimal(self.rng.choice((10, 20, 30))) / 100).quantize(CENT)
+            loan.remaining_amount -= asal
+            owed, _ = loan.calculate_dl_interest(day)
+            expected = owed + loan.pending_interest
+            interest = expected if self.rng.random() < 0.7 else (expected / 2).quantize(CENT)
+            loan.pending_interest = expected - interest
+            if loan.pending_interest <= 0:
+                loan.last_interest_payment_date = day
+            loan.interest_accrued_until = day
+            payments.append((day, asal, interest))
+        return payments
+
+    def _seed_expenses(self):
+        expenses = []
+        day = self.first_day
+        while day <= self.today:
+            for _ in range(self.rng.randint(0, 3)):
+                created_at = self._at(day)
+                amount = Decimal(self.rng.randrange(100, 2001, 50))
+                expenses.append(Expense(
+                    description=self.rng.choice(EXPENSE_DESCRIPTIONS), amount=amount,
+                    created_by=self.owner, created_at=created_at,
+                ))
+                self.cash_out[day] = self.cash_out.get(day, Decimal('0')) + amount
+            day += timedelta(days=1)
+        Expense.objects.bulk_create(expenses, batch_size=5000)
+        self.counts['expenses'] = len(expenses)
+
+    def _seed_cashbook(self):
+        """Opening/closing balance per day; opening capital is set so cash in hand never goes negative"""
+        days = [self.first_day + timedelta(days=offset) for offset in range(self.days + 1)]
+        balance, lowest = Decimal('0'), Decimal('0')
+        for day in days:
+            balance += self.cash_in.get(day, Decimal('0')) - self.cash_out.get(day, Decimal('0'))
+            lowest = min(lowest, balance)
+        balance = -lowest + Decimal('100000')
+        entries = []
+        for day in days:
+            opening = balance
+            balance += self.cash_in.get(day, Decimal('0')) - self.cash_out.get(day, Decimal('0'))
+            stamp = self._at(day, 20, 22)
+            entries.append(DailyCashBook(
+                date=day, opening_balance=opening, closing_balance=balance,
+                created_by=self.owner, created_at=stamp, updated_at=stamp,
+            ))
+        DailyCashBook.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
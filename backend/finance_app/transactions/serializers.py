@@ -32,12 +32,15 @@ class LoanSerializer(serializers.ModelSerializer):
                  'payment_method',
                  # Calculated fields
                  'expected_interest', 'total_pending_interest', 'days_since_start', 'has_transactions',
-                 'amount_given_to_customer']
-        read_only_fields = ['remaining_amount', 'pending_interest', 'start_date', 'status', 'created_by', 'created_at', 'updated_at']
+                 'amount_given_to_customer',
+                 # Payment counters
+                 'transaction_count', 'total_asal_paid', 'total_interest_paid', 'last_payment_at']
+        read_only_fields = ['remaining_amount', 'pending_interest', 'start_date', 'status', 'created_by', 'created_at', 'updated_at',
+                            'transaction_count', 'total_asal_paid', 'total_interest_paid', 'last_payment_at']
     
     def get_has_transactions(self, obj):
-        """Check if loan has any transactions"""
-        return obj.transactions.exists()
+        """Check if loan has any transactions (from the maintained counter, no query)"""
+        return obj.transaction_count > 0
     
     def get_amount_given_to_customer(self, obj):
         """Amount given to customer after DC deduction"""
@@ -47,6 +50,9 @@ class LoanSerializer(serializers.ModelSerializer):
     
     def get_expected_interest(self, obj):
         """Get current cycle's expected interest"""
+        # Prefer the database annotation from Loan.objects.with_interest()
+        if getattr(obj, 'expected_interest', None) is not None:
+            return str(obj.expected_interest.quantize(Decimal('0.01')))
         result = '0.00'
         if obj.loan_type == 'Monthly Interest Loan':
             result = str(obj.calculate_monthly_interest())
@@ -57,6 +63,8 @@ class LoanSerializer(serializers.ModelSerializer):
     
     def get_total_pending_interest(self, obj):
         """Get total pending interest including past unpaid"""
+        if getattr(obj, 'total_pending_interest', None) is not None:
+            return str(obj.total_pending_interest.quantize(Decimal('0.01')))
         return str(obj.get_total_pending_interest())
     
     def get_days_since_start(self, obj):
@@ -177,6 +185,10 @@ class TransactionSerializer(serializers.ModelSerializer):
             data['amount'] = asal + interest
         elif not amount and not asal and not interest:
             raise serializers.ValidationError("Either 'amount' or 'asal_amount'/'interest_amount' is required")
+        # Transaction.save reverses and reapplies edits on the payment's own loan only
+        if self.instance is not None and 'loan' in data and data['loan'].pk != self.instance.loan_id:
+            raise serializers.ValidationError({'loan': 'A payment cannot be moved to another loan; '
+                                                       'delete it and post it again.'})
         
         return data
     
@@ -184,24 +196,4 @@ class TransactionSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         validated_data['created_by'] = user
         return super().create(validated_data)
-    
-    def update(self, instance, validated_data):
-        # When updating a transaction, we need to adjust the loan balance
-        old_asal = instance.asal_amount or instance.amount or 0
-        new_asal = validated_data.get('asal_amount', instance.asal_amount)
-        if new_asal is None:
-            new_asal = validated_data.get('amount', instance.amount) or 0
-        
-        # Calculate the difference and adjust loan balance
-        difference = new_asal - old_asal
-        if difference != 0:
-            loan = instance.loan
-            loan.remaining_amount -= difference
-            if loan.remaining_amount <= 0:
-                loan.status = 'settled'
-            elif loan.status == 'settled':
-                loan.status = 'active'
-            loan.save()
-        
-        return super().update(instance, validated_data)
 
@@ -1,3 +1,489 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from itertools import count
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from customers.models import Customer
+from users.models import User
+from .analytics import COHORT_CACHE, cohort_curves
+from .models import CacheVersion, InterestAccrual, Loan, Transaction
+from .counters import verify_loan_counters
+from .loan_status import refresh_loan_status
+from .portfolio import Portfolio, to_rupees
+from .schedule import reconcile_schedule
+from .seeding import PortfolioSeeder
+
+
+# Customer phone numbers, so no two test customers share one
+PHONE_NUMBERS = count(9000000000)
+
+# (loan_type, amount, terms) that Portfolio and Loan.objects.with_interest() must price like the Loan methods
+INTEREST_CASES = [
+    # Half-way cases: 1.00 x 0.50% = 0.005 rounds to 0.00, 3.00 x 0.50% = 0.015 to 0.02
+    ('Monthly Interest Loan', '1.00', {'monthly_interest_rate': Decimal('0.50'), 'interest_cycle_day': 5}),
+    ('Monthly Interest Loan', '3.00', {'monthly_interest_rate': Decimal('0.50'), 'interest_cycle_day': 5}),
+    ('Monthly Interest Loan', '10000.00', {'monthly_interest_rate': Decimal('2.00'), 'interest_cycle_day': 5}),
+    ('Monthly Interest Loan', '12345.67', {'monthly_interest_rate': Decimal('1.75'), 'interest_cycle_day': 31}),
+    ('DL Loan', '0.02', {'daily_interest_rate': Decimal('0.25')}),
+    ('DL Loan', '1.00', {'daily_interest_rate': Decimal('0.50')}),
+    ('DL Loan', '98765.43', {'daily_interest_rate': Decimal('1.10')}),
+    ('DL Loan', '5000.00', {'daily_interest_rate': Decimal('0.50'), 'last_interest_payment_date': date(2026, 9, 1)}),
+    ('DL Loan', '7777.77', {'daily_interest_rate': Decimal('1.00'), 'interest_accrued_until': date(2026, 10, 1)}),
+    ('DC Loan', '1000.00', {'daily_collection_amount': Decimal('100'), 'expected_total_days': 10}),
+]
+
+
+def create_customer(name, area, owner=None, loans=(), **loan_fields):
+    """
+    A customer with a phone number of its own and a loan per (loan_type, amount, terms)
+    in loans, each also given loan_fields. The owner user is created unless given.
+    """
+    if owner is None:
+        owner = User.objects.create_user(username='owner', password='x', role='owner')
+    customer = Customer.objects.create(
+        name=name, phone_number=str(next(PHONE_NUMBERS)), address='-', area=area, created_by=owner
+    )
+    for loan_type, amount, terms in loans:
+        Loan.objects.create(
+            customer=customer, loan_type=loan_type, principal_amount=Decimal(amount),
+            remaining_amount=Decimal(amount), created_by=owner, **loan_fields, **terms
+        )
+    return customer
+
+
+class PortfolioParityTests(TestCase):
+    """The vectorized engine must agree with the Loan model methods to the paisa."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_customer('Parity', 'North', loans=INTEREST_CASES, start_date=date(2026, 8, 15),
+                        pending_interest=Decimal('12.34'))
+
+    def test_interest_matches_model_methods(self):
+        portfolio = Portfolio.load(Loan.objects.all())
+        loans = Loan.objects.in_bulk()
+        loans = [loans[int(pk)] for pk in portfolio.ids]
+        as_of_dates = [date(2026, 8, 1), date(2026, 8, 15), date(2026, 10, 19), date(2027, 3, 31)]
+        monthly = portfolio.monthly_interest()
+        dl = portfolio.dl_interest(as_of_dates)
+
+        for index, loan in enumerate(loans):
+            self.assertEqual(to_rupees(monthly[index]), loan.calculate_monthly_interest())
+            for date_index, as_of in enumerate(as_of_dates):
+                expected, _ = loan.calculate_dl_interest(as_of)
+                self.assertEqual(to_rupees(dl[date_index][index]), expected, (loan.pk, as_of))
+
+    def test_total_pending_matches_today(self):
+        portfolio = Portfolio.load(Loan.objects.all())
+        loans = Loan.objects.in_bulk()
+        loans = [loans[int(pk)] for pk in portfolio.ids]
+        totals = portfolio.total_pending_interest([date.today()])[0]
+        for index, loan in enumerate(loans):
+            self.assertEqual(to_rupees(totals[index]), loan.get_total_pending_interest())
+
+    def test_rate_override_only_touches_that_loan_type(self):
+        portfolio = Portfolio.load(Loan.objects.all())
+        as_of = [date.today() + timedelta(days=30)]
+        base = portfolio.project(as_of)[0]
+        what_if = portfolio.project(as_of, daily_rate='1.2')[0]
+        by_type = lambda projection: {row['loan_type']: row for row in projection['by_loan_type']}
+        self.assertEqual(by_type(base)['Monthly Interest Loan'], by_type(what_if)['Monthly Interest Loan'])
+        self.assertNotEqual(by_type(base)['DL Loan'], by_type(what_if)['DL Loan'])
+
+
+class CashFlowForecastTests(TestCase):
+    """The forecast endpoint expects each loan type's inflow on the right day."""
+
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        cls.today = today
+        north = create_customer('N', 'North', loans=[
+            # 100 a day from tomorrow until the 1000 are collected
+            ('DC Loan', '1000', {'start_date': today, 'daily_collection_amount': Decimal('100'),
+                                 'expected_total_days': 10}),
+            # 2% of 10000 on the cycle day five days from now
+            ('Monthly Interest Loan', '10000', {'start_date': today - timedelta(days=40),
+                                                'monthly_interest_rate': Decimal('2.00'),
+                                                'interest_cycle_day': (today + timedelta(days=5)).day}),
+        ])
+        cls.user = north.created_by
+        # Balance plus 20 days at 0.5% on maturity, ten days from now
+        create_customer('S', 'South', owner=cls.user, loans=[
+            ('DL Loan', '1000', {'start_date': today - timedelta(days=10), 'daily_interest_rate': Decimal('0.50'),
+                                 'max_days': 20}),
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _forecast(self, **params):
+        response = self.client.get('/api/transactions/forecast/', {'days': 15, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_inflows_by_type_day_and_area(self):
+        forecast = self._forecast()
+        self.assertEqual(forecast['total'], '2300.00')
+        self.assertEqual(forecast['by_loan_type'],
+                         {'DC Loan': '1000.00', 'Monthly Interest Loan': '200.00', 'DL Loan': '1100.00'})
+        daily = [day['total'] for day in forecast['daily']]
+        self.assertEqual(daily[0], '0.00')
+        self.assertEqual(daily[5], '300.00')  # DC installment + Monthly interest
+        self.assertEqual(daily[10], '1200.00')  # last DC installment + DL payoff
+        self.assertEqual(daily[11:], ['0.00'] * 4)
+        self.assertEqual({area['area']: area['total'] for area in forecast['areas']},
+                         {'North': '1200.00', 'South': '1100.00'})
+
+    def test_area_filter_and_validation(self):
+        self.assertEqual(self._forecast(area='south')['total'], '1100.00')
+        for days in ('0', '181', 'x'):
+            response = self.client.get('/api/transactions/forecast/', {'days': days})
+            self.assertEqual(response.status_code, 400, days)
+
+
+class LoanInterestExpressionTests(TestCase):
+    """Loan.objects.with_interest() must agree with the Loan model methods to the paisa."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_customer('Expr', 'East', loans=INTEREST_CASES, start_date=date(2026, 8, 15),
+                                   pending_interest=Decimal('12.34')).created_by
+
+    def test_annotations_match_model_methods(self):
+        for as_of in [date(2026, 8, 1), date(2026, 8, 16), date(2026, 10, 19), date(2027, 3, 31)]:
+            for loan in Loan.objects.with_interest(as_of=as_of):
+                if loan.loan_type == 'DL Loan':
+                    expected, _ = loan.calculate_dl_interest(as_of)
+                else:
+                    expected = loan.calculate_monthly_interest()
+                self.assertEqual(loan.expected_interest, expected, (loan.pk, as_of))
+                self.assertEqual(loan.total_pending_interest, loan.pending_interest + expected, (loan.pk, as_of))
+
+    def test_total_pending_matches_today(self):
+        for loan in Loan.objects.with_interest():
+            self.assertEqual(loan.total_pending_interest, loan.get_total_pending_interest(), loan.pk)
+
+    def test_order_and_filter_by_pending_interest(self):
+        loans = list(Loan.objects.all())
+        ranked = sorted(loans, key=lambda loan: (-loan.get_total_pending_interest(), loan.pk))
+        ordered = Loan.objects.with_interest().order_by('-total_pending_interest', 'pk')
+        self.assertEqual([loan.pk for loan in ordered], [loan.pk for loan in ranked])
+
+        over = Loan.objects.with_interest().filter(total_pending_interest__gt=Decimal('100'))
+        self.assertEqual(
+            set(over.values_list('pk', flat=True)),
+            {loan.pk for loan in loans if loan.get_total_pending_interest() > Decimal('100')},
+        )
+
+    def test_update_returns_interest_on_the_new_principal(self):
+        loan = Loan.objects.get(loan_type='Monthly Interest Loan', principal_amount=Decimal('12345.67'))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.patch(f'/api/transactions/loans/{loan.pk}/', {'principal_amount': '20000.00'}, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        loan.refresh_from_db()
+        self.assertEqual(loan.remaining_amount, Decimal('20000.00'))
+        self.assertEqual(response.data['expected_interest'], str(loan.calculate_monthly_interest()))
+        self.assertEqual(response.data['total_pending_interest'], str(loan.get_total_pending_interest()))
+
+
+class LoanScheduleTests(TestCase):
+    """Schedules are generated on loan creation and kept in step with payments."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = create_customer('Schedule', 'South')
+        cls.user = cls.customer.created_by
+
+    def _dc_loan(self):
+        return Loan.objects.create(
+            customer=self.customer, loan_type='DC Loan', principal_amount=Decimal('1050'),
+            remaining_amount=Decimal('1050'), start_date=date(2026, 9, 1),
+            daily_collection_amount=Decimal('100'), expected_total_days=10, created_by=self.user
+        )
+
+    def test_dc_schedule_collects_principal(self):
+        loan = self._dc_loan()
+        items = list(loan.schedule_items.all())
+        self.assertEqual(len(items), 10)
+        self.assertEqual(items[0].due_date, date(2026, 9, 2))
+        self.assertEqual(items[-1].amount_due, Decimal('150.00'))
+        self.assertEqual(sum(item.amount_due for item in items), loan.principal_amount)
+
+    def test_payments_fill_items_in_order_and_reconcile_on_delete(self):
+        loan = self._dc_loan()
+        txn = Transaction.objects.create(loan=loan, amount=Decimal('250'), payment_method='cash', created_by=self.user)
+        statuses = list(loan.schedule_items.values_list('status', flat=True)[:4])
+        self.assertEqual(statuses, ['paid', 'paid', 'partial', 'pending'])
+
+        txn.delete()
+        reconcile_schedule(loan)
+        self.assertFalse(loan.schedule_items.exclude(status='pending').exists())
+
+
+class TransactionBookkeepingTests(TestCase):
+    """Posting, editing and deleting a payment updates the loan in one database transaction."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = create_customer('Ledger', 'Central')
+        cls.user = cls.customer.created_by
+
+    def setUp(self):
+        self.loan = Loan.objects.create(
+            customer=self.customer, loan_type='DC Loan', principal_amount=Decimal('1000'),
+            remaining_amount=Decimal('1000'), daily_collection_amount=Decimal('100'), created_by=self.user
+        )
+
+    def _pay(self):
+        return Transaction.objects.create(loan=self.loan, amount=Decimal('120'), asal_amount=Decimal('100'),
+                                          interest_amount=Decimal('20'), created_by=self.user)
+
+    def test_orm_edits_and_deletes_keep_the_loan_in_step(self):
+        txn = self._pay()
+        txn.asal_amount, txn.amount = Decimal('300'), Decimal('320')
+        txn.save()
+        self.loan.refresh_from_db()
+        self.assertEqual((self.loan.remaining_amount, self.loan.total_asal_paid), (Decimal('700'), Decimal('300')))
+        self.assertEqual(verify_loan_counters(), [])
+
+        Transaction.objects.filter(pk=txn.pk).delete()
+        self.loan.refresh_from_db()
+        self.assertEqual((self.loan.remaining_amount, self.loan.transaction_count), (Decimal('1000'), 0))
+        self.assertEqual(verify_loan_counters(), [])
+        self.assertIsNone(Customer.objects.get(pk=self.customer.pk).last_payment_date)
+
+    def test_failed_bookkeeping_rolls_back_the_payment(self):
+        with mock.patch.object(Customer, 'record_payment', side_effect=DatabaseError('table is locked')):
+            with self.assertRaises(DatabaseError):
+                self._pay()
+        self.loan.refresh_from_db()
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual((self.loan.remaining_amount, self.loan.transaction_count), (Decimal('1000'), 0))
+        self.assertFalse(self.loan.schedule_items.exclude(status='pending').exists())
+
+
+class CohortCacheTests(TestCase):
+    """Edits to closed months bump the version every worker's cohort cache key includes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        customer = create_customer('Cohort', 'West', loans=[
+            ('DC Loan', '1000', {'daily_collection_amount': Decimal('100')}),
+        ])
+        cls.user = customer.created_by
+        cls.loan = customer.loans.get()
+        txn = Transaction.objects.create(loan=cls.loan, amount=Decimal('100'), asal_amount=Decimal('100'),
+                                         created_by=cls.user)
+        # Move both into a closed month, which cohort_curves caches
+        last_month = timezone.now() - timedelta(days=40)
+        Loan.objects.filter(pk=cls.loan.pk).update(created_at=last_month)
+        Transaction.objects.filter(pk=txn.pk).update(created_at=last_month)
+        cls.txn_id = txn.pk
+
+    def setUp(self):
+        cache.clear()
+
+    def _recovered(self):
+        return Decimal(cohort_curves()[0]['curve'][-1]['recovered'])
+
+    def test_closed_month_edits_retire_the_cached_curves(self):
+        self.assertEqual(self._recovered(), Decimal('100'))
+        version = CacheVersion.current(COHORT_CACHE)
+
+        # This month's payments are never cached, so posting one leaves the version alone
+        Transaction.objects.create(loan=self.loan, amount=Decimal('50'), asal_amount=Decimal('50'),
+                                   created_by=self.user)
+        self.assertEqual(CacheVersion.current(COHORT_CACHE), version)
+        self.assertEqual(self._recovered(), Decimal('150'))
+
+        txn = Transaction.objects.get(pk=self.txn_id)
+        txn.asal_amount, txn.amount = Decimal('300'), Decimal('300')
+        txn.save()
+        self.assertEqual(CacheVersion.current(COHORT_CACHE), version + 1)
+        self.assertEqual(self._recovered(), Decimal('350'))
+
+        Transaction.objects.filter(pk=self.txn_id).delete()
+        self.assertEqual(CacheVersion.current(COHORT_CACHE), version + 2)
+        self.assertEqual(self._recovered(), Decimal('50'))
+
+
+class LoanStatusTests(TestCase):
+    """refresh_loan_status stamps the day each loan became overdue, not the day it ran."""
+
+    def test_overdue_since_follows_the_loan_terms(self):
+        customer = create_customer('Late', 'East', loans=[
+            ('DC Loan', '1000', {'start_date': date(2026, 10, 1), 'expected_total_days': 10,
+                                 'daily_collection_amount': Decimal('100')}),
+            ('DL Loan', '1000', {'start_date': date(2026, 9, 1), 'max_days': 30,
+                                 'daily_interest_rate': Decimal('0.50')}),
+            ('Monthly Interest Loan', '1000', {'start_date': date(2026, 8, 1), 'interest_cycle_day': 5,
+                                               'monthly_interest_rate': Decimal('2.00')}),
+        ])
+        dc, dl, monthly = customer.loans.order_by('pk')
+        expected = {dc.pk: date(2026, 10, 12), dl.pk: date(2026, 10, 2), monthly.pk: date(2026, 10, 6)}
+
+        # A late first run and a second run both keep the original dates
+        self.assertEqual(refresh_loan_status(date(2026, 10, 19))['flagged'], 3)
+        self.assertEqual(refresh_loan_status(date(2026, 10, 25))['flagged'], 0)
+        self.assertEqual(dict(Loan.objects.values_list('pk', 'overdue_since')), expected)
+
+        # Before November's cycle day the Monthly loan is not overdue
+        self.assertEqual(refresh_loan_status(date(2026, 11, 3))['cleared'], 1)
+        self.assertEqual(Loan.objects.get(pk=monthly.pk).overdue_since, None)
+
+
+class AccrueInterestTests(TestCase):
+    """The nightly accrual moves each missed cycle into pending_interest exactly once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        customer = create_customer('Accrual', 'West', start_date=date(2026, 8, 15), loans=[
+            ('Monthly Interest Loan', '1000', {'monthly_interest_rate': Decimal('2.00'), 'interest_cycle_day': 5}),
+            ('DL Loan', '1000', {'daily_interest_rate': Decimal('0.50')}),
+        ])
+        cls.monthly, cls.dl = customer.loans.order_by('pk')
+
+    def _run(self, day):
+        call_command('accrue_interest', date=day.isoformat(), stdout=StringIO())
+        self.monthly.refresh_from_db()
+        self.dl.refresh_from_db()
+
+    def test_runs_twice_across_a_cycle_boundary(self):
+        # The day before the second due date: the 5 Sep cycle is still the open one
+        self._run(date(2026, 10, 4))
+        self.assertEqual(self.monthly.pending_interest, Decimal('0'))
+        self.assertEqual(self.dl.pending_interest, Decimal('250.00'))  # 50 days x 5.00
+        self.assertEqual(self.monthly.interest_accrued_until, date(2026, 10, 4))
+
+        # On 5 Oct the 5 Sep cycle is missed; running the same day again changes nothing
+        for _ in range(2):
+            self._run(date(2026, 10, 5))
+            self.assertEqual(self.monthly.pending_interest, Decimal('20.00'))
+            self.assertEqual(self.dl.pending_interest, Decimal('255.00'))
+            self.assertEqual(self.monthly.interest_accrued_until, date(2026, 10, 5))
+            self.assertEqual(self.dl.interest_accrued_until, date(2026, 10, 5))
+
+        self._run(date(2026, 11, 5))
+        self.assertEqual(self.monthly.pending_interest, Decimal('40.00'))
+        self.assertEqual(self.dl.pending_interest, Decimal('410.00'))  # + 31 days x 5.00
+        self.assertEqual(
+            list(self.monthly.interest_accruals.order_by('period_end').values_list('period_end', 'amount')),
+            [(date(2026, 9, 5), Decimal('20.00')), (date(2026, 10, 5), Decimal('20.00'))],
+        )
+        self.assertEqual(
+            list(self.dl.interest_accruals.order_by('period_end').values_list('period_start', 'period_end', 'days')),
+            [(date(2026, 8, 15), date(2026, 10, 4), 50), (date(2026, 10, 4), date(2026, 10, 5), 1),
+             (date(2026, 10, 5), date(2026, 11, 5), 31)],
+        )
+        self.assertEqual(InterestAccrual.objects.count(), 5)
+
+
+def seed_batch(owner, index):
+    """One customer per loan type with a payment on each loan; each batch gets its own area and collector."""
+    collector = User.objects.create_user(username=f'collector{index}', password='x', role='employee')
+    for number, (loan_type, extra) in enumerate([
+        ('DC Loan', {'daily_collection_amount': Decimal('100'), 'expected_total_days': 10,
+                     'dc_deduction_amount': Decimal('150')}),
+        ('DL Loan', {'daily_interest_rate': Decimal('0.50')}),
+        # Due today, so the dashboard's interest-due list is exercised whatever the date
+        ('Monthly Interest Loan', {'monthly_interest_rate': Decimal('2.00'), 'interest_cycle_day': date.today().day}),
+    ]):
+        customer = create_customer(f'Customer {index}-{number}', f'Area {index}', owner=collector)
+        loan = Loan.objects.create(
+            customer=customer, loan_type=loan_type, principal_amount=Decimal('1000'),
+            remaining_amount=Decimal('1000'), payment_method='cash', created_by=owner, **extra
+        )
+        for method in ('cash', 'online'):
+            Transaction.objects.create(
+                loan=loan, amount=Decimal('120'), asal_amount=Decimal('100'), interest_amount=Decimal('20'),
+                payment_method=method, created_by=collector
+            )
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Each endpoint stays within its query budget, and the count does not grow when
+    the data grows ten-fold (no N+1).
+    """
+    SMALL, LARGE = 2, 20
+    RANGE = {'start_date': '2000-01-01', 'end_date': '2100-01-01'}
+    # (label, role, path, params, max queries)
+    ENDPOINTS = [
+        ('loans', 'owner', '/api/transactions/loans/', {}, 1),
+        ('loans-open', 'owner', '/api/transactions/loans/', {'status': 'active,overdue'}, 1),
+        ('transactions', 'owner', '/api/transactions/transactions/', RANGE, 1),
+        ('transactions-employee', 'employee', '/api/transactions/transactions/', {}, 1),
+        ('customers', 'owner', '/api/customers/', {'all': 'true'}, 2),
+        ('customers-no-loans', 'owner', '/api/customers/', {'all': 'true', 'include_loans': 'false'}, 1),
+        ('dashboard-stats', 'owner', '/api/transactions/dashboard-stats/', {}, 8),
+        ('daily-cashbook', 'owner', '/api/transactions/daily-cashbook/', {}, 17),
+        ('revenue-report', 'owner', '/api/transactions/revenue-report/', {'range': 'month'}, 8),
+        ('payment-analytics', 'owner', '/api/transactions/payment-analytics/', {}, 10),
+        ('reports', 'owner', '/api/transactions/reports/', RANGE, 5),
+        ('reports-area-wise', 'owner', '/api/transactions/reports/', {**RANGE, 'report_type': 'area_wise'}, 6),
+        ('reports-loan-wise', 'owner', '/api/transactions/reports/', {**RANGE, 'report_type': 'loan_wise'}, 6),
+        ('reports-transactions', 'owner', '/api/transactions/reports/',
+         {**RANGE, 'report_type': 'transactions', 'area': 'Area 0'}, 8),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', password='x', role='owner')
+        for index in range(cls.SMALL):
+            seed_batch(cls.owner, index)
+
+    def _query_counts(self):
+        """Query count per endpoint; each request is rolled back so get_or_create side effects don't leak."""
+        users = {'owner': self.owner, 'employee': User.objects.get(username='collector0')}
+        counts = {}
+        for label, role, path, params, _ in self.ENDPOINTS:
+            client = APIClient()
+            client.force_authenticate(users[role])
+            cache.clear()
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(path, params)
+                transaction.set_rollback(True)
+            self.assertEqual(response.status_code, 200, label)
+            counts[label] = len(queries)
+        return counts
+
+    def test_query_counts_are_bounded_and_flat(self):
+        small = self._query_counts()
+        for index in range(self.SMALL, self.LARGE):
+            seed_batch(self.owner, index)
+        large = self._query_counts()
+
+        for label, _, _, _, budget in self.ENDPOINTS:
+            with self.subTest(endpoint=label):
+                self.assertLessEqual(small[label], budget)
+                self.assertEqual(small[label], large[label], 'query count grows with the data')
+
+
+class SeedPortfolioTests(TestCase):
+    """Bulk-seeded data must look like data written through save()."""
+
+    def test_seeded_counters_and_schedules_match_transactions(self):
+        counts = PortfolioSeeder(customers=20, days=60, seed=7).run()
+        self.assertEqual(Transaction.objects.count(), counts['transactions'])
+        self.assertEqual(verify_loan_counters(), [])
 
-# Create your tests here.
+        for loan in Loan.objects.filter(transaction_count__gt=0)[:10]:
+            seeded = list(loan.schedule_items.values_list('sequence', 'amount_paid', 'status', 'paid_on'))
+            reconcile_schedule(loan)
+            self.assertEqual(list(loan.schedule_items.values_list('sequence', 'amount_paid', 'status', 'paid_on')),
+                             seeded, loan.pk)
@@ -4,6 +4,9 @@ from .views import LoanViewSet, TransactionViewSet, PaymentAnalyticsView
 from .dashboard_views import DashboardStatsView
 from .report_views import ReportDataView, ReportDownloadView, CustomerReportDownloadView
 from .cashbook_views import DailyCashBookView, RevenueReportView
+from .portfolio_views import PortfolioProjectionView, CashFlowForecastView
+from .schedule_views import CollectionScheduleView
+from .analytics_views import AgingBucketsView, CohortCurvesView
 
 router = DefaultRouter()
 router.register(r'loans', LoanViewSet, basename='loan')
@@ -17,6 +20,11 @@ urlpatterns = [
     path('customer-report/<int:customer_id>/download/', CustomerReportDownloadView.as_view(), name='customer-report-download'),
     path('daily-cashbook/', DailyCashBookView.as_view(), name='daily-cashbook'),
     path('revenue-report/', RevenueReportView.as_view(), name='revenue-report'),
+    path('portfolio/', PortfolioProjectionView.as_view(), name='portfolio-projection'),
+    path('forecast/', CashFlowForecastView.as_view(), name='cash-flow-forecast'),
+    path('collection-schedule/', CollectionScheduleView.as_view(), name='collection-schedule'),
+    path('aging/', AgingBucketsView.as_view(), name='aging-buckets'),
+    path('cohorts/', CohortCurvesView.as_view(), name='cohort-curves'),
     path('', include(router.urls)),
 ]
 
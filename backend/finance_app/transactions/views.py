@@ -1,17 +1,28 @@
+from decimal import Decimal, InvalidOperation
 from rest_framework import viewsets, permissions, status, generics
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .models import Loan, Transaction
 from .serializers import LoanSerializer, LoanDetailSerializer, TransactionSerializer
-from customers.models import Customer
+from .schedule import generate_schedule
 
 class LoanViewSet(viewsets.ModelViewSet):
     serializer_class = LoanSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Fields accepted by ?ordering= (prefix with - for descending)
+    ORDERING_FIELDS = ('total_pending_interest', 'expected_interest', 'pending_interest',
+                       'remaining_amount', 'principal_amount', 'start_date', 'created_at')
+    # ?min_<name>= / ?max_<name>= range filters
+    RANGE_FILTERS = {
+        'pending_interest': 'total_pending_interest',
+        'expected_interest': 'expected_interest',
+        'remaining': 'remaining_amount',
+    }
     
     def get_queryset(self):
-        queryset = Loan.objects.all()
+        queryset = Loan.objects.with_interest()
         customer_id = self.request.query_params.get('customer_id', None)
         loan_type = self.request.query_params.get('loan_type', None)
         status_filter = self.request.query_params.get('status', None)
@@ -21,7 +32,25 @@ class LoanViewSet(viewsets.ModelViewSet):
         if loan_type:
             queryset = queryset.filter(loan_type=loan_type)
         if status_filter:
-            queryset = queryset.filter(status=status_filter)
+            # Accepts a comma-separated list, e.g. ?status=active,overdue
+            queryset = queryset.filter(status__in=status_filter.split(','))
+        
+        for param, field in self.RANGE_FILTERS.items():
+            minimum = self.request.query_params.get(f'min_{param}')
+            maximum = self.request.query_params.get(f'max_{param}')
+            try:
+                if minimum:
+                    queryset = queryset.filter(**{f'{field}__gte': Decimal(minimum)})
+                if maximum:
+                    queryset = queryset.filter(**{f'{field}__lte': Decimal(maximum)})
+            except InvalidOperation:
+                raise ValidationError({'error': f'min_{param} / max_{param} must be numbers'})
+        
+        ordering = self.request.query_params.get('ordering')
+        if ordering:
+            if ordering.lstrip('-') not in self.ORDERING_FIELDS:
+                raise ValidationError({'error': f"ordering must be one of {', '.join(self.ORDERING_FIELDS)}"})
+            queryset = queryset.order_by(ordering, 'pk')
         
         return queryset.select_related('customer', 'created_by')
     
@@ -43,7 +72,7 @@ class LoanViewSet(viewsets.ModelViewSet):
         loan = self.get_object()
         
         # Block editing if loan has any transactions
-        if loan.transactions.exists():
+        if loan.transaction_count:
             return Response(
                 {'error': 'Cannot edit loan with existing transactions.'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -69,13 +98,18 @@ class LoanViewSet(viewsets.ModelViewSet):
                 updated_loan.remaining_amount = max(Decimal('0'), new_remaining)
                 updated_loan.save()
             
+            # Terms may have changed, so rebuild the installment schedule
+            generate_schedule(updated_loan)
+            
+            # Re-read so the interest annotations reflect the new principal and balance
+            updated_loan = self.get_queryset().get(pk=updated_loan.pk)
             return Response(self.get_serializer(updated_loan).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def destroy(self, request, *args, **kwargs):
         loan = self.get_object()
         # Block deletion if loan has any transactions
-        if loan.transactions.exists():
+        if loan.transaction_count:
             return Response(
                 {'error': 'Cannot delete loan with existing transactions. Please delete all transactions first.'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -102,9 +136,9 @@ class TransactionViewSet(viewsets.ModelViewSet):
         if loan_id:
             queryset = queryset.filter(loan_id=loan_id)
         if start_date:
-            queryset = queryset.filter(created_at__date__gte=start_date)
+            queryset = queryset.filter(posted_on__gte=start_date)
         if end_date:
-            queryset = queryset.filter(created_at__date__lte=end_date)
+            queryset = queryset.filter(posted_on__lte=end_date)
         
         return queryset.select_related('loan', 'loan__customer', 'created_by').order_by('-created_at')
     
@@ -115,24 +149,6 @@ class TransactionViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def destroy(self, request, *args, **kwargs):
-        """Delete a transaction and reverse its effect on the loan balance."""
-        transaction = self.get_object()
-        loan = transaction.loan
-
-        # Reverse the principal reduction
-        asal = transaction.asal_amount if transaction.asal_amount else transaction.amount
-        if asal:
-            from decimal import Decimal
-            loan.remaining_amount += Decimal(str(asal))
-            # If loan was settled, reactivate it
-            if loan.status == 'settled':
-                loan.status = 'active'
-            loan.save()
-
-        transaction.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
-
 class PaymentAnalyticsView(APIView):
     """
     Enhanced analytics endpoint for payment method tracking
@@ -158,14 +174,14 @@ class PaymentAnalyticsView(APIView):
         
         # Filter loans by date range
         loans = Loan.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
+            posted_on__gte=start_date,
+            posted_on__lte=end_date
         )
         
         # Filter transactions by date range
         transactions = Transaction.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
+            posted_on__gte=start_date,
+            posted_on__lte=end_date
         )
         
         # LOAN DISBURSEMENT ANALYTICS (How you give money)
@@ -0,0 +1,198 @@
+import re
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from customers.models import Area
+
+from .bench import request_host
+
+# (label, role, path, params) for the endpoints the app hits most; params may use
+# {start}, {end}, {today} and {area}, filled in from the data being audited
+HOT_ENDPOINTS = (
+    ('loans', 'owner', '/api/transactions/loans/', {'status': 'active'}),
+    ('loans-by-pending-interest', 'owner', '/api/transactions/loans/', {'ordering': '-total_pending_interest'}),
+    ('transactions', 'owner', '/api/transactions/transactions/', {'start_date': '{start}', 'end_date': '{end}'}),
+    ('transactions-employee', 'employee', '/api/transactions/transactions/', {}),
+    ('customers', 'owner', '/api/customers/', {'all': 'true', 'include_loans': 'false'}),
+    ('customers-unpaid', 'owner', '/api/customers/', {'all': 'true', 'include_loans': 'false', 'unpaid_days': '30'}),
+    ('dashboard-stats', 'owner', '/api/transactions/dashboard-stats/', {}),
+    ('daily-cashbook', 'owner', '/api/transactions/daily-cashbook/', {'date': '{today}'}),
+    ('revenue-report', 'owner', '/api/transactions/revenue-report/', {'range': 'month'}),
+    ('payment-analytics', 'owner', '/api/transactions/payment-analytics/', {}),
+    ('report-summary', 'owner', '/api/transactions/reports/', {'start_date': '{start}', 'end_date': '{end}'}),
+    ('report-area-wise', 'owner', '/api/transactions/reports/',
+     {'report_type': 'area_wise', 'start_date': '{start}', 'end_date': '{end}'}),
+    ('report-loan-wise', 'owner', '/api/transactions/reports/',
+     {'report_type': 'loan_wise', 'start_date': '{start}', 'end_date': '{end}'}),
+    ('report-transactions', 'owner', '/api/transactions/reports/',
+     {'report_type': 'transactions', 'start_date': '{start}', 'end_date': '{end}', 'area': '{area}'}),
+    ('collection-schedule', 'owner', '/api/transactions/collection-schedule/', {}),
+    ('aging', 'owner', '/api/transactions/aging/', {}),
+    ('cohorts', 'owner', '/api/transactions/cohorts/', {}),
+)
+
+# Lookup tables that stay small; scanning them is expected
+SMALL_TABLES = {'users_user', 'authtoken_token', 'customers_area', 'django_content_type'}
+
+# Per-node numbers that change between runs; stripped unless --timings is given
+PG_VOLATILE = re.compile(r'\s+\((?:cost|actual)[^)]*\)')
+PG_TIMING_LINE = re.compile(r'^\s*(Planning|Execution) Time:')
+PG_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)( USING (?:COVERING )?INDEX \w+)?$')
+SQLITE_SUBQUERY = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+SQLITE_TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR .*ORDER BY')
+# A top-level ORDER BY ... LIMIT n ending the statement
+ORDERED_LIMIT = re.compile(r'\bORDER BY [^()]*\bLIMIT \d+(?: OFFSET \d+)?$')
+TABLE_ALIAS = re.compile(r'"(\w+)" (\w+)\b')
+
+
+def sqlite_scanned_tables(sql, plan):
+    """
+    Tables an SQLite plan reads in full: plain SCANs, and walks of a whole index, except
+    the outermost one when it returns rows in ORDER BY order for a LIMIT (no temp sort),
+    which stops after LIMIT rows.
+    """
+    aliases = dict((alias, table) for table, alias in TABLE_ALIAS.findall(sql))
+    subqueries = {m.group(1) for row in plan if (m := SQLITE_SUBQUERY.match(row.strip()))}
+    stops_early = bool(ORDERED_LIMIT.search(sql.strip())) and not any(SQLITE_TEMP_SORT.search(row) for row in plan)
+    tables = set()
+    for index, row in enumerate(plan):
+        match = SQLITE_SCAN.match(row.strip())
+        if not match or match.group(1) in subqueries:
+            continue
+        if match.group(2) and index == 0 and stops_early:
+            continue
+        tables.add(aliases.get(match.group(1), match.group(1)))
+    return tables
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the queries behind the hot API endpoints and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+        parser.add_argument('--endpoint', action='append', default=[],
+                            help='Only audit these endpoint labels (repeatable)')
+        parser.add_argument('--days', type=int, default=30, help='Date range for report/list parameters (default 30)')
+        parser.add_argument('--allow-scan', action='append', default=[],
+                            help='Table whose scans are not flagged (repeatable)')
+        parser.add_argument('--timings', action='store_true',
+                            help='Keep PostgreSQL costs and timings in the report (not diffable)')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit with an error if any scan is flagged')
+
+    def handle(self, *args, **options):
+        endpoints = [e for e in HOT_ENDPOINTS if not options['endpoint'] or e[0] in options['endpoint']]
+        if not endpoints:
+            raise CommandError(f"Unknown endpoint; choose from {', '.join(e[0] for e in HOT_ENDPOINTS)}")
+
+        users = self._users()
+        params = self._parameters(options['days'])
+        allowed = SMALL_TABLES | set(options['allow_scan'])
+
+        lines = [f'# Query plan audit ({connection.vendor})', '']
+        flagged = []
+        for label, role, path, query in endpoints:
+            user = users.get(role)
+            if user is None:
+                lines += [f'## {label}', f'skipped: no {role} user', '']
+                continue
+            statements = self._capture(user, path, {k: v.format(**params) for k, v in query.items()})
+            lines.append(f'## {label} ({len(statements)} distinct queries)')
+            for number, (sql, sql_params) in enumerate(statements, 1):
+                plan = self._explain(sql, sql_params)
+                scans = sorted(t for t in self._scanned_tables(sql, plan) if t not in allowed)
+                if scans:
+                    flagged.append((label, number, scans))
+                lines += ['', f'### {label} #{number}' + (f"  FULL SCAN: {', '.join(scans)}" if scans else ''), sql]
+                lines += ['  ' + row for row in self._clean(plan, options['timings'])]
+            lines.append('')
+
+        lines.append(f'# {len(flagged)} queries with full scans')
+        lines += [f'- {label} #{number}: {", ".join(scans)}' for label, number, scans in flagged]
+        report = '\n'.join(lines) + '\n'
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(report)
+            self.stdout.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(report)
+
+        if flagged:
+            message = f'{len(flagged)} queries do full scans'
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No full scans found'))
+
+    def _users(self):
+        User = get_user_model()
+        return {
+            'owner': User.objects.filter(role='owner', is_active=True).order_by('pk').first(),
+            'employee': User.objects.filter(role='employee', is_active=True).order_by('pk').first(),
+        }
+
+    def _parameters(self, days):
+        today = date.today()
+        busiest = Area.objects.order_by('-customer_count', 'key').first()
+        return {
+            'today': today.isoformat(),
+            'start': (today - timedelta(days=days)).isoformat(),
+            'end': today.isoformat(),
+            'area': busiest.name if busiest else '',
+        }
+
+    def _capture(self, user, path, query):
+        """
+        Run the endpoint in a rolled-back transaction and return its distinct SELECTs
+        as (sql, params), in execution order. Caching is disabled so cached views
+        still hit the database.
+        """
+        statements = {}
+
+        def record(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT') and sql not in statements:
+                statements[sql] = params
+            return execute(sql, params, many, context)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            with transaction.atomic():
+                with connection.execute_wrapper(record):
+                    response = client.get(path, query, HTTP_HOST=request_host())
+                transaction.set_rollback(True)
+        if response.status_code != 200:
+            raise CommandError(f'GET {path} returned {response.status_code}')
+        return list(statements.items())
+
+    def _explain(self, sql, params):
+        prefix = 'EXPLAIN ANALYZE ' if connection.vendor == 'postgresql' else 'EXPLAIN QUERY PLAN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+        if connection.vendor == 'sqlite':
+            # (id, parent, notused, detail): indent each node under its parent
+            depth = {0: -1}
+            plan = []
+            for node, parent, _, detail in rows:
+                depth[node] = depth.get(parent, -1) + 1
+                plan.append('  ' * depth[node] + detail)
+            return plan
+        return [row[0] for row in rows]
+
+    def _scanned_tables(self, sql, plan):
+        if connection.vendor == 'postgresql':
+            return {match.group(1) for row in plan for match in PG_SEQ_SCAN.finditer(row)}
+        return sqlite_scanned_tables(sql, plan)
+
+    def _clean(self, plan, timings):
+        if timings or connection.vendor != 'postgresql':
+            return plan
+        return [PG_VOLATILE.sub('', row) for row in plan if not PG_TIMING_LINE.match(row)]
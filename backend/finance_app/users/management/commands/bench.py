@@ -0,0 +1,227 @@
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext, override_settings, setup_databases, teardown_databases
+from rest_framework.test import APIClient
+
+from customers.models import Area, Customer
+from transactions.seeding import PortfolioSeeder
+
+# (label, role, path, params); path and params may use {start}, {end}, {today}, {area} and {customer}
+BENCH_ENDPOINTS = (
+    ('dashboard-stats', 'owner', '/api/transactions/dashboard-stats/', {}),
+    ('daily-cashbook', 'owner', '/api/transactions/daily-cashbook/', {'date': '{today}'}),
+    ('revenue-report', 'owner', '/api/transactions/revenue-report/', {'range': 'month'}),
+    ('payment-analytics', 'owner', '/api/transactions/payment-analytics/', {}),
+    ('report-summary', 'owner', '/api/transactions/reports/', {'start_date': '{start}', 'end_date': '{end}'}),
+    ('report-area-wise', 'owner', '/api/transactions/reports/',
+     {'report_type': 'area_wise', 'start_date': '{start}', 'end_date': '{end}'}),
+    ('report-loan-wise', 'owner', '/api/transactions/reports/',
+     {'report_type': 'loan_wise', 'start_date': '{start}', 'end_date': '{end}'}),
+    ('report-transactions', 'owner', '/api/transactions/reports/',
+     {'report_type': 'transactions', 'start_date': '{start}', 'end_date': '{end}', 'area': '{area}'}),
+    ('report-pdf', 'owner', '/api/transactions/reports/download/',
+     {'file_format': 'pdf', 'report_type': 'transactions', 'start_date': '{start}', 'end_date': '{end}',
+      'area': '{area}'}),
+    ('customer-report-pdf', 'owner', '/api/transactions/customer-report/{customer}/download/', {}),
+    ('loans-open', 'owner', '/api/transactions/loans/', {'status': 'active,overdue'}),
+    ('loans-dc-by-pending', 'owner', '/api/transactions/loans/',
+     {'loan_type': 'DC Loan', 'ordering': '-total_pending_interest'}),
+    ('transactions-range', 'owner', '/api/transactions/transactions/', {'start_date': '{start}', 'end_date': '{end}'}),
+    ('transactions-employee', 'employee', '/api/transactions/transactions/', {}),
+    ('customers-list', 'owner', '/api/customers/', {'all': 'true', 'include_loans': 'false'}),
+    ('customers-unpaid', 'owner', '/api/customers/',
+     {'all': 'true', 'include_loans': 'false', 'unpaid_days': '30', 'ordering': '-total_outstanding'}),
+    ('customers-with-loans', 'owner', '/api/customers/', {'all': 'true', 'has_active_loans': 'true'}),
+)
+
+# p95 changes smaller than this are noise, whatever the percentage
+NOISE_MS = 1.0
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def request_host():
+    """A Host header that ALLOWED_HOSTS accepts, for requests sent through the test client"""
+    host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+    # '*' allows anything, '.example.com' the domain and its subdomains
+    return 'localhost' if host == '*' else host.lstrip('.')
+
+
+@contextmanager
+def quiet_request_logs(level=logging.ERROR):
+    """Drop log records at level and below; the request metrics middleware would log every request"""
+    logging.disable(level)
+    try:
+        yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API endpoints (p50/p95 latency, queries, peak memory) and compare with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', help='Comma-separated customer counts to seed into a throwaway test database '
+                                            '(default: benchmark the current database as is)')
+        parser.add_argument('--days', type=int, default=180, help='History to seed for --sizes (default 180)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--runs', type=int, default=20, help='Timed requests per endpoint (default 20)')
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--range-days', type=int, default=30, help='Date range for report/list parameters')
+        parser.add_argument('--endpoint', action='append', default=[],
+                            help='Only benchmark these endpoint labels (repeatable)')
+        parser.add_argument('--cached', action='store_true', help='Keep the cache (default: every request computes)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Compare with a JSON file written by an earlier run')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed p95 slowdown over the baseline as a fraction (default 0.25)')
+
+    def handle(self, *args, **options):
+        endpoints = [e for e in BENCH_ENDPOINTS if not options['endpoint'] or e[0] in options['endpoint']]
+        if not endpoints:
+            raise CommandError(f"Unknown endpoint; choose from {', '.join(e[0] for e in BENCH_ENDPOINTS)}")
+        if options['runs'] < 1:
+            raise CommandError('--runs must be positive')
+
+        results = {
+            'vendor': connection.vendor,
+            'date': date.today().isoformat(),
+            'runs': options['runs'],
+            'sizes': {},
+        }
+        caches = {} if options['cached'] else {
+            'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        }
+        with quiet_request_logs(logging.WARNING), override_settings(**caches):
+            if options['sizes']:
+                sizes = [int(size) for size in options['sizes'].split(',')]
+                old_config = setup_databases(verbosity=0, interactive=False)
+                try:
+                    for size in sizes:
+                        call_command('flush', interactive=False, verbosity=0)
+                        self.stdout.write(f'Seeding {size} customers ...')
+                        PortfolioSeeder(size, options['days'], seed=options['seed']).run()
+                        results['sizes'][str(size)] = self._bench_all(endpoints, options)
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+            else:
+                results['sizes']['current'] = self._bench_all(endpoints, options)
+
+        for size, rows in results['sizes'].items():
+            self.stdout.write(f'\n{size} customers' if size != 'current' else '\ncurrent database')
+            self.stdout.write(f"{'endpoint':<24}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}{'peak KiB':>10}{'KiB':>9}")
+            for label, row in rows.items():
+                self.stdout.write(
+                    f"{label:<24}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['queries']:>9}"
+                    f"{row['peak_kib']:>10.0f}{row['response_kib']:>9.1f}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"\nResults written to {options['output']}")
+
+        if options['baseline']:
+            regressions = self._compare(results, options['baseline'], options['threshold'])
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+
+    def _bench_all(self, endpoints, options):
+        User = get_user_model()
+        users = {
+            'owner': User.objects.filter(role='owner', is_active=True).order_by('pk').first(),
+            'employee': User.objects.filter(role='employee', is_active=True).order_by('pk').first(),
+        }
+        today = date.today()
+        busiest_area = Area.objects.order_by('-customer_count', 'key').first()
+        busiest_customer = Customer.objects.annotate(payments=Sum('loans__transaction_count')) \
+            .order_by('-payments', 'pk').first()
+        params = {
+            'today': today.isoformat(),
+            'start': (today - timedelta(days=options['range_days'])).isoformat(),
+            'end': today.isoformat(),
+            'area': busiest_area.name if busiest_area else '',
+            'customer': busiest_customer.pk if busiest_customer else 0,
+        }
+
+        rows = {}
+        for label, role, path, query in endpoints:
+            if users[role] is None:
+                self.stdout.write(self.style.WARNING(f'{label}: skipped, no {role} user'))
+                continue
+            client = APIClient()
+            client.force_authenticate(users[role])
+            path = path.format(**params)
+            query = {key: value.format(**params) for key, value in query.items()}
+            rows[label] = self._bench(client, path, query, options['runs'], options['warmup'])
+        return rows
+
+    def _bench(self, client, path, query, runs, warmup):
+        def get():
+            response = client.get(path, query, HTTP_HOST=request_host())
+            if response.status_code != 200:
+                raise CommandError(f'GET {path} returned {response.status_code}')
+            return response
+
+        for _ in range(warmup):
+            get()
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            get()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        # One extra request for queries and memory, so tracing does not skew the timings
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = get()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries': len(queries),
+            'peak_kib': round(peak / 1024, 1),
+            'response_kib': round(len(response.content) / 1024, 1),
+        }
+
+    def _compare(self, results, path, threshold):
+        try:
+            with open(path) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read baseline {path}: {e}')
+
+        regressions = []
+        for size, rows in results['sizes'].items():
+            for label, row in rows.items():
+                before = baseline.get('sizes', {}).get(size, {}).get(label)
+                if before is None:
+                    continue
+                limit = before['p95_ms'] * (1 + threshold)
+                if row['p95_ms'] > limit and row['p95_ms'] - before['p95_ms'] > NOISE_MS:
+                    regressions.append(f"{size}/{label}: p95 {row['p95_ms']} ms > {before['p95_ms']} ms "
+                                       f"+{threshold:.0%}")
+                if row['queries'] > before['queries']:
+                    regressions.append(f"{size}/{label}: {row['queries']} queries > {before['queries']}")
+        return regressions
@@ -0,0 +1,53 @@
+import glob
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Merge the stack samples of all workers into one folded-stacks file (flamegraph.pl, speedscope)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Write the folded stacks to this file instead of stdout')
+        parser.add_argument('--view', action='append', default=[], help='Only these view names (repeatable)')
+        parser.add_argument('--no-view-frame', action='store_true',
+                            help='Drop the view name root frame so all views merge into one graph')
+        parser.add_argument('--summary', action='store_true', help='Print samples per view instead of stacks')
+
+    def handle(self, *args, **options):
+        paths = glob.glob(os.path.join(settings.SAMPLES_DIR, '*.folded'))
+        if not paths:
+            raise CommandError(f'No samples in {settings.SAMPLES_DIR}; is SAMPLING_PROFILER on?')
+
+        merged = {}
+        for path in paths:
+            with open(path) as f:
+                for line in f:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    view, _, frames = stack.partition(';')
+                    if options['view'] and view not in options['view']:
+                        continue
+                    if options['no_view_frame'] and not options['summary']:
+                        stack = frames
+                    merged[stack] = merged.get(stack, 0) + int(count)
+
+        if options['summary']:
+            views = {}
+            for stack, count in merged.items():
+                view = stack.partition(';')[0]
+                views[view] = views.get(view, 0) + count
+            total = sum(views.values()) or 1
+            for view, count in sorted(views.items(), key=lambda item: -item[1]):
+                self.stdout.write(f'{count:>9}  {count / total:6.1%}  {view}')
+            return
+
+        lines = [f'{stack} {count}\n' for stack, count in sorted(merged.items())]
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.writelines(lines)
+            self.stdout.write(self.style.SUCCESS(
+                f"{sum(merged.values())} samples from {len(paths)} workers written to {options['output']}"
+            ))
+        else:
+            self.stdout.write(''.join(lines), ending='')
@@ -0,0 +1,325 @@
+import json
+import os
+import random
+import secrets
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from multiprocessing import get_context
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count, Sum
+from django.test import Client
+from django.test.utils import setup_databases, teardown_databases
+from rest_framework.authtoken.models import Token
+
+from transactions.models import Loan, Transaction
+from transactions.seeding import PortfolioSeeder
+
+from .bench import percentile, quiet_request_logs, request_host
+
+COLLECT_PATH = '/api/transactions/transactions/'
+DASHBOARD_PATH = '/api/transactions/dashboard-stats/'
+DOWNLOAD_PATH = '/api/transactions/reports/download/'
+REPORT_DAYS = 30
+
+
+class InProcessTarget:
+    """Requests through the WSGI app in this process (one test client per thread)"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __reduce__(self):
+        # Sent to --processes workers: each starts with clients of its own
+        return (InProcessTarget, ())
+
+    def request(self, method, path, token, query=None, data=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            # Exceptions in the view reach the caller, so failures can be reported with their cause
+            client = self._local.client = Client()
+        headers = {'HTTP_HOST': request_host()}
+        if token:
+            headers['HTTP_AUTHORIZATION'] = f'Token {token}'
+        if method == 'POST':
+            response = client.post(path, json.dumps(data), content_type='application/json', **headers)
+        else:
+            response = client.get(path, query, **headers)
+        return response.status_code
+
+    def close(self):
+        # The test client does not fire the signals that normally close a request's connection
+        connection.close()
+
+
+class HTTPTarget:
+    """Requests against a running server, e.g. gunicorn on 127.0.0.1:8000"""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def request(self, method, path, token, query=None, data=None):
+        url = self.url + path + (f'?{urlencode(query, doseq=True)}' if query else '')
+        body = json.dumps(data).encode() if data is not None else None
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        request = urllib.request.Request(url, data=body, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def close(self):
+        pass
+
+
+def run_user(target, user, deadline):
+    """
+    One simulated user until the deadline; returns [(kind, error, ms), ...] where error
+    is None for a request that succeeded, else its unexpected status or exception.
+
+    user is a dict: kind (collect, dashboard or download), token, pause (seconds
+    between requests), and for collectors the loan IDs to pay into and the run marker.
+    """
+    rng = random.Random(user['seed'])
+    samples = []
+    today = date.today()
+    report_query = {
+        'file_format': 'pdf', 'report_type': 'transactions',
+        'start_date': (today - timedelta(days=REPORT_DAYS)).isoformat(), 'end_date': today.isoformat(),
+    }
+    try:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                if user['kind'] == 'collect':
+                    expected, status = 201, target.request('POST', COLLECT_PATH, user['token'], data={
+                        'loan': rng.choice(user['loans']),
+                        'asal_amount': str(rng.randint(1, 20)),
+                        'interest_amount': '0',
+                        'payment_method': 'cash',
+                        'description': user['marker'],
+                    })
+                elif user['kind'] == 'dashboard':
+                    expected, status = 200, target.request('GET', DASHBOARD_PATH, user['token'])
+                else:
+                    expected, status = 200, target.request('GET', DOWNLOAD_PATH, user['token'], query=report_query)
+                error = None if status == expected else f'HTTP {status}'
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'[:200]
+            samples.append((user['kind'], error, (time.perf_counter() - started) * 1000))
+            if user['pause']:
+                time.sleep(user['pause'])
+    finally:
+        target.close()
+    return samples
+
+
+def run_users(target, users, deadline):
+    """All users of one process, each on its own thread"""
+    with ThreadPoolExecutor(max_workers=len(users)) as pool:
+        futures = [pool.submit(run_user, target, user, deadline) for user in users]
+        return [sample for future in futures for sample in future.result()]
+
+
+class Command(BaseCommand):
+    help = ('Load-test concurrent collectors, dashboard polling and report downloads, '
+            'then check every loan balance against its payments')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Load a running server at this base URL (it must use the same database '
+                                          'as this command). Default: the WSGI app in-process against a '
+                                          'throwaway database seeded with --customers')
+        parser.add_argument('--customers', type=int, default=200, help='Customers to seed in-process (default 200)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--collectors', type=int, default=10, help='Collectors posting payments (default 10)')
+        parser.add_argument('--pollers', type=int, default=1, help='Users polling dashboard stats (default 1)')
+        parser.add_argument('--downloaders', type=int, default=1, help='Users downloading PDF reports (default 1)')
+        parser.add_argument('--loans', type=int, default=20,
+                            help='Open loans the collectors pay into; fewer loans mean more contention (default 20)')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run (default 30)')
+        parser.add_argument('--collect-pause', type=float, default=0.0,
+                            help='Seconds a collector waits between payments (default 0)')
+        parser.add_argument('--poll-pause', type=float, default=1.0,
+                            help='Seconds between dashboard polls (default 1)')
+        parser.add_argument('--download-pause', type=float, default=5.0,
+                            help='Seconds between report downloads (default 5)')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Spread the simulated users over this many client processes (default 1)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['collectors'] < 1 or options['loans'] < 1 or options['processes'] < 1:
+            raise CommandError('--collectors, --loans and --processes must be positive')
+        if not options['url'] and connection.vendor == 'sqlite':
+            # The in-memory test database is shared by all threads and fails concurrent writers with
+            # "database table is locked"; in a file each thread and process has its own connection
+            # and waits on the busy timeout, as the dev server does
+            test_dir = tempfile.mkdtemp()
+            connection.settings_dict['TEST']['NAME'] = os.path.join(test_dir, 'loadtest.sqlite3')
+
+        # Failed requests would log their traceback; the report counts failures by cause instead
+        with quiet_request_logs():
+            if options['url']:
+                self.stdout.write(self.style.WARNING(
+                    f"Posting real payments to {options['url']}; they are marked in their description"
+                ))
+                results = self._run(HTTPTarget(options['url']), options)
+            else:
+                old_config = setup_databases(verbosity=0, interactive=False)
+                try:
+                    self.stdout.write(f"Seeding {options['customers']} customers ...")
+                    PortfolioSeeder(options['customers'], 90, seed=options['seed']).run()
+                    results = self._run(InProcessTarget(), options)
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+                    if connection.vendor == 'sqlite':
+                        os.rmdir(test_dir)
+
+        self._report(results)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+        if results['mismatches']:
+            raise CommandError(f"{len(results['mismatches'])} loans do not match their payments")
+
+    def _run(self, target, options):
+        User = get_user_model()
+        collectors = list(User.objects.filter(role='employee', is_active=True).order_by('pk'))
+        owner = User.objects.filter(role='owner', is_active=True).order_by('pk').first()
+        if not collectors or owner is None:
+            raise CommandError('Needs at least one active employee and one active owner')
+        loans = list(Loan.objects.filter(status__in=Loan.OPEN_STATUSES)
+                     .order_by('-remaining_amount', 'pk')[:options['loans']])
+        if not loans:
+            raise CommandError('No open loans to pay into')
+        loan_ids = [loan.pk for loan in loans]
+        before = self._snapshot(loan_ids)
+        marker = f'loadtest {secrets.token_hex(4)}'
+
+        def token(user):
+            return Token.objects.get_or_create(user=user)[0].key
+
+        owner_token = token(owner)
+        users = [
+            {'kind': 'collect', 'token': token(collectors[number % len(collectors)]), 'loans': loan_ids,
+             'marker': marker, 'pause': options['collect_pause']}
+            for number in range(options['collectors'])
+        ]
+        users += [{'kind': 'dashboard', 'token': owner_token, 'pause': options['poll_pause']}] * options['pollers']
+        users += [{'kind': 'download', 'token': owner_token, 'pause': options['download_pause']}] * \
+            options['downloaders']
+        users = [{**user, 'seed': options['seed'] * 1000 + number} for number, user in enumerate(users)]
+
+        self.stdout.write(f"{options['collectors']} collectors on {len(loan_ids)} loans, {options['pollers']} "
+                          f"pollers, {options['downloaders']} downloaders for {options['duration']:g} s ...")
+        started = time.monotonic()
+        deadline = started + options['duration']
+        if options['processes'] == 1:
+            samples = run_users(target, users, deadline)
+        else:
+            # Forked children must not share this process's database connections
+            connections.close_all()
+            shares = [users[number::options['processes']] for number in range(options['processes'])]
+            with ProcessPoolExecutor(len(shares), mp_context=get_context('fork')) as pool:
+                futures = [pool.submit(run_users, target, share, deadline) for share in shares if share]
+                samples = [sample for future in futures for sample in future.result()]
+        elapsed = time.monotonic() - started
+
+        return {
+            'target': options['url'] or f"in-process, {options['customers']} customers",
+            'duration_s': round(elapsed, 1),
+            'users': {'collectors': options['collectors'], 'pollers': options['pollers'],
+                      'downloaders': options['downloaders'], 'processes': options['processes']},
+            'operations': self._summarise(samples, elapsed),
+            'mismatches': self._verify(before, marker),
+        }
+
+    def _snapshot(self, loan_ids):
+        return {
+            loan['pk']: loan for loan in
+            Loan.objects.filter(pk__in=loan_ids).values('pk', 'remaining_amount', 'transaction_count',
+                                                         'total_asal_paid')
+        }
+
+    def _verify(self, before, marker):
+        """
+        Each loan's balance must equal its balance before the run less the principal of
+        the payments the run recorded (floored at zero, as Transaction.save settles the loan).
+        """
+        paid = {
+            row['loan_id']: row for row in
+            Transaction.objects.filter(loan_id__in=before, description=marker).values('loan_id')
+            .annotate(count=Count('pk'), asal=Sum('asal_amount'))
+        }
+        after = self._snapshot(list(before))
+        mismatches = []
+        for pk, start in before.items():
+            row = paid.get(pk, {'count': 0, 'asal': Decimal('0')})
+            expected = max(Decimal('0'), start['remaining_amount'] - row['asal'])
+            checks = {
+                'remaining_amount': (expected, after[pk]['remaining_amount']),
+                'transaction_count': (start['transaction_count'] + row['count'], after[pk]['transaction_count']),
+                'total_asal_paid': (start['total_asal_paid'] + row['asal'], after[pk]['total_asal_paid']),
+            }
+            for field, (want, got) in checks.items():
+                if want != got:
+                    mismatches.append({'loan': pk, 'field': field, 'expected': str(want), 'actual': str(got),
+                                       'payments': row['count']})
+        return mismatches
+
+    def _summarise(self, samples, elapsed):
+        operations = {}
+        for kind in ('collect', 'dashboard', 'download'):
+            timings = [ms for sample_kind, error, ms in samples if sample_kind == kind]
+            if not timings:
+                continue
+            errors = Counter(error for sample_kind, error, ms in samples if sample_kind == kind and error)
+            operations[kind] = {
+                'requests': len(timings),
+                'errors': sum(errors.values()),
+                'error_reasons': dict(errors.most_common()),
+                'per_second': round(len(timings) / elapsed, 1),
+                'p50_ms': round(statistics.median(timings), 1),
+                'p95_ms': round(percentile(timings, 0.95), 1),
+                'p99_ms': round(percentile(timings, 0.99), 1),
+                'max_ms': round(max(timings), 1),
+            }
+        return operations
+
+    def _report(self, results):
+        self.stdout.write(f"\n{results['target']}, {results['duration_s']} s")
+        self.stdout.write(f"{'operation':<12}{'requests':>9}{'errors':>8}{'req/s':>8}"
+                          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        for kind, row in results['operations'].items():
+            self.stdout.write(
+                f"{kind:<12}{row['requests']:>9}{row['errors']:>8}{row['per_second']:>8.1f}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+            )
+        for kind, row in results['operations'].items():
+            for reason, count in list(row['error_reasons'].items())[:5]:
+                self.stdout.write(self.style.ERROR(f"{kind} failed {count}x: {reason}"))
+        if results['mismatches']:
+            self.stdout.write(self.style.ERROR(f"\n{len(results['mismatches'])} balance mismatches:"))
+            for row in results['mismatches'][:20]:
+                self.stdout.write(self.style.ERROR(
+                    f"loan {row['loan']} {row['field']}: expected {row['expected']}, got {row['actual']} "
+                    f"after {row['payments']} payments"
+                ))
+        else:
+            self.stdout.write(self.style.SUCCESS('\nAll loan balances match their payments'))
@@ -0,0 +1,236 @@
+import glob
+import json
+import os
+import queue
+import statistics
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.authtoken.models import Token
+
+from .bench import NOISE_MS, percentile, quiet_request_logs
+from .loadtest import HTTPTarget, InProcessTarget
+
+# Only reads are replayed; captured writes have no body to send
+REPLAYED_METHODS = ('GET', 'HEAD')
+
+
+def read_capture(paths, since=None, until=None):
+    """Captured requests from the given files or directories, in arrival order"""
+    files = []
+    for path in paths:
+        files += sorted(glob.glob(os.path.join(path, '*.jsonl'))) if os.path.isdir(path) else [path]
+    records = []
+    for path in files:
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a worker restart
+                if (since and record['ts'] < since) or (until and record['ts'] >= until):
+                    continue
+                records.append(record)
+    records.sort(key=lambda record: record['ts'])
+    return records
+
+
+def summarise(timings):
+    return {
+        'requests': len(timings),
+        'p50_ms': round(statistics.median(timings), 1),
+        'p95_ms': round(percentile(timings, 0.95), 1),
+        'p99_ms': round(percentile(timings, 0.99), 1),
+        'max_ms': round(max(timings), 1),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Replay captured API traffic (TRAFFIC_CAPTURE) against this database, e.g. one restored from '
+            'backup, and compare latency per view with an earlier replay')
+
+    def add_arguments(self, parser):
+        parser.add_argument('logs', nargs='*', help='Capture files or directories (default: CAPTURE_DIR)')
+        parser.add_argument('--url', help='Replay against a running server at this base URL '
+                                          '(default: the WSGI app in-process)')
+        parser.add_argument('--since', help='Only requests from this local time on, e.g. 2026-10-12T08:00')
+        parser.add_argument('--until', help='Only requests before this local time')
+        parser.add_argument('--speedup', type=float, default=1.0,
+                            help='Replay this many times faster than captured; 0 sends as fast as possible '
+                                 '(default 1)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at most (default 8)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Compare with a JSON file written by a replay of another build')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed p95 slowdown per view over the baseline as a fraction (default 0.25)')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['speedup'] < 0:
+            raise CommandError('--concurrency must be positive and --speedup not negative')
+        records = read_capture(options['logs'] or [settings.CAPTURE_DIR],
+                               self._timestamp(options['since']), self._timestamp(options['until']))
+        replayed = [record for record in records if record['method'] in REPLAYED_METHODS]
+        if not replayed:
+            raise CommandError('No captured reads to replay')
+
+        target = HTTPTarget(options['url']) if options['url'] else InProcessTarget()
+        tokens = self._tokens(replayed)
+        self.stdout.write(f"Replaying {len(replayed)} reads ({len(records) - len(replayed)} writes skipped) "
+                          f"at {options['speedup']:g}x with up to {options['concurrency']} in flight ...")
+
+        with quiet_request_logs():
+            samples, elapsed = self._replay(target, replayed, tokens, options)
+
+        results = {
+            'target': options['url'] or f'in-process, {connection.vendor}',
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'requests': len(samples),
+            'skipped_writes': len(records) - len(replayed),
+            'duration_s': round(elapsed, 1),
+            'errors': sum(1 for sample in samples if sample['status'] is None or sample['status'] >= 500),
+            'status_changed': sum(1 for sample in samples if sample['status'] != sample['record']['status']),
+            'lag_p95_ms': round(percentile([sample['lag_ms'] for sample in samples], 0.95), 1),
+            'overall': summarise([sample['ms'] for sample in samples]),
+            'views': {},
+        }
+        by_view = {}
+        for sample in samples:
+            by_view.setdefault(sample['record']['view'] or 'unresolved', []).append(sample)
+        for view, view_samples in sorted(by_view.items()):
+            results['views'][view] = {
+                **summarise([sample['ms'] for sample in view_samples]),
+                'captured_p95_ms': round(percentile([sample['record']['ms'] for sample in view_samples], 0.95), 1),
+            }
+
+        baseline = self._load_baseline(options['baseline']) if options['baseline'] else None
+        self._report(results, baseline)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"\nResults written to {options['output']}")
+        if baseline is not None:
+            regressions = self._compare(results, baseline, options['threshold'])
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressions against {options['baseline']}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+
+    def _timestamp(self, value):
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            raise CommandError(f'Not a date/time: {value}')
+
+    def _tokens(self, records):
+        """Replay as the captured user, or another active user with the same role if it is gone"""
+        User = get_user_model()
+        users = {user.pk: user for user in User.objects.filter(
+            pk__in={record['user'] for record in records if record['user']}, is_active=True
+        )}
+        by_role = {}
+        tokens = {}
+        for record in records:
+            key = (record['user'], record['role'])
+            if key in tokens or record['user'] is None:
+                continue
+            user = users.get(record['user'])
+            if user is None:
+                if record['role'] not in by_role:
+                    by_role[record['role']] = User.objects.filter(role=record['role'], is_active=True) \
+                        .order_by('pk').first()
+                user = by_role[record['role']]
+            tokens[key] = Token.objects.get_or_create(user=user)[0].key if user else None
+        return tokens
+
+    def _replay(self, target, records, tokens, options):
+        """Send each record at its (sped up) captured time from a fixed set of worker threads"""
+        samples = []
+        lock = threading.Lock()
+        pending = queue.Queue(maxsize=options['concurrency'])
+
+        def worker():
+            try:
+                while True:
+                    item = pending.get()
+                    if item is None:
+                        return
+                    record, due = item
+                    began = time.monotonic()
+                    try:
+                        status = target.request(record['method'], record['path'],
+                                                tokens.get((record['user'], record['role'])), query=record['query'])
+                    except Exception:
+                        status = None
+                    ms = (time.monotonic() - began) * 1000
+                    with lock:
+                        samples.append({'record': record, 'status': status, 'ms': ms,
+                                        'lag_ms': max(0.0, began - due) * 1000})
+            finally:
+                target.close()
+
+        workers = [threading.Thread(target=worker, daemon=True) for _ in range(options['concurrency'])]
+        for thread in workers:
+            thread.start()
+        first = records[0]['ts']
+        started = time.monotonic()
+        for record in records:
+            if options['speedup']:
+                due = started + (record['ts'] - first) / options['speedup']
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                due = time.monotonic()
+            # Blocks while every worker is busy, which shows up as lag
+            pending.put((record, due))
+        for _ in workers:
+            pending.put(None)
+        for thread in workers:
+            thread.join()
+        return samples, time.monotonic() - started
+
+    def _load_baseline(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read baseline {path}: {e}')
+
+    def _report(self, results, baseline):
+        self.stdout.write(
+            f"\n{results['target']}: {results['requests']} requests in {results['duration_s']} s, "
+            f"{results['errors']} errors, {results['status_changed']} with a different status than captured, "
+            f"p95 lag behind schedule {results['lag_p95_ms']} ms"
+        )
+        header = f"{'view':<32}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'captured p95':>14}"
+        if baseline is not None:
+            header += f"{'base p95':>10}{'change':>9}"
+        self.stdout.write(header)
+        for view, row in [*results['views'].items(), ('(all)', results['overall'])]:
+            line = (f"{view:<32}{row['requests']:>9}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}"
+                    f"{row['p99_ms']:>9.1f}{row.get('captured_p95_ms', ''):>14}")
+            if baseline is not None:
+                before = baseline['overall'] if view == '(all)' else baseline.get('views', {}).get(view)
+                if before:
+                    change = (row['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0
+                    line += f"{before['p95_ms']:>10.1f}{change:>+9.0%}"
+            self.stdout.write(line)
+
+    def _compare(self, results, baseline, threshold):
+        regressions = []
+        for view, row in results['views'].items():
+            before = baseline.get('views', {}).get(view)
+            if before is None:
+                continue
+            limit = before['p95_ms'] * (1 + threshold)
+            if row['p95_ms'] > limit and row['p95_ms'] - before['p95_ms'] > NOISE_MS:
+                regressions.append(f"{view}: p95 {row['p95_ms']} ms > {before['p95_ms']} ms +{threshold:.0%}")
+        return regressions
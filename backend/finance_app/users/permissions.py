@@ -0,0 +1,26 @@
+from rest_framework.permissions import BasePermission
+
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+
+class IsOwner(BasePermission):
+    """Authenticated users with the owner role"""
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and getattr(request.user, 'role', None) == 'owner')
+
+
+class IsOwnerOrLocalhost(IsOwner):
+    """
+    Owners, or clients on this machine talking to gunicorn directly. nginx also connects
+    from 127.0.0.1, so requests carrying its forwarding headers do not count as local.
+    """
+
+    def has_permission(self, request, view):
+        meta = request.META
+        direct_local = (
+            meta.get('REMOTE_ADDR') in LOOPBACK_ADDRESSES
+            and 'HTTP_X_FORWARDED_FOR' not in meta
+            and 'HTTP_X_REAL_IP' not in meta
+        )
+        return direct_local or super().has_permission(request, view)
@@ -1,3 +1,37 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .management.commands.audit_query_plans import sqlite_scanned_tables
+
+
+class SQLiteScanDetectionTests(SimpleTestCase):
+    """audit_query_plans flags full reads of a table, not index walks that stop at a LIMIT."""
+
+    LATEST = ('SELECT "transactions_transaction"."id" FROM "transactions_transaction" '
+              'ORDER BY "transactions_transaction"."created_at" DESC LIMIT 10')
+
+    def test_plain_scan_is_flagged(self):
+        plan = ['SCAN transactions_loan', 'USE TEMP B-TREE FOR GROUP BY']
+        self.assertEqual(sqlite_scanned_tables('SELECT 1 FROM "transactions_loan" GROUP BY 1', plan),
+                         {'transactions_loan'})
+
+    def test_searches_are_not_flagged(self):
+        plan = ['SEARCH transactions_loan USING INDEX transaction_status_663226_idx (status=?)']
+        self.assertEqual(sqlite_scanned_tables('SELECT 1 FROM "transactions_loan" WHERE status = %s', plan), set())
+
+    def test_ordered_index_walk_with_limit_is_not_flagged(self):
+        plan = ['SCAN transactions_transaction USING INDEX transactions_transaction_created_at_8bc781f4',
+                'SEARCH transactions_loan USING INTEGER PRIMARY KEY (rowid=?)']
+        self.assertEqual(sqlite_scanned_tables(self.LATEST, plan), set())
+
+    def test_index_walk_without_limit_or_with_a_sort_is_flagged(self):
+        walk = ['SCAN transactions_loan USING INDEX transactions_loan_customer_id_785c86c2']
+        self.assertEqual(sqlite_scanned_tables('SELECT 1 FROM "transactions_loan" ORDER BY "customer_id"', walk),
+                         {'transactions_loan'})
+        sorted_walk = ['SCAN transactions_transaction USING COVERING INDEX transaction_posted__d3357f_idx',
+                       'USE TEMP B-TREE FOR ORDER BY']
+        self.assertEqual(sqlite_scanned_tables(self.LATEST, sorted_walk), {'transactions_transaction'})
+
+    def test_inner_index_walk_is_flagged_despite_the_limit(self):
+        plan = ['SCAN transactions_transaction USING INDEX transactions_transaction_created_at_8bc781f4',
+                'SCAN transactions_loan USING COVERING INDEX transactions_loan_customer_id_785c86c2']
+        self.assertEqual(sqlite_scanned_tables(self.LATEST, plan), {'transactions_loan'})
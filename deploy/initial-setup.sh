@@ -149,6 +149,18 @@ chown finance:finance /var/backups/finance_app
 CRON_LINE="0 2 * * * cd $APP_DIR/backend/finance_app && $APP_DIR/backend/venv/bin/python manage.py backup_data >> /var/log/finance_backup.log 2>&1"
 (sudo -u finance crontab -l 2>/dev/null | grep -v backup_data; echo "$CRON_LINE") | sudo -u finance crontab -
 
+# Nightly interest accrual for Monthly and DL loans
+ACCRUAL_CRON_LINE="30 0 * * * cd $APP_DIR/backend/finance_app && $APP_DIR/backend/venv/bin/python manage.py accrue_interest >> /var/log/finance_jobs.log 2>&1"
+(sudo -u finance crontab -l 2>/dev/null | grep -v accrue_interest; echo "$ACCRUAL_CRON_LINE") | sudo -u finance crontab -
+
+# Nightly overdue detection (after accrual)
+STATUS_CRON_LINE="45 0 * * * cd $APP_DIR/backend/finance_app && $APP_DIR/backend/venv/bin/python manage.py refresh_loan_status >> /var/log/finance_jobs.log 2>&1"
+(sudo -u finance crontab -l 2>/dev/null | grep -v refresh_loan_status; echo "$STATUS_CRON_LINE") | sudo -u finance crontab -
+
+# Nightly schedule backfill / Monthly horizon extension
+SCHEDULE_CRON_LINE="15 1 * * * cd $APP_DIR/backend/finance_app && $APP_DIR/backend/venv/bin/python manage.py build_schedules >> /var/log/finance_jobs.log 2>&1"
+(sudo -u finance crontab -l 2>/dev/null | grep -v build_schedules; echo "$SCHEDULE_CRON_LINE") | sudo -u finance crontab -
+
 echo ""
 echo "========================================"
 echo " Setup Complete! ✓"
@@ -149,7 +149,7 @@ export default function CustomerDetailsPage({ params }: { params: Promise<{ id:
     const totalInterest = entries.reduce((sum, e) => sum + Number(e.interest_amount || 0), 0)
     const totalLoanAmount = loans.reduce((sum, l) => sum + l.principal_amount, 0)
     const totalBalance = loans.reduce((sum, l) => sum + l.remaining_amount, 0)
-    const activeLoansCount = loans.filter(l => l.status === 'active').length
+    const activeLoansCount = loans.filter(l => l.status !== 'settled').length
 
     if (loading) {
         return (
@@ -315,13 +315,16 @@ export default function CustomerDetailsPage({ params }: { params: Promise<{ id:
                         </CardHeader>
                         <CardContent>
                             <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-4">
-                                {loans.filter(loan => loanStatusFilter === 'all' || loan.status === loanStatusFilter).map(loan => (
+                                {loans.filter(loan => loanStatusFilter === 'all' || (loanStatusFilter === 'active'
+                                    // Overdue loans are still being collected, so they belong with the active ones
+                                    ? loan.status !== 'settled'
+                                    : loan.status === loanStatusFilter)).map(loan => (
                                     <div
                                         key={loan.id}
                                         onClick={() => handleLoanClick(loan.id)}
                                         className={`p-4 rounded-lg border cursor-pointer transition-all ${selectedLoanId === loan.id
                                             ? 'border-primary bg-primary/10 ring-2 ring-primary/30'
-                                            : loan.status === 'active'
+                                            : loan.status !== 'settled'
                                                 ? 'border-border/50 bg-muted/20 hover:border-primary/50 hover:bg-primary/5'
                                                 : 'border-border/30 bg-muted/10 hover:border-primary/50 hover:bg-primary/5'
                                             }`}
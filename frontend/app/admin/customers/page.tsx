@@ -1333,7 +1333,7 @@ export default function CustomersPage() {
                   </thead>
                   <tbody>
                     {filteredCustomers.map((customer) => {
-                      const activeLoanCount = customer.loans.filter((l) => l.status === 'active').length
+                      const activeLoanCount = customer.loans.filter((l) => l.status !== 'settled').length
                       const totalLoanAmount = customer.loans.reduce((sum, l) => sum + l.principal_amount, 0)
                       const totalRemainingAmount = customer.loans.reduce((sum, l) => sum + (l.remaining_amount || 0), 0)
 
@@ -277,7 +277,7 @@ export default function CollectionsPage() {
       const customersWithLoans = await Promise.all(
         data.map(async (customer: any) => {
           try {
-            const loans = await loansApi.getAll({ customer_id: customer.id, status: 'active' })
+            const loans = await loansApi.getAll({ customer_id: customer.id, status: 'active,overdue' })
             return {
               ...customer,
               loans: loans.map((loan: any) => ({
@@ -321,7 +321,7 @@ export default function CollectionsPage() {
       customersWithLoans.forEach((customer: Customer) => {
         // Get ALL matching loans for this customer (not just the first one)
         const matchingLoans = customer.loans.filter((loan: Loan) =>
-          loan.status === 'active' && loan.loan_type === selectedLoanType
+          loan.status !== 'settled' && loan.loan_type === selectedLoanType
         )
 
         matchingLoans.forEach((loan: Loan) => {
@@ -476,7 +476,7 @@ export default function CollectionsPage() {
       customers.forEach((customer: Customer) => {
         // Get ALL matching loans for this customer (not just the first one)
         const matchingLoans = customer.loans.filter((loan: Loan) =>
-          loan.status === 'active' && loan.loan_type === selectedLoanType
+          loan.status !== 'settled' && loan.loan_type === selectedLoanType
         )
 
         matchingLoans.forEach((loan: Loan) => {
@@ -525,7 +525,7 @@ export default function CollectionsPage() {
       const matchesArea = areaFilter === 'all' || customer.area === areaFilter
       if (matchesSearch && matchesArea) {
         customer.loans
-          .filter(loan => loan.loan_type === selectedLoanType && loan.status === 'active')
+          .filter(loan => loan.loan_type === selectedLoanType && loan.status !== 'settled')
           .forEach(loan => {
             // Apply paid/unpaid filter
             if (paymentStatusFilter !== 'all') {
@@ -552,7 +552,7 @@ export default function CollectionsPage() {
   // Keep for backward compat with other parts
   const getFilteredCustomers = () => {
     return customers.filter((customer) => {
-      const hasLoanType = customer.loans.some((loan) => loan.loan_type === selectedLoanType && loan.status === 'active')
+      const hasLoanType = customer.loans.some((loan) => loan.loan_type === selectedLoanType && loan.status !== 'settled')
       const matchesSearch = customer.name.toLowerCase().includes(searchTerm.toLowerCase())
       const matchesArea = areaFilter === 'all' || customer.area === areaFilter
       return hasLoanType && matchesSearch && matchesArea
@@ -563,7 +563,7 @@ export default function CollectionsPage() {
   const getAvailableLoans = () => {
     if (!selectedCustomer) return []
     return selectedCustomer.loans.filter((loan) =>
-      loan.status === 'active' && loan.loan_type === selectedLoanType
+      loan.status !== 'settled' && loan.loan_type === selectedLoanType
     )
   }
 
@@ -62,7 +62,7 @@ export default function CollectorDashboard() {
       try {
         const [customersRes, loansRes, transactionsRes] = await Promise.all([
           customersApi.getAll({ all: true }),
-          loansApi.getAll({ status: 'active' }),
+          loansApi.getAll({ status: 'active,overdue' }),
           transactionsApi.getAll({ start_date: todayStr, end_date: todayStr }),
         ])
         if (cancelled) return